@@ -0,0 +1,7 @@
+from django.urls import path
+from .async_views import AsyncRegistrationView, AsyncLoginView
+
+urlpatterns = [
+    path("registration/", AsyncRegistrationView.as_view(), name="registration"),
+    path("login/", AsyncLoginView.as_view(), name="login")
+]
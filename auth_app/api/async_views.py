@@ -0,0 +1,74 @@
+from asgiref.sync import sync_to_async
+from rest_framework import serializers, status
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from kanban_app.api.async_views import AsyncReadView
+from .hashing import ahash_password
+from .serializers import RegistrationSerializer, LoginSerializer
+from .views import RegistrationView, LoginView, loaded_token, login_data, registration_data
+
+
+class AsyncCredentialsView(AsyncReadView):
+    """
+    Base class of the async login and registration.
+
+    The POST requests are answered in the event loop, while the password is hashed in the
+    hashing pool. Other methods and the browsable API are passed to the sync view.
+    """
+
+    async_methods = ["POST"]
+
+    def parse(self, request):
+        """Parses the request body with the parsers of DRF, so the same content types are accepted."""
+
+        return Request(request, parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES]).data
+
+
+class AsyncRegistrationView(AsyncCredentialsView):
+    """Async POST of RegistrationView."""
+
+    sync_view_class = RegistrationView
+
+    async def post(self, request):
+        """
+        This method does the following:
+            - runs the validation of the serializer in a thread, because it checks the email in the database
+            - hashes the password in the hashing pool
+            - saves the new user and creates its token
+        """
+
+        data = self.parse(request)
+        serializer = RegistrationSerializer(data=data)
+        if not await sync_to_async(serializer.is_valid)():
+            return self.render(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        password_hash = await ahash_password(serializer.validated_data["password"])
+        user = await sync_to_async(serializer.save)(password_hash=password_hash)
+        token = await Token.objects.acreate(user=user)
+        return self.render(registration_data(user, token, data["fullname"]), status=status.HTTP_201_CREATED)
+
+
+class AsyncLoginView(AsyncCredentialsView):
+    """Async POST of LoginView."""
+
+    sync_view_class = LoginView
+
+    async def post(self, request):
+        """
+        This method does the following:
+            - validates the fields of the serializer, wich doesn't touch the database
+            - loads the user and its token with one query and checks the password in the hashing pool
+            - creates the token, if the user has none yet
+        """
+
+        serializer = LoginSerializer(data=self.parse(request))
+        try:
+            data = await serializer.avalidate(serializer.to_internal_value(serializer.initial_data))
+        except serializers.ValidationError as exc:
+            return self.render(serializers.as_serializer_error(exc), status=status.HTTP_400_BAD_REQUEST)
+
+        user = data["user"]
+        token = loaded_token(user) or (await Token.objects.aget_or_create(user=user))[0]
+        return self.render(login_data(user, token), status=status.HTTP_200_OK)
+
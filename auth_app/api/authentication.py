@@ -0,0 +1,188 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import HTTP_HEADER_ENCODING, exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+
+
+CACHE_KEY = "auth:token:{}"
+
+DEFAULTS = {
+    "MAX_SIZE": 10000,
+    "TTL": 30,
+    "SHARED_TIMEOUT": 30,
+}
+
+
+def get_setting(name):
+    """Returns a value of the TOKEN_AUTH_CACHE setting or its default."""
+
+    return getattr(settings, "TOKEN_AUTH_CACHE", {}).get(name, DEFAULTS[name])
+
+
+class TokenCache:
+    """
+    Bounded in-process LRU cache of tokens with a time to live.
+
+    It makes sure that:
+        - at most max_size tokens are kept, the least recently used one is dropped first
+        - entries expire after ttl seconds, which bounds how long another worker process
+          can use a token after it was invalidated by a signal in this process
+        - it can be used from several threads at once
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the cached token or None, if it is unknown or expired."""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            token, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return token
+
+    def set(self, key, token):
+        """Stores the token and drops the least recently used ones above the size limit."""
+
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (token, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        """Removes a single token."""
+
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Removes all tokens."""
+
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(get_setting("MAX_SIZE"), get_setting("TTL"))
+
+
+def get_cached_token(key):
+    """Returns the token with its user from the local or the shared cache, or None."""
+
+    token = token_cache.get(key)
+    if token is None and get_setting("SHARED_TIMEOUT"):
+        token = cache.get(CACHE_KEY.format(key))
+        if token is not None:
+            token_cache.set(key, token)
+    return token
+
+
+def cache_token(token):
+    """Stores the token with its user in the local and the shared cache."""
+
+    token_cache.set(token.key, token)
+    timeout = get_setting("SHARED_TIMEOUT")
+    if timeout:
+        cache.set(CACHE_KEY.format(token.key), token, timeout)
+
+
+def invalidate_tokens(keys):
+    """Removes the given tokens from the local and the shared cache."""
+
+    keys = list(keys)
+    for key in keys:
+        token_cache.discard(key)
+    if keys and get_setting("SHARED_TIMEOUT"):
+        cache.delete_many([CACHE_KEY.format(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in replacement for the TokenAuthentication of DRF.
+
+    The token and its user are cached, so most requests are authenticated without
+    any database query. The cache is invalidated by the signals in auth_app.signals.
+    """
+
+    def authenticate_credentials(self, key):
+        token = get_cached_token(key)
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            cache_token(token)
+        elif not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+        return self.copy_credentials(token)
+
+    async def aauthenticate(self, request):
+        """
+        Async variant of authenticate() for the async views.
+
+        Works with a plain Django request and only uses the async APIs of the cache and the ORM.
+        """
+
+        key = self.get_key(request)
+        if key is None:
+            return None
+
+        # Like get_cached_token(), the local cache is only filled on a miss, so its entries expire
+        # after the TTL even if the token is used all the time.
+        token = token_cache.get(key)
+        if token is None and get_setting("SHARED_TIMEOUT"):
+            token = await cache.aget(CACHE_KEY.format(key))
+            if token is not None:
+                token_cache.set(key, token)
+        if token is None:
+            try:
+                token = await self.get_model().objects.select_related("user").aget(key=key)
+            except self.get_model().DoesNotExist:
+                raise exceptions.AuthenticationFailed(_("Invalid token."))
+            token_cache.set(key, token)
+            if get_setting("SHARED_TIMEOUT"):
+                await cache.aset(CACHE_KEY.format(key), token, get_setting("SHARED_TIMEOUT"))
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+        return self.copy_credentials(token)
+
+    def get_key(self, request):
+        """Returns the token of the Authorization header or None, if there is no token header."""
+
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode(HTTP_HEADER_ENCODING):
+            return None
+        if len(auth) == 1:
+            raise exceptions.AuthenticationFailed(_("Invalid token header. No credentials provided."))
+        if len(auth) > 2:
+            raise exceptions.AuthenticationFailed(_("Invalid token header. Token string should not contain spaces."))
+        try:
+            return auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(
+                _("Invalid token header. Token string should not contain invalid characters."))
+
+    def copy_credentials(self, token):
+        """
+        Returns the user and a copy of the cached token.
+
+        Every request gets its own copy, so changes to request.user can't leak into other requests.
+        """
+
+        token = copy.copy(token)
+        token.user = copy.copy(token.user)
+        return (token.user, token)
@@ -0,0 +1,137 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+from rest_framework import exceptions, status
+
+
+DEFAULTS = {
+    "MAX_WORKERS": 2,
+    "MAX_QUEUE": 16,
+    "RETRY_AFTER": 1,
+}
+
+
+def get_setting(name):
+    """Returns a value of the PASSWORD_HASHING_POOL setting or its default."""
+
+    return getattr(settings, "PASSWORD_HASHING_POOL", {}).get(name, DEFAULTS[name])
+
+
+class HashingPoolSaturated(exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many logins at the moment, please try again shortly."
+    default_code = "hashing_pool_saturated"
+
+    def __init__(self, wait=None):
+        super().__init__()
+        # Turned into a Retry-After header by the exception handler of DRF.
+        self.wait = wait if wait is not None else get_setting("RETRY_AFTER")
+
+
+class HashingPool:
+    """
+    Runs the password hashing in a few dedicated threads with a bounded queue.
+
+    It makes sure that:
+        - at most max_workers hashes are computed at once, so a burst of logins can't
+          take every thread of the worker and starve the other endpoints
+        - at most max_queue hashes wait for a free thread, every further request is
+          rejected right away with a 503 response instead of waiting
+        - it can be used from request threads and from the event loop
+
+    hashlib releases the GIL while it computes PBKDF2, so the threads hash in parallel
+    to the request threads without a process pool.
+    """
+
+    def __init__(self, max_workers, max_queue):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hashing")
+        self.slots = threading.BoundedSemaphore(max_workers + max_queue)
+
+    def submit(self, func, *args):
+        """Submits the function to the pool and returns its future. Raises HashingPoolSaturated if it's full."""
+
+        if not self.slots.acquire(blocking=False):
+            raise HashingPoolSaturated()
+        try:
+            future = self.executor.submit(func, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda future: self.slots.release())
+        return future
+
+    def run(self, func, *args):
+        """Runs the function in the pool and waits for its result."""
+
+        return self.submit(func, *args).result()
+
+    async def arun(self, func, *args):
+        """Runs the function in the pool without blocking the event loop."""
+
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Returns the hashing pool of the process, configured by settings.PASSWORD_HASHING_POOL."""
+
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool(get_setting("MAX_WORKERS"), get_setting("MAX_QUEUE"))
+    return _pool
+
+
+def hash_password(raw_password):
+    """Returns the hash of the password, computed in the hashing pool."""
+
+    return get_pool().run(make_password, raw_password)
+
+
+async def ahash_password(raw_password):
+    """Async variant of hash_password()."""
+
+    return await get_pool().arun(make_password, raw_password)
+
+
+def verify_password(user, raw_password):
+    """
+    Checks the password of the user in the hashing pool, like User.check_password().
+
+    If the hash uses outdated parameters, the password is hashed again and saved.
+    """
+
+    if not get_pool().run(check_password, raw_password, user.password):
+        return False
+    if must_update(user.password):
+        user.password = hash_password(raw_password)
+        user.save(update_fields=["password"])
+    return True
+
+
+async def averify_password(user, raw_password):
+    """Async variant of verify_password()."""
+
+    if not await get_pool().arun(check_password, raw_password, user.password):
+        return False
+    if must_update(user.password):
+        user.password = await ahash_password(raw_password)
+        await user.asave(update_fields=["password"])
+    return True
+
+
+def must_update(encoded):
+    """Returns True, if the hash was made with another hasher or other parameters than the current ones."""
+
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False
+    preferred = get_hasher("default")
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
+from .hashing import averify_password, hash_password, verify_password
 
 
 class RegistrationSerializer(serializers.ModelSerializer):
@@ -42,13 +43,14 @@ class RegistrationSerializer(serializers.ModelSerializer):
         """
         This method does the following:
             - creates a new user instance
-            - hashes the entered password
+            - hashes the entered password in the hashing pool, unless the hash was passed to save()
+              as password_hash by the async view
             - saves the new user to the database
             - returns the new instance
         """
 
         account = User(username=validated_data["fullname"], email=validated_data["email"])
-        account.set_password(validated_data["password"])
+        account.password = validated_data.get("password_hash") or hash_password(validated_data["password"])
         account.save()
         return account
     
@@ -71,15 +73,36 @@ class LoginSerializer(serializers.ModelSerializer):
             - checks if the entered password matches the password in the database
         """
 
-        try:
-            user = User.objects.get(email=data["email"])
-        except User.DoesNotExist:
+        user = self.get_user(User.objects, data["email"]).first()
+        if user is None:
             raise serializers.ValidationError({ "error": "Email does not exist!" })
 
-        if not user.check_password(data["password"]):
+        if not verify_password(user, data["password"]):
             raise serializers.ValidationError({ "error": "Password does not match!" })
         
         data["user"] = user
         return data
+
+    async def avalidate(self, data):
+        """Async variant of validate() for the async login view."""
+
+        user = await self.get_user(User.objects, data["email"]).afirst()
+        if user is None:
+            raise serializers.ValidationError({ "error": "Email does not exist!" })
+
+        if not await averify_password(user, data["password"]):
+            raise serializers.ValidationError({ "error": "Password does not match!" })
+
+        data["user"] = user
+        return data
+
+    def get_user(self, queryset, email):
+        """
+        Returns the queryset of the user with the email.
+
+        It's a single query on the email index, that also loads the token of the user.
+        """
+
+        return queryset.select_related("auth_token").filter(email=email).order_by("pk")
         
         
@@ -4,7 +4,38 @@ from rest_framework.authtoken.models import Token
 from rest_framework.response import Response
 from rest_framework import status
 from .serializers import RegistrationSerializer, LoginSerializer
-        
+
+
+def loaded_token(user):
+    """Returns the token, that was loaded together with the user, or None if the user has none yet."""
+
+    try:
+        return user.auth_token
+    except Token.DoesNotExist:
+        return None
+
+
+def registration_data(user, token, fullname):
+    """Returns the response data of a registration."""
+
+    return {
+        "token": token.key,
+        "fullname": fullname,
+        "email": user.email,
+        "user_id": user.pk
+    }
+
+
+def login_data(user, token):
+    """Returns the response data of a login."""
+
+    return {
+        "token": token.key,
+        "fullname": user.username,
+        "email": user.email,
+        "user_id": user.pk
+    }
+
 
 class RegistrationView(APIView):
     """Register a new user."""
@@ -19,21 +50,18 @@ class RegistrationView(APIView):
             - crates a token and associates it with the user
             - sends back a json response
 
+        The password is hashed in the hashing pool.
+
         The response includes the following:
             - 200 OK if the request was a success
             - 400 if it was a bad request
+            - 503 if the hashing pool is full
         """
         serializer = RegistrationSerializer(data=req.data)
         if serializer.is_valid():
             user = serializer.save()
-            token, created = Token.objects.get_or_create(user=user)
-            data = {
-                "token": token.key,
-                "fullname": req.data["fullname"],
-                "email": user.email,
-                "user_id": user.pk
-            }
-            return Response(data, status=status.HTTP_201_CREATED)
+            token = Token.objects.create(user=user)
+            return Response(registration_data(user, token, req.data["fullname"]), status=status.HTTP_201_CREATED)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
@@ -50,20 +78,18 @@ class LoginView(APIView):
             - gives back a token to authenticate the user
             - sends back a json response
 
+        The user and its token are loaded with one query and the password is checked in the
+        hashing pool.
+
         The response includes the following:
             - 200 OK if the the email and password are correct
             - 400 if either/both the email and/or password are incorrect
+            - 503 if the hashing pool is full
         """
         serializer = LoginSerializer(data=req.data)
         if serializer.is_valid():
             user = serializer.validated_data["user"]
-            token, created = Token.objects.get_or_create(user=user)
-            data = {
-                "token": token.key,
-                "fullname": user.username,
-                "email": user.email,
-                "user_id": user.pk
-            }
-            return Response(data, status=status.HTTP_200_OK)
+            token = loaded_token(user) or Token.objects.get_or_create(user=user)[0]
+            return Response(login_data(user, token), status=status.HTTP_200_OK)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
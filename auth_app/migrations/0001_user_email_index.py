@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 09:41
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Adds an index on the email of the built-in User model.
+
+    The login and the email check look users up by their email, but the model of
+    django.contrib.auth doesn't index it and can't be changed through its Meta class.
+    """
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS "auth_user_email_idx" ON "auth_user" ("email");',
+            reverse_sql='DROP INDEX IF EXISTS "auth_user_email_idx";',
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-18 14:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Adds indexes on lower(email) and lower(username) of the built-in User model.
+
+    The user search filters and orders by these expressions, so a prefix lookup only
+    reads the matching entries of the index instead of scanning the whole table.
+    """
+
+    dependencies = [
+        ('auth_app', '0001_user_email_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS "auth_user_email_lower_idx" ON "auth_user" (LOWER("email"));',
+            reverse_sql='DROP INDEX IF EXISTS "auth_user_email_lower_idx";',
+        ),
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS "auth_user_username_lower_idx" ON "auth_user" (LOWER("username"));',
+            reverse_sql='DROP INDEX IF EXISTS "auth_user_username_lower_idx";',
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from auth_app.api.authentication import invalidate_tokens
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Removes a deleted token from the authentication cache."""
+
+    invalidate_tokens([instance.key])
+
+
+@receiver(post_save, sender=User)
+def invalidate_tokens_of_user(sender, instance, created, **kwargs):
+    """
+    Removes the tokens of a changed user from the authentication cache,
+    so a deactivation or a new username takes effect right away.
+    """
+
+    if not created:
+        invalidate_tokens(Token.objects.filter(user_id=instance.pk).values_list("key", flat=True))
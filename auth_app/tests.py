@@ -1,3 +1,80 @@
-from django.test import TestCase
+import json
+import threading
+from unittest.mock import patch
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from rest_framework import exceptions
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from auth_app.api import hashing
+from auth_app.api.async_views import AsyncLoginView
+from auth_app.api.authentication import CachedTokenAuthentication, token_cache
 
-# Create your tests here.
+
+@override_settings(TOKEN_AUTH_CACHE={"SHARED_TIMEOUT": 0})
+class CachedTokenAuthenticationTests(TestCase):
+    """The local token cache bounds how long a token, that was invalidated in another worker, stays usable."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user("user", "user@example.com", "password")
+        self.token = Token.objects.create(user=self.user)
+        self.request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def tearDown(self):
+        token_cache.clear()
+
+    def authenticate_at(self, now):
+        with patch("auth_app.api.authentication.time") as time:
+            time.monotonic.return_value = now
+            return async_to_sync(CachedTokenAuthentication().aauthenticate)(self.request)
+
+    def test_hits_do_not_extend_the_ttl(self):
+        self.assertEqual(self.authenticate_at(0)[0].pk, self.user.pk)
+        # Deactivated without the signals, like in another worker process.
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        self.assertEqual(self.authenticate_at(token_cache.ttl - 1)[0].pk, self.user.pk)
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate_at(token_cache.ttl + 1)
+
+
+class PasswordHashingTests(TestCase):
+    """The passwords are hashed in the bounded pool, that turns requests away once it's full."""
+
+    def setUp(self):
+        self.user = User.objects.create_user("user", "user@example.com", "password")
+        self.token = Token.objects.create(user=self.user)
+
+    def login(self, password="password"):
+        return APIClient().post("/api/login/", {"email": "user@example.com", "password": password}, format="json")
+
+    def test_login_loads_the_user_and_the_token_with_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.login()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["token"], self.token.key)
+        self.assertEqual(self.login("wrong").status_code, 400)
+
+    def test_full_pool_rejects_the_login(self):
+        pool = hashing.HashingPool(max_workers=1, max_queue=0)
+        release = threading.Event()
+        pool.submit(release.wait)
+        self.addCleanup(release.set)
+
+        with patch.object(hashing, "_pool", pool):
+            response = self.login()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], str(hashing.get_setting("RETRY_AFTER")))
+
+    async def test_async_login(self):
+        request = AsyncRequestFactory().post(
+            "/api/login/", {"email": "user@example.com", "password": "password"}, content_type="application/json")
+
+        response = await AsyncLoginView.as_view()(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["token"], self.token.key)
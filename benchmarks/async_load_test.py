@@ -0,0 +1,198 @@
+"""
+Compares the throughput of the read endpoints under WSGI (sync views) and ASGI (async views).
+
+The script seeds a fresh SQLite database, starts one server process after the other against it
+and sends the same mix of GET requests with many concurrent clients:
+    - wsgi: gunicorn with one worker and a few threads, serving the sync views
+    - asgi: uvicorn with one worker, serving the async views
+
+With --slow-ms every client pauses between sending the request line and the rest of the headers,
+like a client on a slow network.
+
+Keep in mind, that the async ORM still runs the queries in a thread. With SQLite the async views
+mainly free the worker from waiting clients, they don't make the queries faster.
+
+Needs gunicorn and uvicorn, servers that aren't installed are skipped.
+
+Usage:
+    python benchmarks/async_load_test.py --concurrency 100 --duration 10 --slow-ms 200
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import BASE_DIR, seed, setup_django, summary
+
+
+SETTINGS = """from core.settings import *
+
+DEBUG = False
+ALLOWED_HOSTS = ["127.0.0.1"]
+DATABASES["default"]["NAME"] = {db_path!r}
+"""
+
+
+def server_commands(port, threads):
+    """Returns the servers to compare as a list of (name, command, environment) tuples."""
+
+    address = f"127.0.0.1:{port}"
+    return [
+        ("wsgi", ["gunicorn", "--workers", "1", "--threads", str(threads), "--bind", address,
+                  "--log-level", "warning", "core.wsgi:application"], {"KANBAN_ASYNC_VIEWS": "0"}),
+        ("asgi", ["uvicorn", "--workers", "1", "--host", "127.0.0.1", "--port", str(port),
+                  "--log-level", "warning", "--no-access-log", "core.asgi:application"], {"KANBAN_ASYNC_VIEWS": "1"}),
+    ]
+
+
+def prepare(args):
+    """Seeds the database and returns the token and the paths of the requests."""
+
+    from django.core.management import call_command
+    from rest_framework.authtoken.models import Token
+    from kanban_app.models import Board, Ticket
+
+    call_command("migrate", verbosity=0)
+    seed(users=args.users, boards=args.boards, tickets=args.tickets, comments=args.comments)
+
+    board = Board.objects.order_by("pk").first()
+    user = board.members.order_by("pk").first()
+    ticket = Ticket.objects.filter(board=board).order_by("pk").first()
+    token = Token.objects.create(user=user)
+
+    paths = [
+        "/api/boards/",
+        f"/api/boards/{board.pk}/",
+        "/api/tasks/assigned-to-me/",
+        "/api/tasks/reviewing/",
+        f"/api/tasks/{ticket.pk}/comments/",
+    ]
+    return token.key, paths
+
+
+async def send(port, path, token, slow_ms):
+    """Sends one GET request and returns the status code, or 0 if the connection failed."""
+
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {path} HTTP/1.1\r\n".encode())
+        if slow_ms:
+            await writer.drain()
+            await asyncio.sleep(slow_ms / 1000)
+        writer.write((f"Host: 127.0.0.1:{port}\r\nAuthorization: Token {token}\r\n"
+                      "Accept: application/json\r\nConnection: close\r\n\r\n").encode())
+        await writer.drain()
+        status_line = await reader.readline()
+        while await reader.read(65536):
+            pass
+        writer.close()
+        return int(status_line.split()[1])
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+async def client(port, paths, token, slow_ms, deadline, results, offset):
+    """Sends requests in a loop until the deadline and appends (duration in ms, status) to results."""
+
+    index = offset
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        status = await send(port, paths[index % len(paths)], token, slow_ms)
+        results.append(((time.perf_counter() - start) * 1000, status))
+        index += 1
+
+
+async def load(port, paths, token, args, duration):
+    """Runs the clients for the given seconds and returns their results."""
+
+    results = []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*[
+        client(port, paths, token, args.slow_ms, deadline, results, offset) for offset in range(args.concurrency)])
+    return results
+
+
+def wait_for_server(port, process, timeout=30):
+    """Waits until the server accepts connections."""
+
+    async def connect():
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return True
+        except OSError:
+            return False
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The server exited during the start.")
+        if asyncio.run(connect()):
+            return
+        time.sleep(0.2)
+    raise RuntimeError("The server didn't start in time.")
+
+
+def run_server(name, command, extra_env, settings_dir, port, paths, token, args):
+    """Starts the server, runs the load test against it and prints the results."""
+
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE="bench_settings",
+               PYTHONPATH=os.pathsep.join([settings_dir, str(BASE_DIR)]), **extra_env)
+    process = subprocess.Popen(command, cwd=BASE_DIR, env=env)
+    try:
+        wait_for_server(port, process)
+        asyncio.run(load(port, paths, token, args, duration=1))
+        results = asyncio.run(load(port, paths, token, args, args.duration))
+    finally:
+        process.terminate()
+        process.wait()
+
+    durations = [duration for duration, status in results if status == 200]
+    errors = len(results) - len(durations)
+    median, p95 = summary(durations) if durations else (0, 0)
+    print(f"{name:<6} {len(results):>9} {len(durations) / args.duration:>9.1f} "
+          f"{median:>10.1f} {p95:>10.1f} {errors:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--boards", type=int, default=100)
+    parser.add_argument("--tickets", type=int, default=10000)
+    parser.add_argument("--comments", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=int, default=10, help="Seconds of load per server.")
+    parser.add_argument("--slow-ms", type=int, default=0, help="Pause of every client while sending the request.")
+    parser.add_argument("--threads", type=int, default=4, help="Threads of the WSGI worker.")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    settings_dir = tempfile.mkdtemp(prefix="kanmind-bench-")
+    try:
+        token, paths = prepare(args)
+        from django.db import connection
+        connection.close()
+
+        with open(os.path.join(settings_dir, "bench_settings.py"), "w") as file:
+            file.write(SETTINGS.format(db_path=str(db_path)))
+
+        print(f"{args.concurrency} clients, {args.duration} s per server, {args.slow_ms} ms slow clients\n")
+        print(f"{'server':<6} {'requests':>9} {'ok req/s':>9} {'median ms':>10} {'p95 ms':>10} {'errors':>7}")
+        for name, command, extra_env in server_commands(args.port, args.threads):
+            if shutil.which(command[0]) is None:
+                print(f"{name:<6} skipped, {command[0]} is not installed")
+                continue
+            run_server(name, command, extra_env, settings_dir, args.port, paths, token, args)
+    finally:
+        shutil.rmtree(settings_dir)
+        os.remove(db_path)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Shared helpers for the benchmark scripts.
+
+The scripts are started from the project root, e.g. ``python benchmarks/index_benchmark.py``.
+They never touch db.sqlite3, but run against a separate SQLite file.
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django(db_path=None):
+    """Configures Django to use a separate SQLite file and returns its path."""
+
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+    from django.conf import settings
+
+    if db_path is None:
+        handle, db_path = tempfile.mkstemp(prefix="kanmind-bench-", suffix=".sqlite3")
+        os.close(handle)
+    settings.DATABASES["default"]["NAME"] = str(db_path)
+
+    import django
+    django.setup()
+    return db_path
+
+
+def measure(func, repeat):
+    """Calls the function repeat times and returns the durations in milliseconds."""
+
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def summary(durations):
+    """Returns the median and the 95th percentile of the durations."""
+
+    ordered = sorted(durations)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return statistics.median(ordered), p95
+
+
+def seed(users=1000, boards=200, members_per_board=10, tickets=50000, comments=50000, batch_size=5000):
+    """
+    Fills the database with random users, boards, tickets and comments.
+
+    Everything is written with bulk_create and the board statistics and comment counts are
+    reconciled afterwards, so seeding large datasets only takes a few seconds.
+    """
+
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from kanban_app.models import Board, Ticket, Comment
+
+    rng = random.Random(42)
+    password = make_password("benchmark")
+
+    User.objects.bulk_create(
+        [User(username=f"user{i}", email=f"user{i}@example.com", password=password) for i in range(users)],
+        batch_size=batch_size)
+    user_ids = list(User.objects.values_list("id", flat=True))
+
+    Board.objects.bulk_create(
+        [Board(title=f"Board {i}", owner_id=rng.choice(user_ids)) for i in range(boards)],
+        batch_size=batch_size)
+    board_ids = list(Board.objects.values_list("id", flat=True))
+
+    through = Board.members.through
+    memberships = {}
+    for board_id in board_ids:
+        memberships[board_id] = rng.sample(user_ids, min(members_per_board, len(user_ids)))
+    through.objects.bulk_create(
+        [through(board_id=board_id, user_id=user_id)
+         for board_id, members in memberships.items() for user_id in members],
+        batch_size=batch_size)
+
+    statuses = ["to-do", "in-progress", "review", "done"]
+    priorities = ["low", "medium", "high"]
+    today = date.today()
+    rows = []
+    for i in range(tickets):
+        board_id = rng.choice(board_ids)
+        members = memberships[board_id]
+        rows.append(Ticket(
+            board_id=board_id,
+            title=f"Ticket {i}",
+            description=f"Description of ticket {i}",
+            status=rng.choice(statuses),
+            priority=rng.choice(priorities),
+            assignee_id=rng.choice(members),
+            reviewer_id=rng.choice(members),
+            due_date=today + timedelta(days=rng.randint(-60, 60)),
+            creator_id=rng.choice(members),
+        ))
+        if len(rows) >= batch_size:
+            Ticket.objects.bulk_create(rows)
+            rows = []
+    Ticket.objects.bulk_create(rows)
+    ticket_ids = list(Ticket.objects.values_list("id", flat=True))
+
+    rows = []
+    for i in range(comments):
+        rows.append(Comment(content=f"Comment {i}", author_id=rng.choice(user_ids),
+                            ticket_id=rng.choice(ticket_ids)))
+        if len(rows) >= batch_size:
+            Comment.objects.bulk_create(rows)
+            rows = []
+    Comment.objects.bulk_create(rows)
+
+    call_command("reconcile_board_stats", stdout=open(os.devnull, "w"))
+    call_command("reconcile_comment_counts", stdout=open(os.devnull, "w"))
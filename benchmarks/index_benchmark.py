@@ -0,0 +1,127 @@
+"""
+Shows that the hot queries of the API use the composite indexes.
+
+The script migrates a fresh SQLite database, drops the indexes of the hot queries (the ones
+of 0003_ticket_comment_indexes and auth_app 0001_user_email_index), seeds it, prints the query
+plan and timings of the queries behind every endpoint, then creates the indexes again and
+prints the same again. Only the indexes are removed, so the schema matches the current models.
+
+Usage:
+    python benchmarks/index_benchmark.py --tickets 100000 --comments 100000
+"""
+
+import argparse
+import os
+
+from common import measure, seed, setup_django, summary
+
+
+# Indexes, that aren't declared in the Meta class of a model, as (create, drop) statements.
+RAW_INDEXES = [
+    ('CREATE INDEX IF NOT EXISTS "auth_user_email_idx" ON "auth_user" ("email");',
+     'DROP INDEX IF EXISTS "auth_user_email_idx";'),
+]
+
+
+def indexed_models():
+    from kanban_app.models import Ticket, Comment
+
+    return [Ticket, Comment]
+
+
+def drop_indexes():
+    """Removes the indexes of the hot queries with the schema editor."""
+
+    from django.db import connection
+
+    with connection.schema_editor() as schema_editor:
+        for model in indexed_models():
+            for index in model._meta.indexes:
+                schema_editor.remove_index(model, index)
+        for _, drop in RAW_INDEXES:
+            schema_editor.execute(drop)
+
+
+def create_indexes():
+    """Creates the indexes, that drop_indexes() removed, again."""
+
+    from django.db import connection
+
+    with connection.schema_editor() as schema_editor:
+        for model in indexed_models():
+            for index in model._meta.indexes:
+                schema_editor.add_index(model, index)
+        for create, _ in RAW_INDEXES:
+            schema_editor.execute(create)
+
+
+def endpoint_queries():
+    """Returns the querysets, that the endpoints run, as a list of (name, queryset) tuples."""
+
+    from django.contrib.auth.models import User
+    from django.db.models import Count
+    from kanban_app.models import Board, Ticket, Comment
+
+    user = User.objects.order_by("pk")[User.objects.count() // 2]
+    board = Board.objects.order_by("pk").first()
+    ticket = Ticket.objects.annotate(total=Count("comments")).order_by("-total").first()
+
+    return [
+        ("login / email-check", User.objects.filter(email=user.email)),
+        ("board-list", Board.objects.for_user(user).select_related("stats")),
+        ("board-detail tickets", Ticket.objects.filter(board=board).select_related("assignee", "reviewer")),
+        ("board to-do count", Ticket.objects.filter(board=board, status="to-do").values("pk")),
+        ("board high prio count", Ticket.objects.filter(board=board, priority="high").values("pk")),
+        ("assigned-to-me page", Ticket.objects.filter(assignee=user).order_by("due_date", "id")[:50]),
+        ("reviewing page", Ticket.objects.filter(reviewer=user).order_by("due_date", "id")[:50]),
+        ("comments page", Comment.objects.filter(ticket=ticket).order_by("created_at", "id")[:50]),
+    ]
+
+
+def report(title, repeat):
+    """Prints the query plan and the timings of every endpoint query."""
+
+    print(f"\n===== {title} =====")
+    for name, queryset in endpoint_queries():
+        median, p95 = summary(measure(lambda: list(queryset.all()), repeat))
+        print(f"\n--- {name}: median {median:.3f} ms, p95 {p95:.3f} ms")
+        print(queryset.explain())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--boards", type=int, default=400)
+    parser.add_argument("--tickets", type=int, default=100000)
+    parser.add_argument("--comments", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--keep", action="store_true", help="Keep the SQLite file of the benchmark.")
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    from django.core.management import call_command
+    from django.db import connection
+
+    try:
+        call_command("migrate", verbosity=0)
+        drop_indexes()
+
+        seed(users=args.users, boards=args.boards, tickets=args.tickets, comments=args.comments)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        report("without indexes", args.repeat)
+
+        create_indexes()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        report("with indexes", args.repeat)
+    finally:
+        connection.close()
+        if args.keep:
+            print(f"\nDatabase kept at {db_path}")
+        else:
+            os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
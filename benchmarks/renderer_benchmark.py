@@ -0,0 +1,66 @@
+"""
+Compares the renderers of the API on the payload of GET /api/boards/{board_id}/.
+
+The script seeds a fresh SQLite database with a single board and its tickets, serializes the
+board once like the board detail view does and prints the render time and the payload size,
+also gzipped, for:
+    - the JSONRenderer of DRF, as a baseline
+    - the FastJSONRenderer (orjson)
+    - the MessagePackRenderer
+
+Usage:
+    python benchmarks/renderer_benchmark.py --tickets 1000
+"""
+
+import argparse
+import gzip
+import os
+
+from common import measure, seed, setup_django, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=1000)
+    parser.add_argument("--members", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--keep", action="store_true", help="Keep the SQLite file of the benchmark.")
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    from django.core.management import call_command
+    from django.db import connection
+    from rest_framework.renderers import JSONRenderer
+    from core.renderers import FastJSONRenderer, MessagePackRenderer
+    from kanban_app.api.serializers import BoardRetrieveSerializer
+    from kanban_app.api.views import board_detail_queryset
+
+    try:
+        call_command("migrate", verbosity=0)
+        seed(users=args.members * 5, boards=1, members_per_board=args.members,
+             tickets=args.tickets, comments=args.tickets * 2)
+
+        board = board_detail_queryset().get()
+        data = BoardRetrieveSerializer(board).data
+        print(f"1 board, {len(data['tasks'])} tasks, {len(data['members'])} members, {args.repeat} renders\n")
+
+        baseline = JSONRenderer().render(data)
+        for name, renderer in [("JSONRenderer (json)", JSONRenderer()),
+                               ("FastJSONRenderer (orjson)", FastJSONRenderer()),
+                               ("MessagePackRenderer", MessagePackRenderer())]:
+            content = renderer.render(data)
+            if renderer.format == "json" and content != baseline:
+                print(f"{name}: output differs from the JSONRenderer of DRF")
+            median, p95 = summary(measure(lambda: renderer.render(data), args.repeat))
+            print(f"{name:<28} median {median:.3f} ms, p95 {p95:.3f} ms, "
+                  f"{len(content)} bytes, {len(gzip.compress(content))} bytes gzipped")
+    finally:
+        connection.close()
+        if args.keep:
+            print(f"\nDatabase kept at {db_path}")
+        else:
+            os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
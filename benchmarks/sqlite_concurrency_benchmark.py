@@ -0,0 +1,146 @@
+"""
+Compares the default SQLite configuration with the performance profile under concurrent load.
+
+For every profile the script seeds a fresh SQLite file and starts several processes, that run
+the same mix of operations against it for a fixed time:
+    - read: loads the tickets of a random board, like the board detail
+    - write: loads a random ticket and saves a new title in a transaction, like a task update
+
+It prints the throughput, the latencies and the amount of "database is locked" errors per profile.
+The profile is selected with KANBAN_SQLITE_PROFILE, see the DATABASES setting in core/settings.py.
+
+Usage:
+    python benchmarks/sqlite_concurrency_benchmark.py --processes 8 --duration 10 --write-ratio 0.3
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from common import seed, setup_django, summary
+
+
+PROFILES = ["default", "performance"]
+
+
+def worker(profile, db_path, duration, write_ratio, seed_value, results):
+    """Runs the operation mix until the duration is over and puts its measurements into results."""
+
+    os.environ["KANBAN_SQLITE_PROFILE"] = profile
+    setup_django(db_path)
+    from django.db import OperationalError, close_old_connections, transaction
+    from kanban_app.models import Board, Ticket
+
+    rng = random.Random(seed_value)
+    board_ids = list(Board.objects.values_list("id", flat=True))
+    ticket_ids = list(Ticket.objects.values_list("id", flat=True))
+    durations = {"read": [], "write": []}
+    errors = 0
+
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        # Like the request_started signal, closes the connection unless it's persistent.
+        close_old_connections()
+        kind = "write" if rng.random() < write_ratio else "read"
+        start = time.perf_counter()
+        try:
+            if kind == "read":
+                list(Ticket.objects.filter(board_id=rng.choice(board_ids)).select_related("assignee", "reviewer"))
+            else:
+                with transaction.atomic():
+                    ticket = Ticket.objects.get(pk=rng.choice(ticket_ids))
+                    ticket.title = f"Ticket {rng.randint(0, 10 ** 6)}"
+                    ticket.save()
+        except OperationalError as exc:
+            if "locked" not in str(exc):
+                raise
+            errors += 1
+            continue
+        durations[kind].append((time.perf_counter() - start) * 1000)
+
+    close_old_connections()
+    results.put((durations, errors))
+
+
+def run(profile, args):
+    """Seeds a fresh database for the profile, runs the workers and returns their merged results."""
+
+    db_path = os.path.join(args.directory, f"kanmind-bench-{profile}.sqlite3")
+    for suffix in ["", "-wal", "-shm"]:
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+    context = multiprocessing.get_context("spawn")
+    setup = context.Process(target=prepare, args=(profile, db_path, args))
+    setup.start()
+    setup.join()
+
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(profile, db_path, args.duration, args.write_ratio, i, results))
+                 for i in range(args.processes)]
+    for process in processes:
+        process.start()
+    merged, errors = {"read": [], "write": []}, 0
+    for _ in processes:
+        durations, worker_errors = results.get()
+        errors += worker_errors
+        for kind in merged:
+            merged[kind].extend(durations[kind])
+    for process in processes:
+        process.join()
+
+    if not args.keep:
+        for suffix in ["", "-wal", "-shm"]:
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+    return merged, errors
+
+
+def prepare(profile, db_path, args):
+    """Migrates and seeds the database of the profile."""
+
+    os.environ["KANBAN_SQLITE_PROFILE"] = profile
+    setup_django(db_path)
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+    seed(users=args.users, boards=args.boards, tickets=args.tickets, comments=args.tickets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--write-ratio", type=float, default=0.3)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--boards", type=int, default=100)
+    parser.add_argument("--tickets", type=int, default=20000)
+    parser.add_argument("--directory", default=None, help="Directory of the SQLite files, a temporary one by default.")
+    parser.add_argument("--keep", action="store_true", help="Keep the SQLite files of the benchmark.")
+    args = parser.parse_args()
+
+    temporary = args.directory is None
+    if temporary:
+        args.directory = tempfile.mkdtemp(prefix="kanmind-bench-")
+
+    print(f"{args.processes} processes, {args.duration:g} s, {args.write_ratio:.0%} writes\n")
+    for profile in PROFILES:
+        durations, errors = run(profile, args)
+        print(f"--- {profile}")
+        for kind, values in durations.items():
+            if values:
+                median, p95 = summary(values)
+                print(f"{kind:<6} {len(values) / args.duration:9.1f} ops/s, median {median:.2f} ms, p95 {p95:.2f} ms")
+            else:
+                print(f"{kind:<6} no successful operations")
+        print(f"locked {errors} errors\n")
+
+    if temporary and not args.keep:
+        os.rmdir(args.directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Measures the user search of GET /api/users/search/.
+
+The script seeds a fresh SQLite database with random users, then prints the query plan
+and the timings of random prefixes of 1 to 4 characters for:
+    - a LIKE 'prefix%' query, as a baseline
+    - the range queries on lower(email) and lower(username) of search_users_in_db()
+    - the in-memory prefix index
+
+Usage:
+    python benchmarks/user_search_benchmark.py --users 100000
+"""
+
+import argparse
+import os
+import random
+import string
+
+from common import measure, setup_django, summary
+
+
+FIRST_NAMES = ["anna", "ben", "clara", "david", "emma", "felix", "greta", "hans", "ida", "jonas",
+               "karla", "lukas", "mia", "noah", "olga", "paul", "quinn", "rosa", "sven", "tina"]
+DOMAINS = ["example.com", "mail.test", "kanmind.dev", "corp.example"]
+
+
+def seed_users(count, batch_size=5000):
+    """Creates users with random names and emails, so the prefixes have different amounts of matches."""
+
+    from django.contrib.auth.models import User
+
+    rng = random.Random(42)
+    rows = []
+    for i in range(count):
+        name = f"{rng.choice(FIRST_NAMES)}{''.join(rng.choices(string.ascii_lowercase, k=4))}"
+        rows.append(User(username=f"{name.capitalize()} {i}", email=f"{name}.{i}@{rng.choice(DOMAINS)}",
+                         password="!"))
+        if len(rows) >= batch_size:
+            User.objects.bulk_create(rows)
+            rows = []
+    User.objects.bulk_create(rows)
+
+
+def prefixes(count):
+    rng = random.Random(7)
+    return [rng.choice(FIRST_NAMES)[:rng.randint(1, 4)] for _ in range(count)]
+
+
+def report(name, search, queries, limit):
+    """Runs the search for every prefix and prints the median and the 95th percentile."""
+
+    iterator = iter(queries)
+    median, p95 = summary(measure(lambda: search(next(iterator), limit), len(queries)))
+    print(f"{name:<28} median {median:.3f} ms, p95 {p95:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--keep", action="store_true", help="Keep the SQLite file of the benchmark.")
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.db import connection
+    from django.db.models import Q
+    from django.db.models.functions import Lower
+    from kanban_app.user_search import MAX_CHAR, normalize, prefix_index, search_users_in_db
+
+    def search_like(prefix, limit):
+        return list(User.objects
+                    .filter(Q(email__istartswith=prefix) | Q(username__istartswith=prefix), is_active=True)
+                    .order_by("email")
+                    .values("id", "email", "username")[:limit])
+
+    try:
+        call_command("migrate", verbosity=0)
+        seed_users(args.users)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        queries = [normalize(prefix) for prefix in prefixes(args.repeat)]
+        print(f"{args.users} users, {len(queries)} lookups, limit {args.limit}\n")
+
+        plan = (User.objects.annotate(key=Lower("email"))
+                .filter(key__gte="mia", key__lt="mia" + MAX_CHAR, is_active=True)
+                .order_by("key", "id").values_list("key", "id", "email", "username")[:args.limit])
+        print(f"--- query plan of the range query:\n{plan.explain()}\n")
+
+        report("LIKE 'prefix%'", search_like, queries[:200], args.limit)
+        report("range on lower() indexes", search_users_in_db, queries, args.limit)
+
+        median, _ = summary(measure(prefix_index.build, 1))
+        print(f"{'in-memory index build':<28} {median:.3f} ms")
+        report("in-memory prefix index", prefix_index.search, queries, args.limit)
+    finally:
+        connection.close()
+        if args.keep:
+            print(f"\nDatabase kept at {db_path}")
+        else:
+            os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+DEFAULTS = {
+    "SAMPLE_RATE": 0.0,
+    "MAX_QUERIES": 30,
+    "SLOW_REQUEST_MS": 500,
+    "SLOW_QUERY_MS": 100,
+    "SERVER_TIMING": True,
+}
+
+NUMBER = re.compile(r"\b\d+(\.\d+)?\b")
+STRING = re.compile(r"'(?:[^']|'')*'")
+PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)")
+WHITESPACE = re.compile(r"\s+")
+
+
+def get_setting(name):
+    """Returns a value of the KANBAN_SQL_INSTRUMENTATION setting or its default."""
+
+    return getattr(settings, "KANBAN_SQL_INSTRUMENTATION", {}).get(name, DEFAULTS[name])
+
+
+def fingerprint(sql):
+    """
+    Returns the normalized form of a query, so queries that only differ in their values are equal.
+
+    The ORM passes the values as parameters already, only literals of raw SQL and the length
+    of IN (%s, %s, ...) lists remain to be normalized.
+    """
+
+    sql = STRING.sub("?", sql)
+    sql = NUMBER.sub("?", sql)
+    sql = PLACEHOLDER_LIST.sub("(...)", sql)
+    return WHITESPACE.sub(" ", sql).strip()
+
+
+class QueryStats:
+    """
+    The queries of a single request, collected by the execute wrapper.
+
+    Every query is counted and timed. Only with capture the statements are kept as well,
+    for the duplicates and the slow queries in the log of a sampled request.
+    """
+
+    def __init__(self, capture=True):
+        self.capture = capture
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.slow = []
+
+    def record(self, sql, duration):
+        self.count += 1
+        self.duration += duration
+        if not self.capture:
+            return
+        self.statements[sql] += 1
+        if duration * 1000 >= get_setting("SLOW_QUERY_MS"):
+            self.slow.append((duration, sql))
+
+    def duplicates(self, limit=5):
+        """Returns the most repeated fingerprints as (count, fingerprint) tuples, e.g. the queries of an N+1 loop."""
+
+        fingerprints = Counter()
+        for sql, count in self.statements.items():
+            fingerprints[fingerprint(sql)] += count
+        return [(count, sql) for sql, count in fingerprints.most_common(limit) if count > 1]
+
+
+_stats = ContextVar("query_stats", default=None)
+
+
+def start_request(capture=True):
+    """
+    Starts collecting the queries of a request and returns the token for end_request().
+
+    Without capture the queries are only counted and timed. If an outer middleware collects
+    them already, its QueryStats are shared, they capture the statements from now on if capture
+    is asked for, and None is returned.
+    """
+
+    stats = _stats.get()
+    if stats is not None:
+        stats.capture = stats.capture or capture
+        return None
+    return _stats.set(QueryStats(capture))
+
+
+def end_request(token):
+    """Stops collecting the queries of a request, unless it was started by an outer middleware, and returns its QueryStats."""
+
+    stats = _stats.get()
+    if token is not None:
+        _stats.reset(token)
+    return stats
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    """
+    Measures every query of a collected request.
+
+    It's installed on every connection once and looks up the request in the context variable,
+    so it also sees the queries, that the async views run in the threads of sync_to_async().
+    Outside of a collected request it only costs the lookup of the context variable.
+    """
+
+    stats = _stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record(sql, time.perf_counter() - start)
+
+
+def install(connection):
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+def install_on_current_thread():
+    """Installs the wrapper on the connections of the current thread, that were created before."""
+
+    for connection in connections.all(initialized_only=True):
+        install(connection)
+
+
+def install_on_new_connection(sender, connection, **kwargs):
+    install(connection)
+
+
+connection_created.connect(install_on_new_connection, dispatch_uid="kanban_sql_instrumentation")
@@ -0,0 +1,247 @@
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from django.conf import settings
+
+
+DEFAULTS = {
+    "ENABLED": True,
+    "DIRECTORY": None,
+    "FLUSH_INTERVAL": 5,
+    "TOKEN": None,
+    "PUBLIC": False,
+}
+
+DURATION_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+SIZE_BUCKETS = [256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304]
+
+METRICS = {
+    "kanban_http_requests_total": ("counter", "Requests by view, method and status code."),
+    "kanban_http_request_duration_seconds": ("histogram", "Time until the response was returned by view and method."),
+    "kanban_http_response_size_bytes": ("histogram", "Size of the response bodies by view and method, without streamed responses."),
+    "kanban_http_db_duration_seconds": ("histogram", "Time spent in database queries per request by view and method."),
+}
+
+
+def get_setting(name):
+    """Returns a value of the KANBAN_METRICS setting or its default."""
+
+    return getattr(settings, "KANBAN_METRICS", {}).get(name, DEFAULTS[name])
+
+
+class Shard:
+    """
+    The metrics, that a single thread recorded.
+
+    Only its own thread writes to a shard, so recording needs no lock. The collector reads
+    the shards of all threads, a value that is updated at the same time is seen in the next scrape.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+
+    def increment(self, name, labels, amount=1):
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0, buckets]
+        histogram[0][bisect_left(buckets, value)] += 1
+        histogram[1] += value
+        histogram[2] += 1
+
+    def add(self, other):
+        """Adds the values of another shard, whose thread doesn't record anymore."""
+
+        for key, value in other.counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, (counts, total, count, buckets) in other.histograms.items():
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [[0] * len(counts), 0.0, 0, buckets]
+            histogram[0] = [a + b for a, b in zip(histogram[0], counts)]
+            histogram[1] += total
+            histogram[2] += count
+
+    def snapshot(self):
+        # Copies the dicts first, because the thread of the shard may add keys meanwhile.
+        histograms = {key: [list(counts), total, count, buckets]
+                      for key, (counts, total, count, buckets) in list(self.histograms.items())}
+        return serialize(dict(self.counters), histograms)
+
+
+class Registry:
+    """
+    The metrics of the worker process.
+
+    It makes sure that:
+        - every thread records into its own Shard, without a lock
+        - snapshot() merges the shards of all threads into plain, JSON serializable data
+        - the shards of stopped threads are added to a single retired shard, so a server, that
+          replaces its threads, doesn't keep a shard of every thread it ever started
+        - with a DIRECTORY, the snapshot is written to a file of the process every FLUSH_INTERVAL
+          seconds, so the metrics endpoint of any worker can merge the snapshots of all workers
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+        self.shards = {}
+        self.retired = Shard()
+        self.shards_lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.flushed_at = time.monotonic()
+
+    def shard(self):
+        shard = getattr(self.local, "shard", None)
+        if shard is None:
+            shard = self.local.shard = Shard()
+            with self.shards_lock:
+                self.retire_stopped_threads()
+                self.shards[threading.current_thread()] = shard
+        return shard
+
+    def retire_stopped_threads(self):
+        """Adds the shards of the stopped threads to the retired shard. Must be called with the shards_lock."""
+
+        for thread in [thread for thread in self.shards if not thread.is_alive()]:
+            self.retired.add(self.shards.pop(thread))
+
+    def record_request(self, view, method, status, duration, size, db_duration):
+        """Records a finished request. size is None for streamed responses."""
+
+        shard = self.shard()
+        labels = (("view", view), ("method", method))
+        shard.increment("kanban_http_requests_total", labels + (("status", str(status)),))
+        shard.observe("kanban_http_request_duration_seconds", labels, duration, DURATION_BUCKETS)
+        shard.observe("kanban_http_db_duration_seconds", labels, db_duration, DURATION_BUCKETS)
+        if size is not None:
+            shard.observe("kanban_http_response_size_bytes", labels, size, SIZE_BUCKETS)
+
+    def snapshot(self):
+        """Returns the merged metrics of all threads as {"counters": [...], "histograms": [...]}."""
+
+        with self.shards_lock:
+            self.retire_stopped_threads()
+            snapshots = [self.retired.snapshot()]
+            shards = list(self.shards.values())
+        return serialize(*merge(snapshots + [shard.snapshot() for shard in shards]))
+
+    def path(self, pid=None):
+        return os.path.join(get_setting("DIRECTORY"), f"metrics-{pid or os.getpid()}.json")
+
+    def maybe_flush(self):
+        """Writes the snapshot of the process, if FLUSH_INTERVAL passed. Never blocks a request on another flush."""
+
+        if not get_setting("DIRECTORY") or time.monotonic() - self.flushed_at < get_setting("FLUSH_INTERVAL"):
+            return
+        if not self.flush_lock.acquire(blocking=False):
+            return
+        try:
+            self.flush()
+        finally:
+            self.flush_lock.release()
+
+    def flush(self):
+        """Writes the snapshot to the file of the process, atomically with a rename."""
+
+        directory = get_setting("DIRECTORY")
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = self.path()
+        with open(f"{path}.tmp", "w") as file:
+            json.dump(self.snapshot(), file)
+        os.replace(f"{path}.tmp", path)
+        self.flushed_at = time.monotonic()
+
+    def collect(self):
+        """
+        Returns the snapshots of all workers, with the live snapshot of this process.
+
+        The files of stopped workers are kept, so the counters never go backwards. Clear the
+        directory when all workers are restarted.
+        """
+
+        snapshots = [self.snapshot()]
+        directory = get_setting("DIRECTORY")
+        if directory and os.path.isdir(directory):
+            own = os.path.basename(self.path())
+            for name in os.listdir(directory):
+                if name.startswith("metrics-") and name.endswith(".json") and name != own:
+                    try:
+                        with open(os.path.join(directory, name)) as file:
+                            snapshots.append(json.load(file))
+                    except (OSError, ValueError):
+                        continue
+        return snapshots
+
+
+def merge(snapshots):
+    """Sums up the counters and histograms of several snapshots."""
+
+    counters, histograms = {}, {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["counters"]:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, counts, total, count, buckets in snapshot["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            merged = histograms.setdefault(key, [[0] * len(counts), 0.0, 0, buckets])
+            merged[0] = [a + b for a, b in zip(merged[0], counts)]
+            merged[1] += total
+            merged[2] += count
+    return counters, histograms
+
+
+def serialize(counters, histograms):
+    """Returns counters and histograms, as returned by merge(), as JSON serializable snapshot."""
+
+    return {
+        "counters": [[name, [list(label) for label in labels], value]
+                     for (name, labels), value in counters.items()],
+        "histograms": [[name, [list(label) for label in labels], *histogram]
+                       for (name, labels), histogram in histograms.items()],
+    }
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def format_labels(labels, extra=()):
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in (*labels, *extra)) + "}"
+
+
+def render(snapshots):
+    """Returns the merged snapshots in the Prometheus text format."""
+
+    counters, histograms = merge(snapshots)
+    lines = []
+    for name, (kind, description) in METRICS.items():
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+        if kind == "counter":
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{format_labels(labels)} {value}")
+            continue
+        for (metric, labels), (counts, total, count, buckets) in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, bucket_count in zip([*buckets, "+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{format_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{format_labels(labels)} {total}")
+            lines.append(f"{name}_count{format_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+atexit.register(registry.flush)
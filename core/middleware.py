@@ -0,0 +1,208 @@
+import hashlib
+import logging
+import random
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from core import instrumentation, metrics, routers
+
+
+logger = logging.getLogger("kanban.sql")
+
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Decides for every request, if its reads may go to a replica, see core.routers.PrimaryReplicaRouter.
+
+    It makes sure that:
+        - requests, that aren't GET, HEAD or OPTIONS, only use the primary
+        - after a request wrote to the primary, the following requests of the same client use
+          the primary for KANBAN_REPLICA_STICKY_SECONDS, until the replicas caught up
+        - a client is identified by its Authorization header, or its address without one,
+          a request with the header also checks the window of its address, so the first
+          requests after a registration or login find the new token
+
+    The sticky window is stored in the cache, so every worker sees it if the cache is shared.
+    """
+
+    sync_capable = True
+    async_capable = True
+    cache_prefix = "replica-sticky"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not routers.get_replicas():
+            return self.get_response(request)
+
+        keys = self.sticky_keys(request)
+        token = routers.start_request(request.method not in SAFE_METHODS or bool(cache.get_many(keys)))
+        try:
+            response = self.get_response(request)
+        finally:
+            state = routers.end_request(token)
+        if state.wrote and keys:
+            cache.set(keys[0], 1, self.sticky_seconds())
+        return response
+
+    async def __acall__(self, request):
+        if not routers.get_replicas():
+            return await self.get_response(request)
+
+        keys = self.sticky_keys(request)
+        token = routers.start_request(request.method not in SAFE_METHODS or bool(await cache.aget_many(keys)))
+        try:
+            response = await self.get_response(request)
+        finally:
+            state = routers.end_request(token)
+        if state.wrote and keys:
+            await cache.aset(keys[0], 1, self.sticky_seconds())
+        return response
+
+    def sticky_keys(self, request):
+        """Returns the cache keys of the client, the first one is the key a write is stored under."""
+
+        clients = [request.META.get("HTTP_AUTHORIZATION"), request.META.get("REMOTE_ADDR", "")]
+        return [f"{self.cache_prefix}:{hashlib.sha256(client.encode()).hexdigest()}" for client in clients if client]
+
+    def sticky_seconds(self):
+        return getattr(settings, "KANBAN_REPLICA_STICKY_SECONDS", 5)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Collects the queries of a sample of the requests, see core.instrumentation.
+
+    For every sampled request it:
+        - counts the queries, sums up their time and the repeated fingerprints
+        - adds a Server-Timing header with the database and the total time, that the network
+          tab of the browser shows next to the request
+        - logs a warning with the repeated and the slow queries, if the request ran more than
+          MAX_QUERIES queries or took longer than SLOW_REQUEST_MS, or a query took longer than SLOW_QUERY_MS
+
+    The other requests are passed through, so it can stay on in production with a low SAMPLE_RATE.
+    Queries of streamed responses run after the middleware returned and aren't counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        instrumentation.install_on_current_thread()
+        start = time.perf_counter()
+        token = instrumentation.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            stats = instrumentation.end_request(token)
+        return self.report(request, response, stats, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        start = time.perf_counter()
+        token = instrumentation.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stats = instrumentation.end_request(token)
+        return self.report(request, response, stats, time.perf_counter() - start)
+
+    def sampled(self):
+        rate = instrumentation.get_setting("SAMPLE_RATE")
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def report(self, request, response, stats, duration):
+        """Adds the Server-Timing header and logs the request, if it exceeded a threshold."""
+
+        if instrumentation.get_setting("SERVER_TIMING"):
+            response["Server-Timing"] = (f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", '
+                                         f"total;dur={duration * 1000:.1f}")
+
+        if (stats.count > instrumentation.get_setting("MAX_QUERIES")
+                or duration * 1000 > instrumentation.get_setting("SLOW_REQUEST_MS") or stats.slow):
+            lines = [f"{request.method} {request.path}: {stats.count} queries, "
+                     f"{stats.duration * 1000:.1f} ms in the database, {duration * 1000:.1f} ms in total"]
+            lines += [f"  {count}x {sql[:500]}" for count, sql in stats.duplicates()]
+            lines += [f"  slow {query_duration * 1000:.1f} ms: {instrumentation.fingerprint(sql)[:500]}"
+                      for query_duration, sql in sorted(stats.slow, reverse=True)[:5]]
+            logger.warning("\n".join(lines))
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Records the requests in the metrics of core.metrics, served at /metrics.
+
+    For every request the view (the name of the url), the method, the status code, the duration,
+    the size of the response and the time spent in the database are recorded. The queries are
+    only timed with the execute wrapper of core.instrumentation, their statements are captured
+    only for the requests, that the QueryInstrumentationMiddleware samples.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not metrics.get_setting("ENABLED"):
+            return self.get_response(request)
+
+        instrumentation.install_on_current_thread()
+        start = time.perf_counter()
+        token = instrumentation.start_request(capture=False)
+        try:
+            response = self.get_response(request)
+        finally:
+            stats = instrumentation.end_request(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if not metrics.get_setting("ENABLED"):
+            return await self.get_response(request)
+
+        start = time.perf_counter()
+        token = instrumentation.start_request(capture=False)
+        try:
+            response = await self.get_response(request)
+        finally:
+            stats = instrumentation.end_request(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, stats, duration):
+        match = getattr(request, "resolver_match", None)
+        view = match.url_name if match is not None and match.url_name else "unmatched"
+        size = None if response.streaming else len(response.content)
+        metrics.registry.record_request(view, request.method, response.status_code, duration, size, stats.duration)
+        metrics.registry.maybe_flush()
@@ -0,0 +1,64 @@
+import msgpack
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+ENCODER = JSONEncoder()
+
+
+def encode_default(obj):
+    """
+    Converts the values, that orjson and msgpack can't encode themselves, like the JSONEncoder of DRF does.
+
+    Datetimes are passed through too, so they keep the format of DRF (e.g. "Z" instead of "+00:00").
+    """
+
+    return ENCODER.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer, that encodes with orjson instead of the json module.
+
+    It makes sure that:
+        - the output is the same as the one of the JSONRenderer of DRF: compact, not ASCII-escaped,
+          with U+2028 and U+2029 escaped and the values converted by the encoder of DRF
+        - indented output (e.g. for the browsable API) is still rendered by the JSONRenderer of DRF,
+          because orjson only supports an indent of two spaces
+        - data, that orjson can't encode (e.g. integers above 64 bits), is still rendered by the
+          JSONRenderer of DRF instead of failing the response
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if self.get_indent(accepted_media_type or "", renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=encode_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Like the JSONRenderer of DRF, the line separators are escaped, so the output is valid JavaScript.
+        return ret.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders the response as MessagePack, for clients, that send Accept: application/msgpack or ?format=msgpack.
+
+    The binary format is smaller than JSON and faster to parse on mobile clients. The values
+    are the same as in the JSON responses, e.g. dates are strings.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
@@ -0,0 +1,76 @@
+import random
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class RoutingState:
+    """
+    Routing decisions of a single request, set up by core.middleware.ReplicaRoutingMiddleware.
+
+    It's a mutable object inside the context variable, so a write in a thread of sync_to_async()
+    pins the rest of the request to the primary, even though the thread runs in a copy of the context.
+    """
+
+    def __init__(self, use_primary=False):
+        self.use_primary = use_primary
+        self.wrote = False
+
+
+_state = ContextVar("database_routing_state", default=None)
+
+
+def start_request(use_primary):
+    """Starts the routing of a request and returns the token for end_request()."""
+
+    return _state.set(RoutingState(use_primary))
+
+
+def end_request(token):
+    """Ends the routing of a request and returns its state."""
+
+    state = _state.get()
+    _state.reset(token)
+    return state
+
+
+def get_replicas():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends the reads of a request to a random replica and everything else to the primary.
+
+    Reads go to the primary:
+        - outside of a request, e.g. in management commands, so they never see stale data
+        - for the whole request, if it isn't a GET, HEAD or OPTIONS request or the client
+          wrote shortly before (see the middleware)
+        - after the first write of a request and inside every transaction of the primary,
+          so a request always reads its own writes
+
+    Without settings.DATABASE_REPLICAS everything goes to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        replicas = get_replicas()
+        if (state is None or state.use_primary or not replicas
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.use_primary = True
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replicas are copies of the primary and get its schema with the data.
+        return db == DEFAULT_DB_ALIAS
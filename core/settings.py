@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +45,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.QueryInstrumentationMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -52,6 +55,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
 ]
 
 CSRF_TRUSTED_ORIGINS = [
@@ -94,6 +98,71 @@ DATABASES = {
     }
 }
 
+# Opt-in tuning of SQLite for production, enabled with KANBAN_SQLITE_PROFILE=performance:
+#   - WAL lets the readers go on while one connection writes, synchronous=NORMAL is safe with WAL
+#   - busy_timeout lets a writer wait up to 5 seconds for the lock instead of failing right away
+#   - IMMEDIATE takes the write lock at the start of every transaction, where it can still be
+#     waited for, a deferred transaction that starts writing later fails with "database is locked"
+#   - persistent connections keep the page cache and the memory map between requests
+# benchmarks/sqlite_concurrency_benchmark.py compares it with the default configuration.
+if os.environ.get("KANBAN_SQLITE_PROFILE") == "performance":
+    DATABASES['default'].update({
+        'OPTIONS': {
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA busy_timeout=5000;'
+                'PRAGMA cache_size=-64000;'
+                'PRAGMA mmap_size=268435456;'
+                'PRAGMA temp_store=MEMORY;'
+            ),
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    })
+
+# Read replicas, a comma separated list of SQLite files in KANBAN_DB_REPLICAS, e.g.
+# "replica1.sqlite3,replica2.sqlite3". They are copies of the primary, that are refreshed with
+# "python manage.py sync_replicas". core.routers.PrimaryReplicaRouter sends the reads of the
+# GET requests to them, except for KANBAN_REPLICA_STICKY_SECONDS after a client wrote.
+DATABASE_REPLICAS = []
+for index, name in enumerate(filter(None, os.environ.get("KANBAN_DB_REPLICAS", "").split(",")), start=1):
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / name.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+KANBAN_REPLICA_STICKY_SECONDS = 5
+
+# Query instrumentation of core.middleware.QueryInstrumentationMiddleware. SAMPLE_RATE is the share
+# of the requests, whose queries are counted and timed. These get a Server-Timing header and are
+# logged to the "kanban.sql" logger, if they exceed MAX_QUERIES, SLOW_REQUEST_MS or SLOW_QUERY_MS.
+KANBAN_SQL_INSTRUMENTATION = {
+    'SAMPLE_RATE': float(os.environ.get("KANBAN_SQL_SAMPLE_RATE", "1.0" if DEBUG else "0.01")),
+    'MAX_QUERIES': 30,
+    'SLOW_REQUEST_MS': 500,
+    'SLOW_QUERY_MS': 100,
+    'SERVER_TIMING': True,
+}
+
+# Request metrics of core.middleware.MetricsMiddleware, served in the Prometheus format at /metrics.
+# With several worker processes, set DIRECTORY to a local directory: every worker writes its metrics
+# to a file there every FLUSH_INTERVAL seconds and /metrics merges the files of all workers.
+# The scraper has to send "Authorization: Bearer <TOKEN>". Without a TOKEN /metrics is forbidden,
+# unless PUBLIC is set. Only the time of the queries is measured for the metrics, see SAMPLE_RATE.
+KANBAN_METRICS = {
+    'ENABLED': True,
+    'DIRECTORY': os.environ.get("KANBAN_METRICS_DIR") or None,
+    'FLUSH_INTERVAL': 5,
+    'TOKEN': os.environ.get("KANBAN_METRICS_TOKEN") or None,
+    'PUBLIC': False,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -131,11 +200,65 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Seconds the owner and members of a board are cached across requests for the permission
+# checks. 0 only memoizes them per request. Enable it only with a cache backend that is
+# shared by all workers, because the cache is invalidated by signals in the writing process.
+KANBAN_MEMBERSHIP_CACHE_TIMEOUT = 0
+
+# Seconds the board list, assigned-to-me and reviewing responses are cached per user, 0 disables it.
+# The signals bump a generation counter per user, wich makes all cached responses of the user
+# unreachable at once. Like the membership cache it needs a cache shared by all workers.
+KANBAN_RESPONSE_CACHE_TIMEOUT = 0
+
+# Serves the read endpoints of the kanban API with the async views in kanban_app/api/async_views.py.
+# core/asgi.py turns it on, so WSGI servers keep using the sync views.
+KANBAN_ASYNC_VIEWS = os.environ.get("KANBAN_ASYNC_VIEWS", "0") == "1"
+
+# Broker of the board event streams (GET /api/boards/<id>/events/, only served under ASGI).
+# The LocalBroker only reaches clients of the same process. With several workers on one machine use
+# "kanban_app.events.FileSpoolBroker" with the OPTIONS DIRECTORY, POLL_INTERVAL, MAX_BYTES and READER_TIMEOUT.
+KANBAN_EVENTS = {
+    'BACKEND': 'kanban_app.events.LocalBroker',
+    'OPTIONS': {},
+}
+
+# Search of GET /api/users/search/. IN_MEMORY_INDEX answers it from a sorted index in every process,
+# kept up to date by the user signals of the process and rebuilt after MAX_AGE seconds.
+KANBAN_USER_SEARCH = {
+    'IN_MEMORY_INDEX': False,
+    'MAX_AGE': 300,
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
-    ]
+        'auth_app.api.authentication.CachedTokenAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'core.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'user-search': os.environ.get("KANBAN_USER_SEARCH_RATE", "60/min"),
+    },
+}
+
+# Cache of the token authentication. MAX_SIZE and TTL (seconds) limit the in-process cache,
+# SHARED_TIMEOUT (seconds, 0 disables it) the entries in the configured cache backend.
+TOKEN_AUTH_CACHE = {
+    'MAX_SIZE': 10000,
+    'TTL': 30,
+    'SHARED_TIMEOUT': 30,
+}
+
+# Thread pool of the password hashing in login and registration. At most MAX_WORKERS passwords
+# are hashed at once and MAX_QUEUE wait, further requests get a 503 response with a Retry-After
+# header of RETRY_AFTER seconds.
+PASSWORD_HASHING_POOL = {
+    'MAX_WORKERS': 2,
+    'MAX_QUEUE': 16,
+    'RETRY_AFTER': 1,
 }
@@ -0,0 +1,121 @@
+import time
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from core import instrumentation
+from core.middleware import MetricsMiddleware, ReplicaRoutingMiddleware
+from core.routers import PrimaryReplicaRouter
+from kanban_app.models import Board
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"], KANBAN_REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    """The reads go to a replica, unless the client wrote within the sticky window."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.router = PrimaryReplicaRouter()
+
+    def request(self, method="GET", client="Token a"):
+        """Runs a request through the middleware and returns the database its read was routed to."""
+
+        databases = []
+
+        def get_response(request):
+            if request.method == "POST":
+                self.router.db_for_write(Board)
+            databases.append(self.router.db_for_read(Board))
+            return HttpResponse()
+
+        ReplicaRoutingMiddleware(get_response)(RequestFactory().generic(method, "/", HTTP_AUTHORIZATION=client))
+        return databases[0]
+
+    def test_reads_outside_of_a_request_use_the_primary(self):
+        self.assertEqual(self.router.db_for_read(Board), "default")
+
+    def test_reads_after_a_write_use_the_primary_in_the_sticky_window(self):
+        self.assertEqual(self.request(), "replica_1")
+        self.assertEqual(self.request("POST"), "default")
+
+        self.assertEqual(self.request(), "default")
+        self.assertEqual(self.request(client="Token b"), "replica_1")
+        with patch("django.core.cache.backends.locmem.time.time", return_value=time.time() + 6):
+            self.assertEqual(self.request(), "replica_1")
+
+
+class InstrumentationTests(TestCase):
+    """The queries of the sampled requests are counted, reported in Server-Timing and logged over the limits."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("user", "user@example.com", "password"))
+
+    @override_settings(KANBAN_SQL_INSTRUMENTATION={"SAMPLE_RATE": 1})
+    def test_sampled_request_has_a_server_timing_header(self):
+        response = self.client.get("/api/boards/")
+
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="\d+ queries", total;dur=[\d.]+$')
+
+    @override_settings(KANBAN_SQL_INSTRUMENTATION={"SAMPLE_RATE": 0})
+    def test_unsampled_request_is_passed_through(self):
+        self.assertFalse(self.client.get("/api/boards/").has_header("Server-Timing"))
+
+    @override_settings(KANBAN_SQL_INSTRUMENTATION={"SAMPLE_RATE": 1, "MAX_QUERIES": 0})
+    def test_request_over_the_limit_is_logged(self):
+        with self.assertLogs("kanban.sql", "WARNING") as logs:
+            self.client.get("/api/boards/")
+
+        self.assertIn("GET /api/boards/: ", logs.output[0])
+
+    def test_fingerprint_ignores_the_values(self):
+        self.assertEqual(instrumentation.fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x' LIMIT 21"),
+                         "SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?")
+
+
+class MetricsTests(TestCase):
+    """The metrics time the queries of every request and are only served to the scraper."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("user", "user@example.com", "password"))
+
+    def recorded_stats(self, path="/api/boards/"):
+        with patch.object(MetricsMiddleware, "record", autospec=True) as record:
+            self.client.get(path)
+        return record.call_args.args[3]
+
+    @override_settings(KANBAN_SQL_INSTRUMENTATION={"SAMPLE_RATE": 0})
+    def test_queries_of_unsampled_requests_are_only_timed(self):
+        stats = self.recorded_stats()
+
+        self.assertGreater(stats.count, 0)
+        self.assertFalse(stats.capture)
+        self.assertEqual(stats.statements, {})
+
+    @override_settings(KANBAN_SQL_INSTRUMENTATION={"SAMPLE_RATE": 1})
+    def test_queries_of_sampled_requests_are_captured(self):
+        stats = self.recorded_stats()
+
+        self.assertTrue(stats.capture)
+        self.assertEqual(sum(stats.statements.values()), stats.count)
+
+    @override_settings(KANBAN_METRICS={})
+    def test_metrics_are_forbidden_without_a_token(self):
+        self.assertEqual(APIClient().get("/metrics").status_code, 403)
+
+    @override_settings(KANBAN_METRICS={"TOKEN": "secret"})
+    def test_metrics_require_the_token(self):
+        self.client.get("/api/boards/")
+
+        self.assertEqual(APIClient().get("/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+        response = APIClient().get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'kanban_http_requests_total{view="board-list",method="GET",status="200"}', response.content)
+
+    @override_settings(KANBAN_METRICS={"PUBLIC": True})
+    def test_public_metrics(self):
+        self.assertEqual(APIClient().get("/metrics").status_code, 200)
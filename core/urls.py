@@ -14,11 +14,14 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
+from core.views import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path("api/", include("auth_app.api.urls")),
-    path("api/", include("kanban_app.api.urls"))
+    path("metrics", metrics_view, name="metrics"),
+    path("api/", include("auth_app.api.async_urls" if settings.KANBAN_ASYNC_VIEWS else "auth_app.api.urls")),
+    path("api/", include("kanban_app.api.async_urls" if settings.KANBAN_ASYNC_VIEWS else "kanban_app.api.urls"))
 ]
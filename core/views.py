@@ -0,0 +1,22 @@
+import hmac
+from django.http import HttpResponse, HttpResponseForbidden
+from core import metrics
+
+
+def metrics_view(request):
+    """
+    Returns the metrics of all workers in the Prometheus text format.
+
+    The scraper has to send KANBAN_METRICS['TOKEN'] as "Authorization: Bearer <token>". Without a
+    TOKEN the endpoint is forbidden, unless KANBAN_METRICS['PUBLIC'] is set, e.g. behind a firewall.
+    """
+
+    token = metrics.get_setting("TOKEN")
+    if token:
+        allowed = hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")
+    else:
+        allowed = metrics.get_setting("PUBLIC")
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.render(metrics.registry.collect()),
+                        content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,8 +1,10 @@
 from django.contrib import admin
-from .models import Board, Comment, Ticket
+from .models import Board, BoardChange, BoardStats, Comment, Ticket
 
 # Register your models here.
 
 admin.site.register(Board)
 admin.site.register(Ticket)
 admin.site.register(Comment)
+admin.site.register(BoardStats)
+admin.site.register(BoardChange)
@@ -0,0 +1,361 @@
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.settings import api_settings
+from core.renderers import FastJSONRenderer, MessagePackRenderer
+from kanban_app.models import Board, Comment
+from kanban_app.events import OVERFLOW, get_broker
+from kanban_app.membership import aget_board_access, aload_board_access
+from kanban_app import response_cache
+from .caching import aresponse_key, entry, response_from_entry
+from .fieldsets import Fieldset, fieldset_key
+from .conditional import aboard_list_validators, aboard_validators, etag_variant, not_modified, set_validators
+from .permissions import IsOwnerOrMember
+from .serializers import BoardListSerializer, BoardRetrieveSerializer, CommentSerializer, TaskSerializer
+from .views import (ListCreateBoardView, RetrieveUpdateDestroyBoardView, AssignedToMeView, ReviewView,
+                    ListCreateCommentView, board_detail_queryset, board_tickets_queryset)
+
+
+class AsyncReadView(View):
+    """
+    Base class of the async read endpoints.
+
+    GET requests (or the async_methods) are answered with the async ORM, so they don't occupy a thread
+    while they wait for the database. Everything else is passed to the sync view, which runs in a thread:
+        - all other request methods
+        - GET requests with one of the query parameters in sync_query_params
+        - GET requests for the browsable API or for MessagePack
+
+    The responses are the same as the ones of the sync view, including the error responses.
+    Like in APIView, the permission classes are checked before the handler runs, these are the ones
+    of the sync view or the DEFAULT_PERMISSION_CLASSES of DRF, if there is no sync view.
+    """
+
+    async_methods = ["GET"]
+    sync_view_class = None
+    sync_view = None
+    sync_query_params = []
+    permission_classes = None
+
+    authenticators = []
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        if cls.sync_view_class is not None:
+            initkwargs.setdefault("sync_view", cls.sync_view_class.as_view())
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in self.async_methods or self.needs_sync_view(request):
+            if self.sync_view is None:
+                return self.handle_exception(exceptions.MethodNotAllowed(request.method))
+            return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+
+        try:
+            request.user = await self.authenticate(request)
+            await self.check_permissions(request)
+            return await getattr(self, request.method.lower())(request, *args, **kwargs)
+        except Http404 as exc:
+            return self.handle_exception(exceptions.NotFound(*exc.args))
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+
+    def needs_sync_view(self, request):
+        """Returns True, if the request uses a feature that only the sync view implements."""
+
+        if any(param in request.GET for param in self.sync_query_params):
+            return True
+        if request.GET.get(api_settings.URL_FORMAT_OVERRIDE) == MessagePackRenderer.format:
+            return True
+        accept = request.headers.get("Accept", "")
+        return "text/html" in accept or MessagePackRenderer.media_type in accept
+
+    async def authenticate(self, request):
+        """
+        Runs the configured authentication classes and returns the user or an AnonymousUser.
+
+        Authentication classes with an aauthenticate() method are awaited, all others run in a thread.
+        """
+
+        self.authenticators = [auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+        for authenticator in self.authenticators:
+            if hasattr(authenticator, "aauthenticate"):
+                result = await authenticator.aauthenticate(request)
+            else:
+                result = await sync_to_async(authenticator.authenticate)(request)
+            if result is not None:
+                return result[0]
+        return AnonymousUser()
+
+    def get_permissions(self):
+        """Returns the permissions of the view, the ones of the sync view or the default permissions of DRF."""
+
+        permission_classes = self.permission_classes
+        if permission_classes is None:
+            permission_classes = (self.sync_view_class.permission_classes if self.sync_view_class is not None
+                                  else api_settings.DEFAULT_PERMISSION_CLASSES)
+        return [permission() for permission in permission_classes]
+
+    async def check_permissions(self, request):
+        """
+        Raises the same exceptions as APIView.check_permissions(), if a permission isn't granted.
+
+        Permissions with an ahas_permission() method are awaited, all others are called directly,
+        so they must not query the database (like IsAuthenticated).
+        """
+
+        for permission in self.get_permissions():
+            if hasattr(permission, "ahas_permission"):
+                allowed = await permission.ahas_permission(request, self)
+            else:
+                allowed = permission.has_permission(request, self)
+            if not allowed:
+                self.permission_denied(request)
+
+    def permission_denied(self, request):
+        """Raises the same exception as APIView.permission_denied()."""
+
+        if not request.user.is_authenticated:
+            raise exceptions.NotAuthenticated()
+        raise exceptions.PermissionDenied()
+
+    def handle_exception(self, exc):
+        """
+        Returns the error response for an APIException, like the default exception handler of DRF.
+
+        Like in APIView, a 401 response turns into a 403 response if there is no WWW-Authenticate header.
+        """
+
+        headers = {}
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            auth_header = self.authenticators[0].authenticate_header(None) if self.authenticators else None
+            if auth_header:
+                headers["WWW-Authenticate"] = auth_header
+            else:
+                exc.status_code = 403
+        if getattr(exc, "wait", None):
+            headers["Retry-After"] = str(int(exc.wait))
+
+        if isinstance(exc.detail, (list, dict)):
+            data = exc.detail
+        else:
+            data = {"detail": exc.detail}
+        return self.render(data, status=exc.status_code, headers=headers)
+
+    def render(self, data, status=200, headers=None):
+        """Returns the data as a JSON response with the headers of a DRF response."""
+
+        response = HttpResponse(FastJSONRenderer().render(data), status=status,
+                                content_type="application/json", headers=headers)
+        return self.add_headers(response)
+
+    def add_headers(self, response):
+        response["Allow"] = ", ".join(self.get_allowed_methods())
+        response["Vary"] = "Accept"
+        return response
+
+    async def cached(self, request, build):
+        """
+        Returns the response of build(request) through the per-user response cache.
+
+        The entries are shared with the sync views, see kanban_app.api.caching.CachedListMixin.
+        """
+
+        timeout = response_cache.cache_timeout()
+        if not timeout:
+            return await build(request)
+
+        key = await aresponse_key(request)
+        cached = await cache.aget(key)
+        if cached is not None:
+            return self.add_headers(response_from_entry(request, cached))
+
+        response = await build(request)
+        if response.status_code == 200:
+            await cache.aset(key, entry(response, response.content), timeout)
+        return response
+
+    def get_allowed_methods(self):
+        """Returns the methods of the sync view, only GET if there is none."""
+
+        if self.sync_view_class is None:
+            return self.async_methods
+        sync_view = self.sync_view_class()
+        sync_view.setup(self.request, *self.args, **self.kwargs)
+        return sync_view.allowed_methods
+
+    def get_fieldset(self):
+        return Fieldset.from_request(self.request)
+
+    def get_serializer_context(self):
+        return {"request": self.request, "view": self, "fieldset": self.get_fieldset()}
+
+    async def check_board_permission(self, request, board_id):
+        """Raises the same exceptions as the IsOwnerOrMember check of RetrieveUpdateDestroyBoardView."""
+
+        if await aget_board_access(request, board_id) is None:
+            raise Http404("No Board matches the given query.")
+        if not await IsOwnerOrMember().ahas_object_permission(request, self, Board(pk=board_id)):
+            self.permission_denied(request)
+
+
+class AsyncListCreateBoardView(AsyncReadView):
+    """Async GET of ListCreateBoardView."""
+
+    sync_view_class = ListCreateBoardView
+
+    async def get(self, request):
+        return await self.cached(request, self.get_list)
+
+    async def get_list(self, request):
+        """Returns the board list like ListCreateBoardView.build_list(), only called on a miss of the response cache."""
+
+        etag, last_modified = await aboard_list_validators(request.user, etag_variant(FastJSONRenderer.format))
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        boards = [board async for board in Board.objects.for_user(request.user).select_related("stats")]
+        serializer = BoardListSerializer(boards, many=True, context=self.get_serializer_context())
+        return set_validators(self.render(serializer.data), etag, last_modified)
+
+
+class AsyncRetrieveBoardView(AsyncReadView):
+    """Async GET of RetrieveUpdateDestroyBoardView. Streamed responses are left to the sync view."""
+
+    sync_view_class = RetrieveUpdateDestroyBoardView
+    sync_query_params = ["stream"]
+
+    async def get(self, request, pk):
+        fieldset = self.get_fieldset()
+        variant = etag_variant(FastJSONRenderer.format, fieldset_key(fieldset))
+        etag, last_modified = await aboard_validators(pk, variant)
+        await self.check_board_permission(request, pk)
+
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        try:
+            board = await board_detail_queryset(fieldset).aget(pk=pk)
+        except Board.DoesNotExist:
+            raise Http404("No Board matches the given query.")
+        serializer = BoardRetrieveSerializer(board, context=self.get_serializer_context())
+        return set_validators(self.render(serializer.data), etag, last_modified)
+
+
+class AsyncTaskListView(AsyncReadView):
+    """Base class of the async task lists. Paginated and streamed responses are left to the sync view."""
+
+    sync_query_params = ["stream", "cursor", "page_size"]
+    user_field = None
+
+    async def get(self, request):
+        return await self.cached(request, self.get_list)
+
+    async def get_list(self, request):
+        queryset = board_tickets_queryset(self.get_fieldset()).filter(**{self.user_field: request.user})
+        tickets = [ticket async for ticket in queryset]
+        serializer = TaskSerializer(tickets, many=True, context=self.get_serializer_context())
+        return self.render(serializer.data)
+
+
+class AsyncAssignedToMeView(AsyncTaskListView):
+    """Async GET of AssignedToMeView."""
+
+    sync_view_class = AssignedToMeView
+    user_field = "assignee"
+
+
+class AsyncReviewView(AsyncTaskListView):
+    """Async GET of ReviewView."""
+
+    sync_view_class = ReviewView
+    user_field = "reviewer"
+
+
+class AsyncListCommentView(AsyncReadView):
+    """Async GET of ListCreateCommentView. Paginated responses are left to the sync view."""
+
+    sync_view_class = ListCreateCommentView
+    sync_query_params = ["cursor", "page_size"]
+
+    async def get(self, request, pk):
+        comments = [comment async for comment in
+                    Comment.objects.filter(ticket=pk).select_related("author").order_by("created_at")]
+        serializer = CommentSerializer(comments, many=True, context=self.get_serializer_context())
+        return self.render(serializer.data)
+
+
+class BoardEventsView(AsyncReadView):
+    """
+    Streams the changes of a board as Server-Sent Events.
+
+    Only the owner and the members of the board may listen, like for RetrieveUpdateDestroyBoardView.
+    The stream waits for events of the broker without touching the database, only a comment
+    is sent every keep_alive seconds, so the connection isn't closed by proxies.
+
+    The stream ends:
+        - if the board was deleted
+        - if the user lost the access to the board
+        - if the client fell too far behind, it has to reload the board and connect again
+    """
+
+    keep_alive = 25
+    retry = 3000
+    recheck_events = ["members.changed", "board.updated"]
+
+    def needs_sync_view(self, request):
+        return False
+
+    async def get(self, request, pk):
+        await self.check_board_permission(request, pk)
+
+        subscription = get_broker().subscribe(pk)
+        response = StreamingHttpResponse(self.stream(subscription, request.user.id),
+                                         content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def stream(self, subscription, user_id):
+        """Yields the events of the subscription in the SSE format until the stream ends."""
+
+        try:
+            yield f"retry: {self.retry}\n\n".encode()
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), self.keep_alive)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+
+                if event is OVERFLOW:
+                    yield self.format_event({"type": "stream.reset", "board": subscription.board_id, "data": {}})
+                    return
+                if event["type"] in self.recheck_events and not await self.has_access(subscription.board_id, user_id):
+                    yield self.format_event({"type": "access.revoked", "board": subscription.board_id, "data": {}})
+                    return
+                yield self.format_event(event)
+                if event["type"] == "board.deleted":
+                    return
+        finally:
+            get_broker().unsubscribe(subscription)
+
+    async def has_access(self, board_id, user_id):
+        """Loads the owner and members of the board again, bypassing the cached access."""
+
+        access = (await aload_board_access([board_id])).get(board_id)
+        return access is not None and access.is_owner_or_member(user_id)
+
+    def format_event(self, event):
+        data = json.dumps(event, cls=DjangoJSONEncoder, separators=(",", ":"))
+        return f"event: {event['type']}\ndata: {data}\n\n".encode()
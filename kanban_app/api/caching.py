@@ -0,0 +1,99 @@
+import hashlib
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.http import parse_http_date_safe
+from kanban_app import response_cache
+from .conditional import not_modified
+from .streaming import wants_stream
+
+
+RESPONSE_KEY = "kanban:response:{}:{}:{}:{}"
+
+# Headers of a response, that are stored with its content.
+CACHED_HEADERS = ["ETag", "Last-Modified", "Cache-Control"]
+
+
+def _response_key(request, generation):
+    query = hashlib.md5(f"{request.get_host()}?{request.META.get('QUERY_STRING', '')}".encode(),
+                        usedforsecurity=False).hexdigest()
+    return RESPONSE_KEY.format(request.resolver_match.url_name, request.user.pk, generation, query)
+
+
+def response_key(request):
+    """
+    Returns the cache key of the response for the request.
+
+    It contains the name of the url, the user, the current generation of the user and a hash of
+    the host and the query string, so every page and every host (in the next links) is cached
+    on its own. Bumping the generation makes all keys of the user unreachable at once.
+    """
+
+    return _response_key(request, response_cache.get_generation(request.user.pk))
+
+
+async def aresponse_key(request):
+    """Async variant of response_key()."""
+
+    return _response_key(request, await response_cache.aget_generation(request.user.pk))
+
+
+def entry(response, content):
+    """Returns the cache entry of a response, that was rendered as JSON."""
+
+    headers = {name: response[name] for name in CACHED_HEADERS if response.has_header(name)}
+    headers["Content-Type"] = "application/json"
+    return {"content": content, "headers": headers}
+
+
+def response_from_entry(request, entry):
+    """
+    Returns the response of a cache entry.
+
+    A client, that sends the cached ETag, gets a 304 response without the content.
+    """
+
+    headers = entry["headers"]
+    if "ETag" in headers:
+        response = not_modified(request, headers["ETag"], parse_http_date_safe(headers.get("Last-Modified", "")))
+        if response is not None:
+            return response
+    return HttpResponse(entry["content"], headers=headers)
+
+
+class CachedListMixin:
+    """
+    Serves a list view from the per-user response cache of kanban_app.response_cache.
+
+    It makes sure that:
+        - a hit is answered from the rendered JSON, without a query, the serializer or the renderer
+        - a miss is built by build_list(), rendered once and stored, together with its ETag and
+          Last-Modified header, so views compute their validators only on a miss
+        - streamed responses and other formats than JSON (e.g. the browsable API) aren't cached
+        - the signals make the cached lists of a user unreachable, when anything in them changes
+
+    The async views share the same entries, see AsyncReadView.cached().
+    """
+
+    def list(self, request, *args, **kwargs):
+        if (not response_cache.cache_timeout() or request.accepted_renderer.format != "json"
+                or wants_stream(request)):
+            return self.build_list(request, *args, **kwargs)
+
+        key = response_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            return response_from_entry(request, cached)
+
+        response = self.build_list(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        content = request.accepted_renderer.render(response.data, request.accepted_media_type,
+                                                   self.get_renderer_context())
+        cached = entry(response, content)
+        cache.set(key, cached, response_cache.cache_timeout())
+        return HttpResponse(content, headers=cached["headers"])
+
+    def build_list(self, request, *args, **kwargs):
+        """Returns the uncached response of the list."""
+
+        return super().list(request, *args, **kwargs)
@@ -0,0 +1,99 @@
+import hashlib
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from kanban_app.models import Board, BoardStats
+
+
+def etag_variant(renderer_format, fieldset=""):
+    """
+    Returns the variant of an ETag for the format of the renderer and the key of a fieldset.
+
+    The JSON and the MessagePack response of the same version have different bytes, so they
+    need their own ETags, like every fieldset does.
+    """
+
+    return f"{renderer_format}-{fieldset}" if fieldset else renderer_format
+
+
+def board_validators(board_id, variant=""):
+    """
+    Returns the ETag and the Last-Modified timestamp of a single board.
+
+    Both are read from the statistics row of the board with a single query.
+    The variant tells apart the representations of the same version, see etag_variant().
+    Returns (None, None), if the board has no statistics.
+    """
+
+    row = BoardStats.objects.filter(board_id=board_id).values_list("version", "updated_at").first()
+    return _board_validators(board_id, row, variant)
+
+
+async def aboard_validators(board_id, variant=""):
+    """Async variant of board_validators()."""
+
+    row = await BoardStats.objects.filter(board_id=board_id).values_list("version", "updated_at").afirst()
+    return _board_validators(board_id, row, variant)
+
+
+def _board_validators(board_id, row, variant=""):
+    """Returns the ETag and Last-Modified timestamp for the version row of a board."""
+
+    if row is None:
+        return None, None
+    version, updated_at = row
+    etag = f"board-{board_id}-{version}-{variant}" if variant else f"board-{board_id}-{version}"
+    return quote_etag(etag), int(updated_at.timestamp())
+
+
+def board_list_validators(user, variant=""):
+    """
+    Returns the ETag of the board list of a user and no Last-Modified timestamp.
+
+    The ETag is a hash of the ids and versions of all boards of the user, so it changes
+    whenever a board is added, removed or changed. The list has no Last-Modified header,
+    because the newest change of the remaining boards doesn't move, if a board is deleted
+    or the user loses his membership, and a client would get a wrong 304.
+    The variant works like the one of board_validators().
+    """
+
+    versions = list(Board.objects.for_user(user).order_by("pk").values_list("pk", "stats__version"))
+    return _board_list_validators(user, versions, variant)
+
+
+async def aboard_list_validators(user, variant=""):
+    """Async variant of board_list_validators()."""
+
+    versions = [row async for row in Board.objects.for_user(user).order_by("pk").values_list("pk", "stats__version")]
+    return _board_list_validators(user, versions, variant)
+
+
+def _board_list_validators(user, versions, variant=""):
+    """Returns the ETag for the sorted (id, version) pairs of the boards of a user and None as Last-Modified."""
+
+    digest = hashlib.md5(",".join(f"{pk}:{version}" for pk, version in versions).encode(),
+                         usedforsecurity=False).hexdigest()
+    etag = f"boards-{user.pk}-{digest}-{variant}" if variant else f"boards-{user.pk}-{digest}"
+    return quote_etag(etag), None
+
+
+def not_modified(request, etag, last_modified):
+    """Returns a 304 response, if the client already has the current version, otherwise None."""
+
+    if etag is None:
+        return None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    """Adds the ETag and Last-Modified headers to the response and asks clients to revalidate."""
+
+    if etag is None:
+        return response
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
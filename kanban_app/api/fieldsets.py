@@ -0,0 +1,131 @@
+import hashlib
+from rest_framework import serializers
+
+
+FIELDS_QUERY_PARAM = "fields"
+EXPAND_QUERY_PARAM = "expand"
+
+
+def parse_paths(value):
+    """Returns the comma separated, dotted paths of a query parameter as tuples."""
+
+    return {tuple(part.strip() for part in path.split(".")) for path in value.split(",") if path.strip()}
+
+
+class Fieldset:
+    """
+    The fields and expanded relations, that a client asked for with ?fields= and ?expand=.
+
+    Both parameters take comma separated names, nested fields are addressed with dots,
+    e.g. ?fields=id,title,tasks.id,tasks.title&expand=tasks.assignee. It makes sure that:
+        - without ?fields= all fields are returned, a nested field without subfields
+          (e.g. "tasks") is returned with all of its fields
+        - relations, that aren't in ?expand=, are returned as ids instead of nested objects
+        - unknown names are ignored
+
+    A Fieldset is scoped to one serializer, nested() returns the one of a nested field.
+    """
+
+    def __init__(self, fields=None, expand=()):
+        self.fields = fields
+        self.expand = set(expand)
+
+    @classmethod
+    def from_request(cls, request):
+        """Returns the Fieldset of the request or None, if it contains neither parameter."""
+
+        params = getattr(request, "query_params", request.GET)
+        fields = parse_paths(params.get(FIELDS_QUERY_PARAM, ""))
+        expand = parse_paths(params.get(EXPAND_QUERY_PARAM, ""))
+        if not fields and not expand:
+            return None
+        return cls(fields or None, expand)
+
+    def includes(self, name):
+        return self.fields is None or any(path[0] == name for path in self.fields)
+
+    def expands(self, name):
+        return (name,) in self.expand
+
+    def nested(self, name):
+        """Returns the Fieldset of the nested field name."""
+
+        fields = None
+        if self.fields is not None:
+            fields = {path[1:] for path in self.fields if path[0] == name and len(path) > 1} or None
+        return Fieldset(fields, {path[1:] for path in self.expand if path[0] == name and len(path) > 1})
+
+    def key(self):
+        """Returns a short key, that is equal for equal fieldsets, e.g. to tell apart the ETags of the representations."""
+
+        fields = ",".join(sorted(".".join(path) for path in self.fields)) if self.fields is not None else "*"
+        expand = ",".join(sorted(".".join(path) for path in self.expand))
+        return hashlib.md5(f"{fields};{expand}".encode(), usedforsecurity=False).hexdigest()[:12]
+
+    def columns(self, model, always=()):
+        """Returns the names of the concrete fields of the model, that have to be loaded for the fieldset."""
+
+        return [field.name for field in model._meta.concrete_fields
+                if field.primary_key or field.name in always or self.includes(field.name)]
+
+
+def fieldset_key(fieldset):
+    return fieldset.key() if fieldset is not None else ""
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin, that only returns the fields of the Fieldset in context["fieldset"].
+
+    The fields, that weren't asked for, are removed before the serializer runs, so their values
+    are never computed. The fields in expandable_fields are nested serializers of relations,
+    they are replaced by primary key fields unless they were expanded. Without a Fieldset
+    in the context all fields are returned unchanged.
+    """
+
+    expandable_fields = []
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.get_fieldset()
+        if fieldset is None:
+            return fields
+
+        selected = {}
+        for name, field in fields.items():
+            if field.write_only:
+                selected[name] = field
+            elif not fieldset.includes(name):
+                continue
+            elif name in self.expandable_fields and not fieldset.expands(name):
+                selected[name] = serializers.PrimaryKeyRelatedField(
+                    read_only=True, many=isinstance(field, serializers.ListSerializer), source=field.source)
+            else:
+                selected[name] = field
+        return selected
+
+    def get_fieldset(self):
+        """Returns the Fieldset of the context, scoped to the position of this serializer in the nested serializers."""
+
+        fieldset = self.context.get("fieldset")
+        if fieldset is None:
+            return None
+        names = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                names.append(node.field_name)
+            node = node.parent
+        for name in reversed(names):
+            fieldset = fieldset.nested(name)
+        return fieldset
+
+
+class FieldsetViewMixin:
+    """Passes the Fieldset of the request to the serializers of a generic view."""
+
+    def get_fieldset(self):
+        return Fieldset.from_request(self.request)
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), "fieldset": self.get_fieldset()}
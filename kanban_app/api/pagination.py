@@ -0,0 +1,182 @@
+import base64
+import json
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opt-in keyset (cursor) pagination over a stable ordering of two fields.
+
+    It makes sure that:
+        - lists are only paginated, if the request contains the cursor or page_size parameter,
+          otherwise the unpaginated list is returned like before
+        - every page is loaded with a range condition on the ordering, instead of an offset,
+          so deep pages cost the same as the first one
+        - the last field of the ordering is unique, so the position in the list is unambiguous
+    """
+
+    ordering = ("id",)
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Returns a single page of the queryset or None, if the request doesn't ask for pagination."""
+
+        if (self.cursor_query_param not in request.query_params
+                and self.page_size_query_param not in request.query_params):
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request, queryset.model)
+
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        results = results[:self.page_size]
+        self.next_position = None
+        if self.has_next:
+            last = results[-1]
+            self.next_position = [self.encode_value(getattr(last, field)) for field in self.ordering]
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "results": data
+        })
+
+    def get_page_size(self, request):
+        """Returns the requested page size, limited by the max_page_size."""
+
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_next_link(self):
+        """Returns the url of the next page or None, if this was the last page."""
+
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        cursor = base64.urlsafe_b64encode(json.dumps(self.next_position).encode()).decode()
+        return replace_query_param(remove_query_param(url, self.cursor_query_param),
+                                   self.cursor_query_param, cursor)
+
+    def after(self, position):
+        """
+        Returns the condition for all rows after the given position.
+
+        It is written as "a >= x AND (a > x OR b > y)", so the database can use the
+        index on the first field for a range scan.
+        """
+
+        first, second = self.ordering
+        first_value, second_value = position
+        return (Q(**{f"{first}__gte": first_value})
+                & (Q(**{f"{first}__gt": first_value}) | Q(**{f"{second}__gt": second_value})))
+
+    def decode_cursor(self, request, model):
+        """Returns the position that is encoded in the cursor parameter or None on the first page."""
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if not isinstance(position, list) or len(position) != len(self.ordering):
+                raise ValueError
+            return [model._meta.get_field(field).to_python(value)
+                    for field, value in zip(self.ordering, position)]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_value(self, value):
+        """Returns a JSON compatible representation of an ordering value."""
+
+        if hasattr(value, "isoformat"):
+            return value.isoformat()
+        return value
+
+
+class TaskPagination(KeysetPagination):
+    """Keyset pagination for task lists, ordered by their due date."""
+
+    ordering = ("due_date", "id")
+
+
+class CommentPagination(KeysetPagination):
+    """Keyset pagination for comment lists, ordered by their creation time."""
+
+    ordering = ("created_at", "id")
+
+
+class RankedPagination(BasePagination):
+    """
+    Page number pagination for ranked search results.
+
+    The rank of a result is computed by the search query and not stored, so there is no
+    index a keyset could seek in. Every page is loaded with limit and offset instead and
+    one more result than needed tells if there is a next page.
+    """
+
+    page_size = 20
+    max_page_size = 100
+    page_query_param = "page"
+    page_size_query_param = "page_size"
+    invalid_page_message = "Invalid page"
+
+    def paginate_results(self, fetch, request):
+        """Calls fetch(offset, limit) for the requested page and returns its results."""
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        try:
+            self.page = int(request.query_params.get(self.page_query_param, 1))
+            if self.page < 1:
+                raise ValueError
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+
+        results = fetch((self.page - 1) * self.page_size, self.page_size + 1)
+        self.has_next = len(results) > self.page_size
+        return results[:self.page_size]
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "results": data
+        })
+
+    def get_page_size(self, request):
+        """Returns the requested page size, limited by the max_page_size."""
+
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = replace_query_param(self.request.build_absolute_uri(), self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.page_query_param, self.page + 1)
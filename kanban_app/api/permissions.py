@@ -1,6 +1,7 @@
-from django.shortcuts import get_object_or_404
+from django.http import Http404
 from rest_framework.permissions import BasePermission, SAFE_METHODS
-from kanban_app.models import Board, Ticket
+from kanban_app.models import Ticket
+from kanban_app.membership import aget_board_access, get_board_access
 
 
 class IsOwnerOrMember(BasePermission):
@@ -16,17 +17,25 @@ class IsOwnerOrMember(BasePermission):
     def has_object_permission(self, request, view, obj):
 
         if request.method in SAFE_METHODS or request.method in ["PUT", "PATCH"]:
-            if request.user == obj.owner:
+            if request.user.id == obj.owner_id:
                 return True
-            if obj.members.filter(id=request.user.id).exists():
+            if get_board_access(request, obj.pk).is_member(request.user.id):
                 return True
 
         if request.method == "DELETE":
-            if request.user == obj.owner:
+            if request.user.id == obj.owner_id:
                 return True
 
         return False
 
+    async def ahas_object_permission(self, request, view, obj):
+        """Async variant of has_object_permission() for the async views, only for safe methods."""
+
+        if request.method in SAFE_METHODS:
+            access = await aget_board_access(request, obj.pk)
+            return access is not None and access.is_owner_or_member(request.user.id)
+        return False
+
 
 class IsMember(BasePermission):
     """
@@ -37,11 +46,14 @@ class IsMember(BasePermission):
     def has_permission(self, request, view):
 
         if request.method == "POST":
-            board_id = request.data["board"]
-            single_board = get_object_or_404(Board, pk=board_id)
-            if request.user in single_board.members.all():
-                return True
-            return False
+            try:
+                board_id = int(request.data["board"])
+            except (KeyError, TypeError, ValueError):
+                raise Http404
+            access = get_board_access(request, board_id)
+            if access is None:
+                raise Http404
+            return access.is_member(request.user.id)
 
 
 class IsPatchMember(BasePermission):
@@ -55,13 +67,13 @@ class IsPatchMember(BasePermission):
 
     def has_object_permission(self, request, view, obj):
         if request.method in ["PUT", "PATCH"]:
-            if request.user in obj.board.members.all():
+            if get_board_access(request, obj.board_id).is_member(request.user.id):
                 return True
 
         if request.method == "DELETE":
-            if request.user == obj.board.owner:
+            if request.user.id == obj.creator_id:
                 return True
-            if request.user == obj.creator:
+            if request.user.id == get_board_access(request, obj.board_id).owner_id:
                 return True
 
         return False
@@ -75,10 +87,21 @@ class IsBoardTaskMember(BasePermission):
 
     def has_permission(self, request, view):
         if request.method in SAFE_METHODS or request.method == "POST":
-            ticket = get_object_or_404(Ticket, pk=view.kwargs.get("pk"))
-            if ticket.board.members.filter(pk=request.user.pk).exists():
-                return True
-            return False
+            board_id = Ticket.objects.filter(pk=view.kwargs.get("pk")).values_list("board_id", flat=True).first()
+            if board_id is None:
+                raise Http404
+            return get_board_access(request, board_id).is_member(request.user.id)
+
+    async def ahas_permission(self, request, view):
+        """Async variant of has_permission() for the async views, only for safe methods."""
+
+        if request.method in SAFE_METHODS:
+            board_id = await Ticket.objects.filter(pk=view.kwargs.get("pk")).values_list("board_id", flat=True).afirst()
+            if board_id is None:
+                raise Http404
+            access = await aget_board_access(request, board_id)
+            return access.is_member(request.user.id)
+        return False
 
 
 class IsOwnerOfComment(BasePermission):
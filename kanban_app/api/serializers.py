@@ -1,6 +1,31 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
 from kanban_app.models import Board, Ticket, Comment
+from kanban_app.membership import get_board_access
+from .fieldsets import SparseFieldsetMixin
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key field, that looks the related object up in context["preloaded"] first.
+
+    Bulk requests load all referenced boards and users with one query each and pass them
+    as a dict of model classes and {pk: instance} dicts, so the single items don't query again.
+    """
+
+    def to_internal_value(self, data):
+        preloaded = self.context.get("preloaded", {}).get(self.get_queryset().model)
+        if preloaded is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            obj = preloaded.get(int(data))
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if obj is None:
+            self.fail("does_not_exist", pk_value=data)
+        return obj
 
 
 class BoardListSerializer(serializers.ModelSerializer):
@@ -25,23 +50,23 @@ class BoardListSerializer(serializers.ModelSerializer):
         """Returns an integer, wich contains the count of all members 
         that are part of the board."""
 
-        return obj.members.count()
+        return obj.stats.member_count
 
     def get_ticket_count(self, obj):
         """Returns an integer, wich contains the count of all tickets/tasks 
         that belong to the board."""
 
-        return obj.tickets.count()
+        return obj.stats.ticket_count
 
     def get_tasks_to_do_count(self, obj):
         """Returns an integer, wich contains the count of all tasks, where the status is 'to-do'."""
 
-        return obj.tickets.filter(status="to-do").count()
+        return obj.stats.tasks_to_do_count
 
     def get_tasks_high_prio_count(self, obj):
         """Returns an integer, wich contains the count of all tasks, where the priority is 'high'."""
 
-        return obj.tickets.filter(priority="high").count()
+        return obj.stats.tasks_high_prio_count
 
 
 class MemberSerializer(serializers.ModelSerializer):
@@ -58,14 +83,17 @@ class MemberSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "email"]
 
 
-class HelperTaskSerializer(serializers.ModelSerializer):
+class HelperTaskSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Helper serializer for representating the tasks of a board in a nested relationship.
+    Supports ?fields= and ?expand=, see kanban_app.api.fieldsets.
     """
 
+    expandable_fields = ["assignee", "reviewer"]
+
     assignee = MemberSerializer(read_only=True)
     reviewer = MemberSerializer(read_only=True)
-    comments_count = serializers.SerializerMethodField(read_only=True)
+    comments_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Ticket
@@ -73,17 +101,15 @@ class HelperTaskSerializer(serializers.ModelSerializer):
                   "priority", "assignee", "reviewer", "due_date", "comments_count"]
         read_only_fields = ["id", "title", "description", "priority"]
 
-    def get_comments_count(self, obj):
-        """Returns the amount of comments, that belong to the task."""
-
-        return obj.comments.count()
-
 
-class BoardRetrieveSerializer(serializers.ModelSerializer):
+class BoardRetrieveSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer that returns a single instance of a board.
+    Supports ?fields= and ?expand=, see kanban_app.api.fieldsets.
     """
 
+    expandable_fields = ["members"]
+
     owner_id = serializers.IntegerField()
     members = MemberSerializer(many=True, read_only=True)
     tasks = HelperTaskSerializer(source="tickets", many=True, read_only=True)
@@ -93,37 +119,121 @@ class BoardRetrieveSerializer(serializers.ModelSerializer):
         fields = ["id", "title", "owner_id", "members", "tasks"]
 
 
+class BoardHeadSerializer(BoardRetrieveSerializer):
+    """Serializer of a board without its tasks, used by the change log."""
+
+    class Meta(BoardRetrieveSerializer.Meta):
+        fields = ["id", "title", "owner_id", "members"]
+
+
+class UserListField(serializers.ListField):
+    """List of user ids, that are resolved to users with a single query."""
+
+    child = serializers.IntegerField()
+    default_error_messages = {
+        "does_not_exist": 'Invalid pk "{pk_value}" - object does not exist.'
+    }
+
+    def to_internal_value(self, data):
+        ids = super().to_internal_value(data)
+        users = User.objects.in_bulk(ids)
+        for pk in ids:
+            if pk not in users:
+                self.fail("does_not_exist", pk_value=pk)
+        return [users[pk] for pk in dict.fromkeys(ids)]
+
+
 class BoardUpdateSerializer(serializers.ModelSerializer):
     """
     Serializer that updates a specific task and returns the updated instance.
+
+    The members can be replaced as a whole with "members" or changed with "add_members"
+    and "remove_members". Only the difference to the current members is written and the
+    returned members are taken from the already loaded users.
     """
 
+    members = UserListField(write_only=True, required=False)
+    add_members = UserListField(write_only=True, required=False)
+    remove_members = UserListField(write_only=True, required=False)
     owner_data = MemberSerializer(source="owner", read_only=True)
-    members_data = MemberSerializer(
-        source="members", read_only=True, many=True)
+    members_data = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = Board
-        fields = ["id", "title", "members", "owner_data", "members_data"]
+        fields = ["id", "title", "members", "add_members", "remove_members", "owner_data", "members_data"]
         read_only_fields = ["id"]
-        extra_kwargs = {
-            "members": {"write_only": True}
-        }
 
+    def validate(self, data):
+        """Makes sure, that the members are either replaced or changed, but not both at once."""
+
+        if "members" in data and ("add_members" in data or "remove_members" in data):
+            raise serializers.ValidationError(
+                {"members": "Use either members or add_members/remove_members."})
+        return data
+
+    def update(self, instance, validated_data):
+        """
+        This method does the following:
+            - updates the title through the default update
+            - computes which members have to be added and removed
+            - adds and removes only those members with one query each
+            - remembers the new members for the response
+        """
 
-class TaskSerializer(serializers.ModelSerializer):
+        members = validated_data.pop("members", None)
+        add_members = validated_data.pop("add_members", [])
+        remove_members = validated_data.pop("remove_members", [])
+        instance = super().update(instance, validated_data)
+
+        if members is not None:
+            current_ids = set(instance.members.through.objects
+                              .filter(board_id=instance.pk).values_list("user_id", flat=True))
+            target = {user.pk: user for user in members}
+        elif add_members or remove_members:
+            target = {user.pk: user for user in instance.members.all()}
+            current_ids = set(target)
+            target.update({user.pk: user for user in add_members})
+            for user in remove_members:
+                target.pop(user.pk, None)
+        else:
+            return instance
+
+        to_remove = current_ids - target.keys()
+        to_add = target.keys() - current_ids
+        if to_remove:
+            instance.members.remove(*to_remove)
+        if to_add:
+            instance.members.add(*to_add)
+
+        self._members = sorted(target.values(), key=lambda user: user.pk)
+        return instance
+
+    def get_members_data(self, obj):
+        """Returns the members of the board, without querying them again after an update."""
+
+        members = getattr(self, "_members", None)
+        if members is None:
+            members = obj.members.all()
+        return MemberSerializer(members, many=True).data
+
+
+class TaskSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer that returns the tasks that belong to a specific board. 
-    It also allows to create new taks.
+    It also allows to create new taks. The task lists support ?fields= and ?expand=,
+    see kanban_app.api.fieldsets.
     """
 
+    expandable_fields = ["assignee", "reviewer"]
+
+    board = PreloadedPrimaryKeyRelatedField(queryset=Board.objects.all())
     assignee = MemberSerializer(read_only=True)
     reviewer = MemberSerializer(read_only=True)
-    assignee_id = serializers.PrimaryKeyRelatedField(
+    assignee_id = PreloadedPrimaryKeyRelatedField(
         queryset=User.objects.all(), write_only=True, source="assignee", required=False)
-    reviewer_id = serializers.PrimaryKeyRelatedField(
+    reviewer_id = PreloadedPrimaryKeyRelatedField(
         queryset=User.objects.all(), write_only=True, source="reviewer", required=False)
-    comments_count = serializers.SerializerMethodField(read_only=True)
+    comments_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Ticket
@@ -131,15 +241,11 @@ class TaskSerializer(serializers.ModelSerializer):
                   "assignee_id", "assignee", "reviewer_id", "reviewer", "due_date", "comments_count"]
         read_only_fields = ["id"]
 
-    def get_comments_count(self, obj):
-        """Returns the amount of comments, that belong to a specific task."""
-
-        return obj.comments.count()
-    
     def validate(self, data):
         """
         This validation method does the following:
-            - gets an instance of the board where the task belongs to
+            - gets the owner and members of the board where the task belongs to, 
+              which are resolved only once per request
             - get the assignee
             - get the reviewer
             - checks if the task has an assignee or reviewer
@@ -150,11 +256,12 @@ class TaskSerializer(serializers.ModelSerializer):
         board = data.get("board")
         assignee = data.get("assignee")
         reviewer = data.get("reviewer")
+        access = get_board_access(self.context.get("request"), board.pk)
 
-        if assignee and not board.members.filter(id=assignee.id).exists():
+        if assignee and not access.is_member(assignee.id):
             raise serializers.ValidationError({"assignee_id": "Assignee is not a member of the board."})
 
-        if reviewer and not board.members.filter(id=reviewer.id).exists():
+        if reviewer and not access.is_member(reviewer.id):
             raise serializers.ValidationError({"reviewer_id": "Reviewer is not a member of the board."})
 
         return data
@@ -165,9 +272,9 @@ class TaskPatchSerializer(serializers.ModelSerializer):
 
     assignee = MemberSerializer(read_only=True)
     reviewer = MemberSerializer(read_only=True)
-    assignee_id = serializers.PrimaryKeyRelatedField(
+    assignee_id = PreloadedPrimaryKeyRelatedField(
         queryset=User.objects.all(), write_only=True, source="assignee")
-    reviewer_id = serializers.PrimaryKeyRelatedField(
+    reviewer_id = PreloadedPrimaryKeyRelatedField(
         queryset=User.objects.all(), write_only=True, source="reviewer")
 
     class Meta:
@@ -179,7 +286,8 @@ class TaskPatchSerializer(serializers.ModelSerializer):
     def validate(self, data):
         """
         This validation method does the following:
-            - gets an instance of the board where the task belongs to
+            - gets the owner and members of the board where the task belongs to, 
+              which are resolved only once per request
             - get the assignee
             - get the reviewer
             - checks if the task has an assignee or reviewer
@@ -187,14 +295,14 @@ class TaskPatchSerializer(serializers.ModelSerializer):
             - if a reviewer is in the request body, it checks if the reviewer is a member of the board
         """
 
-        board = self.instance.board
         assignee = data.get("assignee")
         reviewer = data.get("reviewer")
+        access = get_board_access(self.context.get("request"), self.instance.board_id)
 
-        if assignee and not board.members.filter(id=assignee.id).exists():
+        if assignee and not access.is_member(assignee.id):
             raise serializers.ValidationError({"assignee_id": "Assignee is not a member of the board."})
 
-        if reviewer and not board.members.filter(id=reviewer.id).exists():
+        if reviewer and not access.is_member(reviewer.id):
             raise serializers.ValidationError({"reviewer_id": "Reviewer is not a member of the board."})
 
         return data
@@ -209,3 +317,12 @@ class CommentSerializer(serializers.ModelSerializer):
         model = Comment
         fields = ["id", "created_at", "author", "content"]
         read_only_fields = ["id", "created_at"]
+
+
+class ChangedCommentSerializer(CommentSerializer):
+    """Serializer of the comments of the change log, that also returns the task of the comment."""
+
+    task = serializers.IntegerField(source="ticket_id", read_only=True)
+
+    class Meta(CommentSerializer.Meta):
+        fields = ["id", "task", "created_at", "author", "content"]
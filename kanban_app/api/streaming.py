@@ -0,0 +1,116 @@
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from core.renderers import FastJSONRenderer
+
+
+STREAM_QUERY_PARAM = "stream"
+CHUNK_SIZE = 200
+
+
+def wants_stream(request):
+    """
+    Returns True, if the client asked for a streamed response with ?stream=true
+    and the response is going to be rendered as JSON.
+    """
+
+    if request.query_params.get(STREAM_QUERY_PARAM, "").lower() not in ["1", "true", "yes"]:
+        return False
+    renderer = getattr(request, "accepted_renderer", None)
+    return renderer is not None and renderer.format == "json"
+
+
+def render_items(queryset, serializer_class, context, chunk_size=CHUNK_SIZE):
+    """
+    Yields the comma separated JSON of all objects of the queryset, without the surrounding brackets.
+
+    The rows are fetched with iterator(), so only one chunk of ORM objects, serialized dicts
+    and bytes is held in memory at a time. Every chunk is rendered with the JSON renderer of the API,
+    so the output is byte-identical to rendering the whole list at once.
+    """
+
+    renderer = FastJSONRenderer()
+    chunk = []
+    first = True
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(obj)
+        if len(chunk) == chunk_size:
+            yield (b"" if first else b",") + renderer.render(serializer_class(chunk, many=True, context=context).data)[1:-1]
+            first = False
+            chunk = []
+    if chunk:
+        yield (b"" if first else b",") + renderer.render(serializer_class(chunk, many=True, context=context).data)[1:-1]
+
+
+def stream_list(queryset, serializer_class, context, chunk_size=CHUNK_SIZE):
+    """Yields the JSON list of all objects of the queryset in chunks."""
+
+    yield b"["
+    yield from render_items(queryset, serializer_class, context, chunk_size)
+    yield b"]"
+
+
+def stream_object_with_list(serializer, field_name, queryset, serializer_class, chunk_size=CHUNK_SIZE, context=None):
+    """
+    Yields the JSON of a serialized object, whose last field is a nested list, that gets streamed.
+
+    The object is rendered without the nested field first, then the list is appended in chunks.
+    The items are serialized with the given context or the one of the serializer.
+    """
+
+    field = serializer.fields.pop(field_name)
+    head = FastJSONRenderer().render(serializer.data)
+    # With a fieldset, that only keeps the nested field, the head is an empty object without a comma.
+    separator = b"," if head != b"{}" else b""
+    yield head[:-1] + separator + FastJSONRenderer().render(field_name) + b":["
+    yield from render_items(queryset, serializer_class, context if context is not None else serializer.context, chunk_size)
+    yield b"]}"
+    serializer.fields[field_name] = field
+
+
+async def aiterate(iterator):
+    """
+    Yields the chunks of a sync iterator from an async iterator.
+
+    Every chunk is generated in the thread of the sync code, where the queries of the iterator run.
+    """
+
+    iterator = iter(iterator)
+    end = object()
+    while (chunk := await sync_to_async(next)(iterator, end)) is not end:
+        yield chunk
+
+
+def streaming_json_response(content, request):
+    """
+    Returns a response, that sends the given JSON chunks as they are generated.
+
+    Under ASGI Django would load a sync iterator completely before sending it, so the chunks
+    are passed through aiterate() there. Under WSGI they are sent as they are.
+    """
+
+    if isinstance(getattr(request, "_request", request), ASGIRequest):
+        content = aiterate(content)
+    return StreamingHttpResponse(content, content_type="application/json")
+
+
+class StreamingListMixin:
+    """
+    Allows a ListAPIView to stream its response with ?stream=true.
+
+    Paginated requests are not streamed, because a page is already bounded in size.
+    """
+
+    stream_chunk_size = CHUNK_SIZE
+
+    def list(self, request, *args, **kwargs):
+        paginated = self.paginator is not None and any(
+            param in request.query_params
+            for param in [self.paginator.cursor_query_param, self.paginator.page_size_query_param])
+        if not wants_stream(request) or paginated:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        content = stream_list(
+            queryset, self.get_serializer_class(), self.get_serializer_context(), self.stream_chunk_size)
+        return streaming_json_response(content, request)
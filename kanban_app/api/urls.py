@@ -1,17 +1,21 @@
 from django.urls import path
-from .views import (ListCreateBoardView, RetrieveUpdateDestroyBoardView, 
-                    EmailCheckView, AssignedToMeView, ReviewView,
-                    CreateTaskView, UpdateDeleteTaskView, ListCreateCommentView,
-                    DestroyCommentView)
+from .views import (ListCreateBoardView, RetrieveUpdateDestroyBoardView, BoardChangesView,
+                    EmailCheckView, UserSearchView, AssignedToMeView, ReviewView,
+                    CreateTaskView, BulkTaskView, UpdateDeleteTaskView, ListCreateCommentView,
+                    DestroyCommentView, SearchView)
 
 urlpatterns = [
     path("boards/", ListCreateBoardView.as_view(), name="board-list"),
     path("boards/<int:pk>/", RetrieveUpdateDestroyBoardView.as_view(), name="board-detail"),
+    path("boards/<int:pk>/changes/", BoardChangesView.as_view(), name="board-changes"),
     path("email-check/", EmailCheckView.as_view(), name="email-check"),
+    path("users/search/", UserSearchView.as_view(), name="user-search"),
     path("tasks/", CreateTaskView.as_view(), name="task"),
+    path("tasks/bulk/", BulkTaskView.as_view(), name="task-bulk"),
     path("tasks/<int:pk>/", UpdateDeleteTaskView.as_view(), name="update-delete-task"),
     path("tasks/<int:pk>/comments/", ListCreateCommentView.as_view(), name="create-comment"),
     path("tasks/<int:task_id>/comments/<int:pk>/", DestroyCommentView.as_view(), name="destroy-comment"),
     path("tasks/assigned-to-me/", AssignedToMeView.as_view(), name="assigned-to-me"),
-    path("tasks/reviewing/", ReviewView.as_view(), name="review")
+    path("tasks/reviewing/", ReviewView.as_view(), name="review"),
+    path("search/", SearchView.as_view(), name="search")
 ]
\ No newline at end of file
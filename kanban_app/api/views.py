@@ -1,19 +1,76 @@
 from django.contrib.auth.models import User
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Prefetch
 from rest_framework.views import APIView
 from rest_framework import generics
 from rest_framework import mixins
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.throttling import ScopedRateThrottle
 from kanban_app.models import Board, Ticket, Comment
-from .serializers import (BoardListSerializer, BoardRetrieveSerializer, BoardUpdateSerializer,
-                          TaskSerializer, TaskPatchSerializer, CommentSerializer)
+from .serializers import (BoardListSerializer, BoardRetrieveSerializer, BoardUpdateSerializer, BoardHeadSerializer,
+                          HelperTaskSerializer, TaskSerializer, TaskPatchSerializer, CommentSerializer,
+                          ChangedCommentSerializer)
 from .permissions import (IsOwnerOrMember, IsMember, IsPatchMember, IsBoardTaskMember, 
                           IsOwnerOfComment)
+from .pagination import TaskPagination, CommentPagination, RankedPagination
+from .conditional import board_validators, board_list_validators, etag_variant, not_modified, set_validators
+from .caching import CachedListMixin
+from .fieldsets import FieldsetViewMixin, fieldset_key
+from .streaming import StreamingListMixin, stream_object_with_list, streaming_json_response, wants_stream
+from kanban_app.membership import get_board_access, prefetch_board_access
+from kanban_app import changes, events, response_cache, search, stats
+from kanban_app.user_search import search_users
 
 
-class ListCreateBoardView(generics.ListCreateAPIView):
+def board_tickets_queryset(fieldset=None):
+    """
+    Returns the tickets in the shape the task serializers need them:
+        - joined with their assignee and reviewer
+        - ordered by id, so a streamed board has the same order as a prefetched one
+    The amount of comments is read from the comments_count column of the tickets.
+
+    With a Fieldset only the requested columns are loaded and only the expanded relations are
+    joined. The board and the due date are always loaded for the prefetch and the pagination.
+    """
+
+    queryset = Ticket.objects.order_by("id")
+    if fieldset is None:
+        return queryset.select_related("assignee", "reviewer")
+
+    related = [name for name in ["assignee", "reviewer"] if fieldset.includes(name) and fieldset.expands(name)]
+    if related:
+        queryset = queryset.select_related(*related)
+    member_columns = [f"{name}__{column}" for name in related for column in ["email", "username"]]
+    return queryset.only(*fieldset.columns(Ticket, always=["board", "due_date"]), *member_columns)
+
+
+def board_detail_queryset(fieldset=None, tickets=True):
+    """
+    Returns the boards with everything the BoardRetrieveSerializer needs:
+        - the members in one prefetch query, only their ids if they aren't expanded
+        - the tickets in one prefetch query, see board_tickets_queryset(), unless
+          tickets is False because they are streamed
+    Members and tickets, that weren't requested in the Fieldset, aren't loaded at all.
+    """
+
+    if fieldset is None:
+        if not tickets:
+            return Board.objects.prefetch_related("members")
+        return Board.objects.prefetch_related("members", Prefetch("tickets", queryset=board_tickets_queryset()))
+
+    prefetches = []
+    if fieldset.includes("members"):
+        prefetches.append("members" if fieldset.expands("members")
+                          else Prefetch("members", queryset=User.objects.only("id")))
+    if tickets and fieldset.includes("tasks"):
+        prefetches.append(Prefetch("tickets", queryset=board_tickets_queryset(fieldset.nested("tasks"))))
+    return Board.objects.prefetch_related(*prefetches)
+
+
+class ListCreateBoardView(CachedListMixin, generics.ListCreateAPIView):
     """
     - Shows a list of all boards of wich the authenticated user is a member or owner of
     - Creates a new board
@@ -26,30 +83,117 @@ class ListCreateBoardView(generics.ListCreateAPIView):
         Returns a queryset of the Board model that inclues the following:
             - boards where the authenticated user is the owner of
             - boards where the authenticated user is a member of
-            - makes sure with the distinct() method, that there are not duplicates
+            - the denormalized statistics of every board, so the whole list is
+              loaded with a single query
+        """
+
+        return Board.objects.for_user(self.request.user).select_related("stats")
+
+    def build_list(self, request, *args, **kwargs):
+        """
+        Returns the board list with an ETag header.
+
+        If the client sends the ETag of the current list, a 304 response is returned after
+        a single query for the versions, without loading and serializing the boards.
+        With the response cache this only runs on a miss, a hit is answered with the ETag
+        stored in the cache entry.
         """
 
-        return Board.objects.filter(Q(owner=self.request.user) | Q(members__id=self.request.user.id)).distinct()
+        etag, last_modified = board_list_validators(request.user, etag_variant(request.accepted_renderer.format))
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        return set_validators(super().build_list(request, *args, **kwargs), etag, last_modified)
 
     def perform_create(self, serializer):
         """
         Adds the authenticated user to the owner field of the Board model before the create() method
-        gets executed
+        gets executed.
+
+        The statistics are reloaded afterwards, because the member count is incremented in the
+        database while the members are added. The new board is written to its change log.
         """
 
-        serializer.save(owner=self.request.user)
+        with transaction.atomic():
+            board = serializer.save(owner=self.request.user)
+            changes.record(board.pk, "board", [board.pk])
+        board.stats.refresh_from_db()
 
 
-class RetrieveUpdateDestroyBoardView(generics.RetrieveUpdateDestroyAPIView):
+class RetrieveUpdateDestroyBoardView(FieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     - Sends a single Board as a response
     - Updates a specific Board
     - Deletes a specific Board
     """
 
-    queryset = Board.objects.all()
     permission_classes = [IsOwnerOrMember]
 
+    def get_queryset(self):
+        """
+        Returns a queryset of the Board model.
+
+        For GET requests everything the BoardRetrieveSerializer needs is loaded upfront:
+            - the members in one prefetch query
+            - the tickets in one prefetch query, joined with their assignee and reviewer
+        That way the costs of the request don't depend on the amount of tickets.
+        With ?fields= and ?expand= only what was requested is loaded, see board_detail_queryset().
+        """
+
+        if self.request.method == "GET":
+            return board_detail_queryset(self.get_fieldset())
+        return Board.objects.select_related("owner")
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Returns the board with an ETag and Last-Modified header.
+
+        If the client sends the ETag of the current version and is allowed to read the board,
+        a 304 response is returned after looking up the version, without running the serializer.
+        Everything else, including the error responses, takes the regular path.
+
+        With ?stream=true the tasks are streamed in chunks instead of being prefetched.
+        Every fieldset and every format has its own ETag, because its representation differs.
+        """
+
+        fieldset = self.get_fieldset()
+        variant = etag_variant(request.accepted_renderer.format, fieldset_key(fieldset))
+        etag, last_modified = board_validators(kwargs["pk"], variant)
+        access = get_board_access(request, kwargs["pk"])
+        if access is not None and access.is_owner_or_member(request.user.id):
+            response = not_modified(request, etag, last_modified)
+            if response is not None:
+                return response
+        if wants_stream(request) and (fieldset is None or fieldset.includes("tasks")):
+            return set_validators(self.stream(request), etag, last_modified)
+        return set_validators(super().retrieve(request, *args, **kwargs), etag, last_modified)
+
+    def stream(self, request):
+        """
+        Returns the board as a streamed response.
+
+        Only the members are loaded upfront, the tickets are fetched and rendered in chunks
+        while the response is sent, so the memory usage doesn't grow with the amount of tickets.
+        """
+
+        fieldset = self.get_fieldset()
+        board = get_object_or_404(board_detail_queryset(fieldset, tickets=False), pk=self.kwargs["pk"])
+        self.check_object_permissions(request, board)
+        context = self.get_serializer_context()
+        serializer = BoardRetrieveSerializer(board, context=context)
+        tasks_fieldset = fieldset.nested("tasks") if fieldset is not None else None
+        tickets = board_tickets_queryset(tasks_fieldset).filter(board=board)
+        content = stream_object_with_list(
+            serializer, "tasks", tickets, HelperTaskSerializer, context={**context, "fieldset": tasks_fieldset})
+        return streaming_json_response(content, request)
+
+    def perform_update(self, serializer):
+        """Updates the board and writes the change of the title or the members to its change log."""
+
+        with transaction.atomic():
+            board = serializer.save()
+            changes.record(board.pk, "board", [board.pk])
+
     def get_serializer_class(self):
         """
         Returns differents serializer based on the request method.
@@ -78,22 +222,57 @@ class EmailCheckView(APIView):
         return Response(data, status=status.HTTP_200_OK)
 
 
-class AssignedToMeView(generics.ListAPIView):
+class UserSearchView(APIView):
+    """
+    Returns the users whose email or username starts with the query parameter q.
+
+    At most limit users are returned (default 10, at most 50), ordered by the matching
+    email or username. The lookup is case insensitive for A-Z and only reads the matching
+    entries of the lower(email) and lower(username) indexes.
+
+    The prefix needs at least min_length characters and the requests are throttled per user,
+    so the emails of all users can't be listed with a few short prefixes.
+    """
+
+    default_limit = 10
+    max_limit = 50
+    min_length = 3
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = "user-search"
+
+    def get(self, req):
+        prefix = req.query_params.get("q", "").strip()
+        if not prefix:
+            raise ValidationError({"q": ["This query parameter is required."]})
+        if len(prefix) < self.min_length:
+            raise ValidationError({"q": [f"Ensure this value has at least {self.min_length} characters."]})
+        try:
+            limit = int(req.query_params.get("limit", self.default_limit))
+        except ValueError:
+            raise ValidationError({"limit": ["A valid integer is required."]})
+        if limit < 1:
+            raise ValidationError({"limit": ["Ensure this value is greater than or equal to 1."]})
+        return Response(search_users(prefix, min(limit, self.max_limit)), status=status.HTTP_200_OK)
+
+
+class AssignedToMeView(CachedListMixin, StreamingListMixin, FieldsetViewMixin, generics.ListAPIView):
     """Returns a list of all Tickets/Tasks that are assigned to the authenticated user."""
 
     serializer_class = TaskSerializer
+    pagination_class = TaskPagination
 
     def get_queryset(self):
-        return Ticket.objects.filter(assignee=self.request.user)
+        return board_tickets_queryset(self.get_fieldset()).filter(assignee=self.request.user)
 
 
-class ReviewView(generics.ListAPIView):
+class ReviewView(CachedListMixin, StreamingListMixin, FieldsetViewMixin, generics.ListAPIView):
     """Returns a list of all Tickets/Tasks that the authenticated user has to review."""
 
     serializer_class = TaskSerializer
+    pagination_class = TaskPagination
 
     def get_queryset(self):
-        return Ticket.objects.filter(reviewer=self.request.user)
+        return board_tickets_queryset(self.get_fieldset()).filter(reviewer=self.request.user)
     
 
 class CreateTaskView(generics.CreateAPIView):
@@ -106,10 +285,155 @@ class CreateTaskView(generics.CreateAPIView):
     def perform_create(self, serializer):
         """
         Adds the authenticated user to the creator field of the Task model before the create() method
-        gets executed
+        gets executed and writes the new task to the change log of its board
         """
 
-        serializer.save(creator=self.request.user)
+        with transaction.atomic():
+            ticket = serializer.save(creator=self.request.user)
+            changes.record(ticket.board_id, "task", [ticket.pk])
+
+
+class BulkTaskView(generics.GenericAPIView):
+    """
+    This class allows to:
+        - create many tasks with one POST request
+        - update many tasks with one PATCH request
+
+    All referenced boards, users and memberships are loaded upfront with one query each.
+    The tasks are written with bulk_create/bulk_update inside one transaction and only if
+    every item is valid. Otherwise a list of errors is returned, that has the same order as
+    the request body and contains an empty object for every valid item.
+    """
+
+    queryset = Ticket.objects.all()
+    max_items = 500
+    forbidden_message = "You do not have permission to perform this action."
+
+    def post(self, request, *args, **kwargs):
+        items = self.get_items(request)
+        if isinstance(items, Response):
+            return items
+
+        board_ids = self.collect_ids(items, ["board"])
+        access = prefetch_board_access(request, board_ids)
+        context = self.get_bulk_context(
+            boards=Board.objects.in_bulk(board_ids),
+            users=User.objects.in_bulk(self.collect_ids(items, ["assignee_id", "reviewer_id"])))
+
+        serializers, errors = [], []
+        for item in items:
+            serializer = TaskSerializer(data=item, context=context)
+            if not serializer.is_valid():
+                errors.append(serializer.errors)
+                continue
+            if not access[serializer.validated_data["board"].pk].is_member(request.user.id):
+                errors.append({"board": [self.forbidden_message]})
+                continue
+            serializers.append(serializer)
+            errors.append({})
+
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            tickets = Ticket.objects.bulk_create(
+                [Ticket(creator=request.user, **serializer.validated_data) for serializer in serializers])
+            stats.record_tickets_created(tickets)
+            response_cache.invalidate_tickets(tickets)
+            events.publish_tickets(tickets, "task.created")
+            changes.record_many([(ticket.board_id, "task", ticket.pk, changes.UPSERT) for ticket in tickets])
+
+        return Response(TaskSerializer(tickets, many=True, context=context).data, status=status.HTTP_201_CREATED)
+
+    def patch(self, request, *args, **kwargs):
+        items = self.get_items(request)
+        if isinstance(items, Response):
+            return items
+
+        tickets = Ticket.objects.select_related("assignee", "reviewer").in_bulk(self.collect_ids(items, ["id"]))
+        access = prefetch_board_access(request, {ticket.board_id for ticket in tickets.values()})
+        context = self.get_bulk_context(
+            users=User.objects.in_bulk(self.collect_ids(items, ["assignee_id", "reviewer_id"])))
+
+        updates, errors, seen = [], [], set()
+        for item in items:
+            # bool is a subclass of int, but {"id": true} doesn't address the task with the id 1.
+            task_id = item.get("id") if isinstance(item, dict) else None
+            ticket = tickets.get(task_id) if isinstance(task_id, int) and not isinstance(task_id, bool) else None
+            if ticket is None:
+                errors.append({"id": ["Task not found."]})
+                continue
+            if ticket.pk in seen:
+                errors.append({"id": ["Task is updated more than once."]})
+                continue
+            seen.add(ticket.pk)
+            if not access[ticket.board_id].is_member(request.user.id):
+                errors.append({"detail": self.forbidden_message})
+                continue
+            serializer = TaskPatchSerializer(ticket, data=item, partial=True, context=context)
+            if not serializer.is_valid():
+                errors.append(serializer.errors)
+                continue
+            updates.append(serializer)
+            errors.append({})
+
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        fields = set()
+        for serializer in updates:
+            for attr, value in serializer.validated_data.items():
+                setattr(serializer.instance, attr, value)
+                fields.add(attr)
+
+        changed = [serializer.instance for serializer in updates]
+        with transaction.atomic():
+            if fields:
+                Ticket.objects.bulk_update(changed, list(fields))
+            stats.record_tickets_changed(changed)
+            response_cache.invalidate_tickets(changed)
+            events.publish_tickets(changed, "task.updated")
+            changes.record_many([(ticket.board_id, "task", ticket.pk, changes.UPSERT) for ticket in changed])
+        for ticket in changed:
+            stats.remember_ticket_values(ticket)
+
+        return Response(TaskPatchSerializer(changed, many=True, context=context).data, status=status.HTTP_200_OK)
+
+    def get_items(self, request):
+        """Returns the list of the request body or an error response, if it isn't a valid list."""
+
+        items = request.data
+        if not isinstance(items, list):
+            return Response({"non_field_errors": [f"Expected a list of items but got type \"{type(items).__name__}\"."]},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not items:
+            return Response({"non_field_errors": ["This list may not be empty."]}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_items:
+            return Response({"non_field_errors": [f"Ensure this list has no more than {self.max_items} items."]},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return items
+
+    def collect_ids(self, items, keys):
+        """Returns all integer ids, that are found under the given keys of the items."""
+
+        ids = set()
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            for key in keys:
+                try:
+                    ids.add(int(item[key]))
+                except (KeyError, TypeError, ValueError):
+                    pass
+        return ids
+
+    def get_bulk_context(self, boards=None, users=None):
+        """Returns the serializer context with the preloaded boards and users."""
+
+        preloaded = {User: users or {}}
+        if boards is not None:
+            preloaded[Board] = boards
+        return {**self.get_serializer_context(), "preloaded": preloaded}
 
 
 class UpdateDeleteTaskView(mixins.UpdateModelMixin, mixins.DestroyModelMixin, generics.GenericAPIView):
@@ -128,6 +452,18 @@ class UpdateDeleteTaskView(mixins.UpdateModelMixin, mixins.DestroyModelMixin, ge
     
     def delete(self, request, *args, **kwargs):
         return self.destroy(request, *args, **kwargs)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            ticket = serializer.save()
+            changes.record(ticket.board_id, "task", [ticket.pk])
+
+    def perform_destroy(self, instance):
+        """Deletes the task and writes a tombstone to the change log. Its comments are deleted with it."""
+
+        with transaction.atomic():
+            changes.record(instance.board_id, "task", [instance.pk], changes.DELETE)
+            instance.delete()
     
 
 class ListCreateCommentView(generics.ListCreateAPIView):
@@ -139,6 +475,7 @@ class ListCreateCommentView(generics.ListCreateAPIView):
 
     serializer_class = CommentSerializer
     permission_classes = [IsBoardTaskMember]
+    pagination_class = CommentPagination
 
     def get_queryset(self):
         """
@@ -146,18 +483,21 @@ class ListCreateCommentView(generics.ListCreateAPIView):
         """
 
         pk = self.kwargs["pk"]
-        return Comment.objects.filter(ticket=pk).order_by("created_at")
+        return Comment.objects.filter(ticket=pk).select_related("author").order_by("created_at")
 
     def perform_create(self, serializer):
         """
         - Adds the authenticated user to the author field of the Comment.
         - Adds the specific Ticket instance to the ticket field of the Comment model
+        - Writes the new comment to the change log of the board
 
         Calls the create() method in the serializer
         """
 
         ticket = get_object_or_404(Ticket, pk=self.kwargs["pk"])
-        serializer.save(author=self.request.user, ticket=ticket)
+        with transaction.atomic():
+            comment = serializer.save(author=self.request.user, ticket=ticket)
+            changes.record(ticket.board_id, "comment", [comment.pk])
 
 
 class DestroyCommentView(generics.DestroyAPIView):
@@ -171,5 +511,81 @@ class DestroyCommentView(generics.DestroyAPIView):
         """
 
         task_id = self.kwargs["task_id"]
-        return Comment.objects.filter(ticket=task_id)
+        return Comment.objects.filter(ticket=task_id).select_related("ticket")
+
+    def perform_destroy(self, instance):
+        """Deletes the comment and writes a tombstone to the change log of the board."""
+
+        with transaction.atomic():
+            changes.record(instance.ticket.board_id, "comment", [instance.pk], changes.DELETE)
+            instance.delete()
+
+
+
+class ChangesGone(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "The changes since this cursor were compacted. Reload the board."
+    default_code = "gone"
+
+
+class BoardChangesView(APIView):
+    """
+    Returns the changes of a board since a cursor of its change log.
+
+    Without ?since= only the current cursor is returned. A client loads the cursor first
+    and the board afterwards, changes in between are sent again, wich is harmless because
+    every change is an upsert of the current state or a tombstone.
+    """
+
+    permission_classes = [IsOwnerOrMember]
+    max_entries = 1000
+
+    def get(self, request, pk):
+        board = get_object_or_404(Board.objects.select_related("stats"), pk=pk)
+        self.check_object_permissions(request, board)
+
+        since = request.query_params.get("since")
+        if since is None:
+            return Response({"cursor": changes.latest_cursor(board.pk)}, status=status.HTTP_200_OK)
+        try:
+            since = int(since)
+            if not 0 <= since <= changes.MAX_CURSOR:
+                raise ValueError
+        except ValueError:
+            raise ValidationError({"since": ["A valid cursor is required."]})
+        if since < board.stats.changes_floor:
+            raise ChangesGone()
+
+        result = changes.changes_since(board.pk, since, self.max_entries)
+        context = {"request": request}
+        data = {
+            "cursor": result["cursor"],
+            "has_more": result["has_more"],
+            "board": BoardHeadSerializer(result["board"], context=context).data if result["board"] else None,
+            "tasks": HelperTaskSerializer(result["tasks"], many=True, context=context).data,
+            "deleted_tasks": result["deleted_tasks"],
+            "comments": ChangedCommentSerializer(result["comments"], many=True, context=context).data,
+            "deleted_comments": result["deleted_comments"],
+        }
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class SearchView(APIView):
+    """
+    Full-text search over the tickets and comments of the boards of the authenticated user.
+
+    The results are ranked with bm25, a match in the title of a ticket counts more than one
+    in its description or in a comment. They are always paginated.
+    """
+
+    pagination_class = RankedPagination
+
+    def get(self, request):
+        text = request.query_params.get("q", "")
+        if not search.match_expression(text):
+            raise ValidationError({"q": ["This query parameter is required."]})
 
+        paginator = self.pagination_class()
+        results = paginator.paginate_results(
+            lambda offset, limit: search.search(request.user, text, offset, limit), request)
+        return paginator.get_paginated_response(results)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class KanbanAppConfig(AppConfig):
     name = 'kanban_app'
+
+    def ready(self):
+        from kanban_app import signals  # noqa: F401
@@ -0,0 +1,131 @@
+from django.db.models import Exists, Max, OuterRef
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from kanban_app.models import Board, BoardChange, BoardStats, Comment, Ticket
+
+
+UPSERT = "upsert"
+DELETE = "delete"
+# The cursors are ids of the change log, larger values can't be bound as an integer parameter.
+MAX_CURSOR = 2 ** 63 - 1
+
+
+def record(board_id, kind, object_ids, action=UPSERT):
+    """Appends an entry for every object to the change log of the board."""
+
+    record_many([(board_id, kind, object_id, action) for object_id in object_ids])
+
+
+def record_ticket(ticket_id):
+    """Appends an upsert of the ticket to the change log of its board, e.g. after its comments_count changed."""
+
+    board_id = Ticket.objects.filter(pk=ticket_id).values_list("board_id", flat=True).first()
+    if board_id is not None:
+        record(board_id, "task", [ticket_id])
+
+
+def record_many(entries):
+    """Appends (board id, kind, object id, action) tuples to the change log with one query."""
+
+    now = timezone.now()
+    BoardChange.objects.bulk_create([
+        BoardChange(board_id=board_id, kind=kind, object_id=object_id, action=action, created_at=now)
+        for board_id, kind, object_id, action in entries
+    ])
+
+
+def latest_cursor(board_id):
+    """Returns the id of the newest entry of the board or the changes floor, if the log is empty."""
+
+    latest = BoardChange.objects.filter(board_id=board_id).aggregate(latest=Max("id"))["latest"]
+    if latest is None:
+        latest = BoardStats.objects.filter(board_id=board_id).values_list("changes_floor", flat=True).first() or 0
+    return latest
+
+
+def changes_since(board_id, since, limit):
+    """
+    Returns the changes of the board after the cursor, collapsed to the last action of every object.
+
+    At most limit entries are read, the returned cursor is the id of the last one read. The
+    objects are loaded in their current state with one query per kind, so an object, that was
+    deleted after its last upsert was read, is returned as deleted.
+
+    The result is a dict:
+        - cursor: the cursor for the next request
+        - has_more: True, if there are more entries after the cursor
+        - board: the board, if it was changed
+        - tasks, comments: the upserted tickets and comments
+        - deleted_tasks, deleted_comments: the ids of the deleted tickets and comments
+    """
+
+    entries = list(BoardChange.objects
+                   .filter(board_id=board_id, id__gt=since)
+                   .order_by("id")
+                   .values_list("id", "kind", "object_id", "action")[:limit + 1])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    last_actions = {}
+    for entry_id, kind, object_id, action in entries:
+        last_actions[(kind, object_id)] = action
+
+    def ids(kind, action):
+        return {object_id for (entry_kind, object_id), entry_action in last_actions.items()
+                if entry_kind == kind and entry_action == action}
+
+    upserted_tasks, upserted_comments = ids("task", UPSERT), ids("comment", UPSERT)
+    tasks = list(Ticket.objects
+                 .filter(board_id=board_id, pk__in=upserted_tasks)
+                 .select_related("assignee", "reviewer")
+                 .order_by("id")) if upserted_tasks else []
+    comments = list(Comment.objects
+                    .filter(ticket__board_id=board_id, pk__in=upserted_comments)
+                    .select_related("author")
+                    .order_by("id")) if upserted_comments else []
+    board = Board.objects.prefetch_related("members").filter(pk=board_id).first() if ids("board", UPSERT) else None
+
+    return {
+        "cursor": entries[-1][0] if entries else since,
+        "has_more": has_more,
+        "board": board,
+        "tasks": tasks,
+        "deleted_tasks": sorted(ids("task", DELETE) | (upserted_tasks - {ticket.pk for ticket in tasks})),
+        "comments": comments,
+        "deleted_comments": sorted(ids("comment", DELETE) | (upserted_comments - {comment.pk for comment in comments})),
+    }
+
+
+def remove_superseded(chunk_size=5000):
+    """
+    Removes every entry, that has a newer entry for the same object.
+
+    This never breaks a cursor, because every client that hasn't seen the removed entry
+    will still see the newer one. The entries are removed in ranges of chunk_size ids, one
+    DELETE statement each, so the write lock of SQLite is never held for long.
+    Returns the amount of removed entries.
+    """
+
+    newer = BoardChange.objects.filter(
+        board_id=OuterRef("board_id"), kind=OuterRef("kind"), object_id=OuterRef("object_id"), pk__gt=OuterRef("pk"))
+    last_id = BoardChange.objects.aggregate(last=Max("id"))["last"] or 0
+    deleted = 0
+    for start in range(0, last_id, chunk_size):
+        removed, _ = (BoardChange.objects
+                      .filter(pk__gt=start, pk__lte=start + chunk_size)
+                      .filter(Exists(newer))
+                      .delete())
+        deleted += removed
+    return deleted
+
+
+def truncate(board_id, up_to):
+    """
+    Removes all entries of the board up to the given id and raises the changes floor to it.
+
+    Clients with an older cursor have to reload the board. Returns the amount of removed entries.
+    """
+
+    deleted, _ = BoardChange.objects.filter(board_id=board_id, id__lte=up_to).delete()
+    BoardStats.objects.filter(board_id=board_id).update(changes_floor=Greatest("changes_floor", up_to))
+    return deleted
@@ -0,0 +1,323 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+DEFAULT_BACKEND = "kanban_app.events.LocalBroker"
+QUEUE_SIZE = 1000
+
+# Put into the queue of a subscriber instead of an event, once the subscriber fell too far behind.
+OVERFLOW = object()
+
+
+class Subscription:
+    """
+    The queue of a single client, that listens to the events of a board.
+
+    The events are put into the queue from any thread through the event loop of the client.
+    """
+
+    def __init__(self, board_id, maxsize=QUEUE_SIZE):
+        self.board_id = board_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def deliver(self, event):
+        """Puts the event into the queue. Called in the event loop of the subscription."""
+
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+
+    def send(self, event):
+        """Hands the event over to the event loop of the subscription. Can be called from any thread."""
+
+        try:
+            self.loop.call_soon_threadsafe(self.deliver, event)
+        except RuntimeError:
+            # The event loop is already closed, the subscription is removed when its stream ends.
+            pass
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class LocalBroker:
+    """
+    Publishes the events of a board to all subscribers in the same process.
+
+    A board without subscribers costs nothing but a dict lookup per published event.
+    """
+
+    def __init__(self, **options):
+        self.subscribers = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def subscribe(self, board_id):
+        """Returns a new Subscription for the events of the board. Has to be called in an event loop."""
+
+        subscription = Subscription(int(board_id))
+        with self.lock:
+            self.subscribers[subscription.board_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.subscribers.get(subscription.board_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscribers[subscription.board_id]
+
+    def publish(self, board_id, event):
+        """Sends the event to all subscribers of the board."""
+
+        self.deliver(int(board_id), event)
+
+    def deliver(self, board_id, event):
+        with self.lock:
+            subscribers = list(self.subscribers.get(board_id, ()))
+        for subscription in subscribers:
+            subscription.send(event)
+
+
+class FileSpoolBroker(LocalBroker):
+    """
+    Shares the events between several worker processes on the same machine.
+
+    It's a local stand-in for a real message broker:
+        - publish() appends the event as a JSON line to a spool file of the board
+        - every process, that has subscribers, polls the spool files of their boards
+          and delivers new lines to its local subscribers
+
+    A spool file is started over, once it grows larger than MAX_BYTES. Readers finish the
+    old file through their open file handle before they switch to the new one.
+    Every process, that reads a spool file, keeps a reader file of the board up to date.
+    Without a reader file, that was touched in the last READER_TIMEOUT seconds, publish()
+    writes nothing and removes the spool file, because nobody would ever read it.
+    Needs a POSIX system, because the writers lock the spool file with fcntl.
+    """
+
+    def __init__(self, DIRECTORY=None, POLL_INTERVAL=0.5, MAX_BYTES=1024 * 1024, READER_TIMEOUT=30, **options):
+        if fcntl is None:
+            raise ImproperlyConfigured("The FileSpoolBroker needs fcntl, wich is only available on POSIX systems.")
+        super().__init__(**options)
+        self.directory = DIRECTORY or os.path.join(settings.BASE_DIR, "kanban-events")
+        self.poll_interval = POLL_INTERVAL
+        self.max_bytes = MAX_BYTES
+        self.reader_timeout = READER_TIMEOUT
+        self.readers = {}
+        self.poller = None
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, board_id):
+        return os.path.join(self.directory, f"board-{board_id}.jsonl")
+
+    def reader_path(self, board_id):
+        return os.path.join(self.directory, f"board-{board_id}.{os.getpid()}.reader")
+
+    def touch_reader(self, board_id):
+        with open(self.reader_path(board_id), "ab"):
+            pass
+        os.utime(self.reader_path(board_id))
+
+    def remove_reader(self, board_id):
+        self.readers.pop(board_id).close()
+        try:
+            os.unlink(self.reader_path(board_id))
+        except FileNotFoundError:
+            pass
+
+    def has_readers(self, board_id):
+        """Returns whether any process read the spool file of the board in the last READER_TIMEOUT seconds."""
+
+        prefix = f"board-{board_id}."
+        deadline = time.time() - self.reader_timeout
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.startswith(prefix) or not entry.name.endswith(".reader"):
+                    continue
+                try:
+                    if entry.stat().st_mtime >= deadline:
+                        return True
+                except FileNotFoundError:
+                    pass
+        return False
+
+    def subscribe(self, board_id):
+        subscription = super().subscribe(board_id)
+        if subscription.board_id not in self.readers:
+            # The reader file comes first, so no event is skipped once the spool file is open.
+            self.touch_reader(subscription.board_id)
+            self.readers[subscription.board_id] = SpoolReader(self.path(subscription.board_id))
+        if self.poller is None or self.poller.done() or self.poller.get_loop() is not subscription.loop:
+            self.poller = subscription.loop.create_task(self.poll())
+        return subscription
+
+    def publish(self, board_id, event):
+        """Appends the event to the spool file of the board, if any process reads it."""
+
+        path = self.path(board_id)
+        if not self.has_readers(board_id):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            return
+        line = (json.dumps(event, cls=DjangoJSONEncoder) + "\n").encode()
+        while True:
+            with open(path, "ab") as file:
+                fcntl.flock(file, fcntl.LOCK_EX)
+                try:
+                    # The file may have been started over between opening and locking it.
+                    if not os.path.exists(path) or os.stat(path).st_ino != os.fstat(file.fileno()).st_ino:
+                        continue
+                    file.write(line)
+                    file.flush()
+                    if file.tell() > self.max_bytes:
+                        os.unlink(path)
+                    return
+                finally:
+                    fcntl.flock(file, fcntl.LOCK_UN)
+
+    async def poll(self):
+        """Delivers new lines of the spool files to the local subscribers, until there are none left."""
+
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            with self.lock:
+                board_ids = list(self.subscribers)
+            for board_id in list(self.readers):
+                if board_id not in board_ids:
+                    self.remove_reader(board_id)
+            if not board_ids:
+                return
+            for board_id in board_ids:
+                reader = self.readers.get(board_id)
+                if reader is None:
+                    continue
+                self.touch_reader(board_id)
+                for line in reader.read_lines():
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.deliver(board_id, event)
+
+
+class SpoolReader:
+    """Reads the lines, that were appended to a spool file since the reader was created."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.buffer = b""
+        self.open(seek_end=True)
+
+    def open(self, seek_end=False):
+        try:
+            self.file = open(self.path, "rb")
+        except FileNotFoundError:
+            self.file = None
+            return
+        if seek_end:
+            self.file.seek(0, os.SEEK_END)
+
+    def read_lines(self):
+        lines = []
+        if self.file is None:
+            self.open()
+        if self.file is None:
+            return lines
+
+        lines.extend(self.read_available())
+        try:
+            started_over = os.stat(self.path).st_ino != os.fstat(self.file.fileno()).st_ino
+        except FileNotFoundError:
+            started_over = True
+        if started_over:
+            lines.extend(self.read_available())
+            self.close()
+            self.open()
+            if self.file is not None:
+                lines.extend(self.read_available())
+        return lines
+
+    def read_available(self):
+        self.buffer += self.file.read()
+        *lines, self.buffer = self.buffer.split(b"\n")
+        return lines
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+        self.file = None
+        self.buffer = b""
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Returns the broker configured in settings.KANBAN_EVENTS, the LocalBroker by default."""
+
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                config = getattr(settings, "KANBAN_EVENTS", {})
+                _broker = import_string(config.get("BACKEND", DEFAULT_BACKEND))(**config.get("OPTIONS", {}))
+    return _broker
+
+
+def publish(board_id, event_type, data):
+    """
+    Publishes an event of a board, once the current transaction is committed.
+
+    Nothing is sent, if the transaction is rolled back.
+    """
+
+    event = {"type": event_type, "board": board_id, "data": data}
+    transaction.on_commit(lambda: get_broker().publish(board_id, event))
+
+
+def ticket_data(ticket):
+    """Returns the event data of a ticket, built from the instance without any query."""
+
+    return {
+        "id": ticket.pk,
+        "title": ticket.title,
+        "description": ticket.description,
+        "status": ticket.status,
+        "priority": ticket.priority,
+        "assignee_id": ticket.assignee_id,
+        "reviewer_id": ticket.reviewer_id,
+        "due_date": ticket.due_date,
+    }
+
+
+def publish_tickets(tickets, event_type):
+    """Publishes an event for every ticket."""
+
+    for ticket in tickets:
+        publish(ticket.board_id, event_type, ticket_data(ticket))
@@ -0,0 +1,60 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+from kanban_app import changes
+from kanban_app.models import BoardChange
+
+
+class Command(BaseCommand):
+    """
+    Keeps the change logs of the boards bounded.
+
+    The command does the following:
+        - removes every entry, that is superseded by a newer entry of the same object,
+          wich doesn't affect any client
+        - removes the entries older than --days and keeps at most --max-entries entries per board,
+          clients with an older cursor get a 410 response and have to reload the board
+
+    Every board is truncated in its own transaction.
+    """
+
+    help = "Compacts the change logs of the boards."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30,
+                            help="Entries older than this amount of days are removed.")
+        parser.add_argument("--max-entries", type=int, default=10000,
+                            help="Maximum amount of entries, that are kept per board.")
+
+    def handle(self, *args, **options):
+        superseded = changes.remove_superseded()
+
+        cutoffs = {}
+        old_entries = (BoardChange.objects
+                       .filter(created_at__lt=timezone.now() - timedelta(days=options["days"]))
+                       .values("board_id")
+                       .annotate(last=Max("id")))
+        for row in old_entries:
+            cutoffs[row["board_id"]] = row["last"]
+
+        max_entries = options["max_entries"]
+        oversized = (BoardChange.objects
+                     .values("board_id")
+                     .annotate(total=Count("id"))
+                     .filter(total__gt=max_entries))
+        for row in oversized:
+            up_to = (BoardChange.objects
+                     .filter(board_id=row["board_id"])
+                     .order_by("-id")
+                     .values_list("id", flat=True)[max_entries])
+            cutoffs[row["board_id"]] = max(cutoffs.get(row["board_id"], 0), up_to)
+
+        truncated = 0
+        for board_id, up_to in cutoffs.items():
+            with transaction.atomic():
+                truncated += changes.truncate(board_id, up_to)
+
+        self.stdout.write(f"Removed {superseded} superseded and {truncated} old entries "
+                          f"of {len(cutoffs)} boards.")
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from kanban_app import search
+from kanban_app.models import Comment, Ticket
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the full-text index of the tickets and comments.
+
+    The triggers of the migration keep the index in sync with every write, so this is only
+    needed after the tables were changed with the triggers disabled, e.g. by restoring a dump.
+    The index is filled again and optimized in one transaction, searches keep seeing the old
+    index until it's done.
+    """
+
+    help = "Rebuilds the full-text search index."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            search.rebuild()
+        self.stdout.write(f"Indexed {Ticket.objects.count()} tickets and {Comment.objects.count()} comments.")
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from kanban_app.models import Board, BoardStats
+
+
+COUNTERS = ["member_count", "ticket_count", "tasks_to_do_count", "tasks_high_prio_count"]
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the statistics of all boards and fixes rows that drifted from the real counts.
+
+    The boards are processed in chunks ordered by their primary key, every chunk in its own
+    transaction, so the command can run on a live database without holding long locks.
+    """
+
+    help = "Reconciles the denormalized board statistics with the tickets and members."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500,
+                            help="Amount of boards that are checked per transaction.")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Only report the drifted boards without changing them.")
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        dry_run = options["dry_run"]
+        last_pk = 0
+        checked = fixed = 0
+
+        while True:
+            boards = list(Board.objects.with_counts()
+                          .filter(pk__gt=last_pk)
+                          .order_by("pk")[:chunk_size])
+            if not boards:
+                break
+            last_pk = boards[-1].pk
+            checked += len(boards)
+            fixed += self.reconcile_chunk(boards, dry_run)
+
+        action = "Found" if dry_run else "Fixed"
+        self.stdout.write(f"Checked {checked} boards. {action} {fixed} drifted statistics.")
+
+    def reconcile_chunk(self, boards, dry_run):
+        """Compares the annotated counts of the boards with their statistics rows."""
+
+        with transaction.atomic():
+            existing = BoardStats.objects.select_for_update().in_bulk(
+                [board.pk for board in boards], field_name="board_id")
+            to_create = []
+            to_update = []
+
+            for board in boards:
+                row = existing.get(board.pk)
+                if row is None:
+                    to_create.append(BoardStats(board=board, **{f: getattr(board, f) for f in COUNTERS}))
+                    continue
+                if any(getattr(row, f) != getattr(board, f) for f in COUNTERS):
+                    for field in COUNTERS:
+                        setattr(row, field, getattr(board, field))
+                    to_update.append(row)
+
+            if not dry_run:
+                BoardStats.objects.bulk_create(to_create)
+                BoardStats.objects.bulk_update(to_update, COUNTERS)
+
+        return len(to_create) + len(to_update)
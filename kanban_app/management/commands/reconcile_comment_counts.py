@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Q
+from kanban_app import stats
+from kanban_app.models import Ticket
+
+
+class Command(BaseCommand):
+    """
+    Recounts the comments of all tickets and fixes the comments_count columns that drifted.
+
+    The tickets are processed in chunks ordered by their primary key, every chunk in its own
+    transaction. The drifted tickets are recounted with a single UPDATE statement per chunk,
+    so a comment, that is added meanwhile, is never lost.
+    """
+
+    help = "Reconciles the denormalized comments_count of the tickets with their comments."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000,
+                            help="Amount of tickets that are checked per transaction.")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Only report the drifted tickets without changing them.")
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        dry_run = options["dry_run"]
+        last_pk = 0
+        checked = fixed = 0
+
+        while True:
+            ids = list(Ticket.objects.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:chunk_size])
+            if not ids:
+                break
+            last_pk = ids[-1]
+            checked += len(ids)
+            fixed += self.reconcile_chunk(ids, dry_run)
+
+        action = "Found" if dry_run else "Fixed"
+        self.stdout.write(f"Checked {checked} tickets. {action} {fixed} drifted comment counts.")
+
+    def reconcile_chunk(self, ids, dry_run):
+        """Recounts the comments of the tickets in the chunk, whose column differs from the real count."""
+
+        with transaction.atomic():
+            drifted = list(Ticket.objects
+                           .filter(pk__in=ids)
+                           .annotate(actual=Count("comments"))
+                           .filter(~Q(comments_count=F("actual")))
+                           .values_list("pk", flat=True))
+            if drifted and not dry_run:
+                stats.refresh_comments_count(drifted)
+        return len(drifted)
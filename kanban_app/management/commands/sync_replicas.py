@@ -0,0 +1,33 @@
+import sqlite3
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    """
+    Copies the primary SQLite database to the read replicas of settings.DATABASE_REPLICAS.
+
+    Every replica is overwritten in place with the online backup of SQLite, so the copy is
+    consistent while the primary is written to, and open connections of the replica see the
+    new data with their next query. Run it regularly (e.g. every few seconds) to keep the lag
+    of the replicas below KANBAN_REPLICA_STICKY_SECONDS.
+    """
+
+    help = "Copies the primary SQLite database to the read replicas."
+
+    def handle(self, *args, **options):
+        replicas = getattr(settings, "DATABASE_REPLICAS", [])
+        if not replicas:
+            raise CommandError("No replicas configured, set KANBAN_DB_REPLICAS.")
+        for alias in [DEFAULT_DB_ALIAS, *replicas]:
+            if connections[alias].vendor != "sqlite":
+                raise CommandError(f"{alias} isn't an SQLite database, replicate it with the tools of the database.")
+
+        with sqlite3.connect(settings.DATABASES[DEFAULT_DB_ALIAS]["NAME"]) as source:
+            for alias in replicas:
+                with sqlite3.connect(settings.DATABASES[alias]["NAME"]) as target:
+                    source.backup(target)
+                target.close()
+                self.stdout.write(f"Copied the primary to {alias}.")
+        source.close()
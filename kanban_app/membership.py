@@ -0,0 +1,147 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from kanban_app.models import Board
+
+
+CACHE_KEY = "kanban:board-access:{}"
+
+
+class BoardAccess:
+    """The owner and the members of a single board."""
+
+    __slots__ = ("owner_id", "member_ids")
+
+    def __init__(self, owner_id, member_ids):
+        self.owner_id = owner_id
+        self.member_ids = frozenset(member_ids)
+
+    def is_member(self, user_id):
+        """Returns True, if the user is a member of the board."""
+
+        return user_id in self.member_ids
+
+    def is_owner_or_member(self, user_id):
+        """Returns True, if the user is the owner or a member of the board."""
+
+        return user_id == self.owner_id or user_id in self.member_ids
+
+
+def cache_timeout():
+    """Returns for how many seconds the access of a board is cached across requests. 0 disables it."""
+
+    return getattr(settings, "KANBAN_MEMBERSHIP_CACHE_TIMEOUT", 0)
+
+
+def load_board_access(board_ids):
+    """
+    Loads the owner and the members of the given boards with a single query.
+
+    Returns a dict of board ids and BoardAccess instances. Boards that don't exist are missing.
+    """
+
+    return _build_access(Board.objects.filter(pk__in=board_ids).values_list("pk", "owner_id", "members__id"))
+
+
+async def aload_board_access(board_ids):
+    """Async variant of load_board_access()."""
+
+    return _build_access([row async for row in Board.objects.filter(pk__in=board_ids)
+                          .values_list("pk", "owner_id", "members__id")])
+
+
+def _build_access(rows):
+    """Groups (board id, owner id, member id) rows into BoardAccess instances."""
+
+    boards = {}
+    for board_id, owner_id, member_id in rows:
+        owner, members = boards.setdefault(board_id, (owner_id, []))
+        if member_id is not None:
+            members.append(member_id)
+    return {board_id: BoardAccess(owner, members) for board_id, (owner, members) in boards.items()}
+
+
+def _request_memo(request):
+    """Returns the dict that memoizes the board access for the duration of the request."""
+
+    if request is None:
+        return {}
+    request = getattr(request, "_request", request)
+    memo = getattr(request, "_board_access", None)
+    if memo is None:
+        memo = request._board_access = {}
+    return memo
+
+
+def prefetch_board_access(request, board_ids):
+    """
+    Resolves the access of several boards at once.
+
+    Boards that are neither memoized in the request nor cached are loaded with one query.
+    Returns a dict of board ids and BoardAccess instances.
+    """
+
+    memo = _request_memo(request)
+    missing = {int(board_id) for board_id in board_ids} - memo.keys()
+    timeout = cache_timeout()
+
+    if missing and timeout:
+        cached = cache.get_many([CACHE_KEY.format(board_id) for board_id in missing])
+        for board_id in list(missing):
+            access = cached.get(CACHE_KEY.format(board_id))
+            if access is not None:
+                memo[board_id] = access
+                missing.discard(board_id)
+
+    if missing:
+        loaded = load_board_access(missing)
+        memo.update(loaded)
+        if timeout and loaded:
+            cache.set_many({CACHE_KEY.format(board_id): access for board_id, access in loaded.items()},
+                           timeout)
+        for board_id in missing - loaded.keys():
+            memo[board_id] = None
+
+    return {int(board_id): memo[int(board_id)] for board_id in board_ids}
+
+
+def get_board_access(request, board_id):
+    """Returns the BoardAccess of the board or None, if the board doesn't exist."""
+
+    return prefetch_board_access(request, [board_id])[int(board_id)]
+
+
+async def aget_board_access(request, board_id):
+    """Async variant of get_board_access() for the async views."""
+
+    memo = _request_memo(request)
+    board_id = int(board_id)
+    if board_id in memo:
+        return memo[board_id]
+
+    timeout = cache_timeout()
+    key = CACHE_KEY.format(board_id)
+    access = await cache.aget(key) if timeout else None
+    if access is None:
+        access = (await aload_board_access([board_id])).get(board_id)
+        if timeout and access is not None:
+            await cache.aset(key, access, timeout)
+
+    memo[board_id] = access
+    return access
+
+
+def invalidate_board_access(board_ids):
+    """
+    Removes the cached access of the given boards.
+
+    The keys are deleted right away and once more after the transaction was committed,
+    so a concurrent request can't cache the old members in between.
+    """
+
+    if not cache_timeout():
+        return
+    keys = [CACHE_KEY.format(board_id) for board_id in board_ids]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,52 @@
+# Generated by Django 6.0 on 2026-10-18 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def create_board_stats(apps, schema_editor):
+    """Creates the statistics for all existing boards."""
+
+    Board = apps.get_model("kanban_app", "Board")
+    BoardStats = apps.get_model("kanban_app", "BoardStats")
+
+    rows = []
+    boards = Board.objects.annotate(
+        ticket_count=Count("tickets"),
+        tasks_to_do_count=Count("tickets", filter=Q(tickets__status="to-do")),
+        tasks_high_prio_count=Count("tickets", filter=Q(tickets__priority="high")),
+    )
+    member_counts = dict(Board.members.through.objects.order_by().values_list("board_id")
+                         .annotate(count=Count("pk")))
+    for board in boards.iterator(chunk_size=1000):
+        rows.append(BoardStats(
+            board_id=board.pk,
+            member_count=member_counts.get(board.pk, 0),
+            ticket_count=board.ticket_count,
+            tasks_to_do_count=board.tasks_to_do_count,
+            tasks_high_prio_count=board.tasks_high_prio_count,
+        ))
+    BoardStats.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoardStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('member_count', models.PositiveIntegerField(default=0)),
+                ('ticket_count', models.PositiveIntegerField(default=0)),
+                ('tasks_to_do_count', models.PositiveIntegerField(default=0)),
+                ('tasks_high_prio_count', models.PositiveIntegerField(default=0)),
+                ('board', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='kanban_app.board')),
+            ],
+        ),
+        migrations.RunPython(create_board_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 10:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban_app', '0003_ticket_comment_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='boardstats',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='boardstats',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-18 17:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban_app', '0004_boardstats_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='boardstats',
+            name='changes_floor',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='BoardChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('board', 'board'), ('task', 'task'), ('comment', 'comment')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('action', models.CharField(choices=[('upsert', 'upsert'), ('delete', 'delete')], max_length=10)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='kanban_app.board')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['board', 'id'], name='boardchange_board_id_idx'), models.Index(fields=['board', 'kind', 'object_id'], name='boardchange_object_idx'), models.Index(fields=['created_at'], name='boardchange_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 6.0 on 2026-10-18 14:40
+
+from django.db import migrations
+
+
+CREATE = [
+    # The rowid of a ticket is 2 * id and of a comment 2 * id + 1, so the triggers can
+    # update and delete single rows by rowid instead of scanning the table. The update
+    # triggers only reindex a row, if one of its indexed columns changed.
+    '''CREATE VIRTUAL TABLE "kanban_app_search" USING fts5(
+        title, body, ticket_id UNINDEXED, tokenize = 'unicode61 remove_diacritics 2'
+    );''',
+    '''CREATE TRIGGER "kanban_app_search_ticket_insert" AFTER INSERT ON "kanban_app_ticket" BEGIN
+        INSERT INTO "kanban_app_search" (rowid, title, body, ticket_id)
+        VALUES (2 * new."id", new."title", new."description", new."id");
+    END;''',
+    '''CREATE TRIGGER "kanban_app_search_ticket_update" AFTER UPDATE OF "title", "description" ON "kanban_app_ticket"
+    WHEN old."title" IS NOT new."title" OR old."description" IS NOT new."description" BEGIN
+        DELETE FROM "kanban_app_search" WHERE rowid = 2 * old."id";
+        INSERT INTO "kanban_app_search" (rowid, title, body, ticket_id)
+        VALUES (2 * new."id", new."title", new."description", new."id");
+    END;''',
+    '''CREATE TRIGGER "kanban_app_search_ticket_delete" AFTER DELETE ON "kanban_app_ticket" BEGIN
+        DELETE FROM "kanban_app_search" WHERE rowid = 2 * old."id";
+    END;''',
+    '''CREATE TRIGGER "kanban_app_search_comment_insert" AFTER INSERT ON "kanban_app_comment" BEGIN
+        INSERT INTO "kanban_app_search" (rowid, title, body, ticket_id)
+        VALUES (2 * new."id" + 1, '', new."content", new."ticket_id");
+    END;''',
+    '''CREATE TRIGGER "kanban_app_search_comment_update" AFTER UPDATE OF "content", "ticket_id" ON "kanban_app_comment"
+    WHEN old."content" IS NOT new."content" OR old."ticket_id" IS NOT new."ticket_id" BEGIN
+        DELETE FROM "kanban_app_search" WHERE rowid = 2 * old."id" + 1;
+        INSERT INTO "kanban_app_search" (rowid, title, body, ticket_id)
+        VALUES (2 * new."id" + 1, '', new."content", new."ticket_id");
+    END;''',
+    '''CREATE TRIGGER "kanban_app_search_comment_delete" AFTER DELETE ON "kanban_app_comment" BEGIN
+        DELETE FROM "kanban_app_search" WHERE rowid = 2 * old."id" + 1;
+    END;''',
+    '''INSERT INTO "kanban_app_search" (rowid, title, body, ticket_id)
+        SELECT 2 * "id", "title", "description", "id" FROM "kanban_app_ticket";''',
+    '''INSERT INTO "kanban_app_search" (rowid, title, body, ticket_id)
+        SELECT 2 * "id" + 1, '', "content", "ticket_id" FROM "kanban_app_comment";''',
+]
+
+DROP = [
+    'DROP TRIGGER IF EXISTS "kanban_app_search_comment_delete";',
+    'DROP TRIGGER IF EXISTS "kanban_app_search_comment_update";',
+    'DROP TRIGGER IF EXISTS "kanban_app_search_comment_insert";',
+    'DROP TRIGGER IF EXISTS "kanban_app_search_ticket_delete";',
+    'DROP TRIGGER IF EXISTS "kanban_app_search_ticket_update";',
+    'DROP TRIGGER IF EXISTS "kanban_app_search_ticket_insert";',
+    'DROP TABLE IF EXISTS "kanban_app_search";',
+]
+
+
+class Migration(migrations.Migration):
+    """
+    Adds the full-text index of the tickets and comments, an SQLite FTS5 table.
+
+    Triggers keep it in sync with every write, including bulk_create(), update() and the
+    cascades of deleted boards. The existing tickets and comments are indexed right away.
+    """
+
+    dependencies = [
+        ('kanban_app', '0005_boardchange'),
+    ]
+
+    operations = [
+        migrations.RunSQL(sql=CREATE, reverse_sql=DROP),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 6.0 on 2026-10-18 18:10
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+# Adding a NOT NULL column makes SQLite rebuild the ticket table, wich drops the triggers
+# of the search index on it (see 0006_search_index). They are created again and the index
+# is rebuilt, so the changes of the tickets while the triggers were missing are indexed too.
+TICKET_TRIGGERS = [
+    'DROP TRIGGER IF EXISTS "kanban_app_search_ticket_insert";',
+    'DROP TRIGGER IF EXISTS "kanban_app_search_ticket_update";',
+    'DROP TRIGGER IF EXISTS "kanban_app_search_ticket_delete";',
+    '''CREATE TRIGGER "kanban_app_search_ticket_insert" AFTER INSERT ON "kanban_app_ticket" BEGIN
+        INSERT INTO "kanban_app_search" (rowid, title, body, ticket_id)
+        VALUES (2 * new."id", new."title", new."description", new."id");
+    END;''',
+    '''CREATE TRIGGER "kanban_app_search_ticket_update" AFTER UPDATE OF "title", "description" ON "kanban_app_ticket"
+    WHEN old."title" IS NOT new."title" OR old."description" IS NOT new."description" BEGIN
+        DELETE FROM "kanban_app_search" WHERE rowid = 2 * old."id";
+        INSERT INTO "kanban_app_search" (rowid, title, body, ticket_id)
+        VALUES (2 * new."id", new."title", new."description", new."id");
+    END;''',
+    '''CREATE TRIGGER "kanban_app_search_ticket_delete" AFTER DELETE ON "kanban_app_ticket" BEGIN
+        DELETE FROM "kanban_app_search" WHERE rowid = 2 * old."id";
+    END;''',
+]
+
+# A copy of kanban_app.search.REBUILD_SQL at the time of this migration, so later changes of the
+# search module can't change what the migration does.
+REBUILD_SQL = [
+    'DELETE FROM "kanban_app_search";',
+    '''INSERT INTO "kanban_app_search" (rowid, title, body, ticket_id)
+        SELECT 2 * "id", "title", "description", "id" FROM "kanban_app_ticket";''',
+    '''INSERT INTO "kanban_app_search" (rowid, title, body, ticket_id)
+        SELECT 2 * "id" + 1, '', "content", "ticket_id" FROM "kanban_app_comment";''',
+    '''INSERT INTO "kanban_app_search" ("kanban_app_search") VALUES ('optimize');''',
+]
+
+
+def count_comments(apps, schema_editor):
+    """Fills the new column of the existing tickets with a single UPDATE statement."""
+
+    Ticket = apps.get_model("kanban_app", "Ticket")
+    Comment = apps.get_model("kanban_app", "Comment")
+    comments = (Comment.objects
+                .filter(ticket_id=OuterRef("pk"))
+                .order_by()
+                .values("ticket_id")
+                .annotate(count=Count("pk"))
+                .values("count"))
+    Ticket.objects.update(comments_count=Coalesce(Subquery(comments), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban_app', '0006_search_index'),
+    ]
+
+    operations = [
+        # Removing the column on the way back rebuilds the table again, this restores the triggers afterwards.
+        migrations.RunSQL(migrations.RunSQL.noop, reverse_sql=TICKET_TRIGGERS + REBUILD_SQL),
+        migrations.AddField(
+            model_name='ticket',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunSQL(TICKET_TRIGGERS + REBUILD_SQL, reverse_sql=migrations.RunSQL.noop),
+        migrations.RunPython(count_comments, migrations.RunPython.noop),
+    ]
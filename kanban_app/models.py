@@ -1,14 +1,58 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 # Create your models here.
 
 
+class BoardQuerySet(models.QuerySet):
+    """Reusable query building blocks for the Board model."""
+
+    def for_user(self, user):
+        """
+        Returns the boards where the user is the owner or a member of.
+
+        The membership is resolved with a subquery on the through table instead of a join,
+        so every board appears only once and no distinct() is needed.
+        """
+
+        memberships = Board.members.through.objects.filter(user_id=user.pk).values("board_id")
+        return self.filter(Q(owner=user) | Q(pk__in=memberships))
+
+    def with_counts(self):
+        """
+        Annotates every board with the counters used by the board list:
+            - member_count through a correlated subquery on the through table
+            - ticket_count, tasks_to_do_count and tasks_high_prio_count through conditional
+              aggregates over a single join on the tickets
+
+        Only one to-many relation is joined, so the ticket counts are not multiplied by the
+        amount of members.
+        """
+
+        member_count = (Board.members.through.objects
+                        .filter(board_id=OuterRef("pk"))
+                        .order_by()
+                        .values("board_id")
+                        .annotate(count=Count("pk"))
+                        .values("count"))
+        return self.annotate(
+            member_count=Coalesce(Subquery(member_count), 0),
+            ticket_count=Count("tickets"),
+            tasks_to_do_count=Count("tickets", filter=Q(tickets__status="to-do")),
+            tasks_high_prio_count=Count("tickets", filter=Q(tickets__priority="high")),
+        )
+
+
 class Board(models.Model):
     title = models.CharField(max_length=100)
     members = models.ManyToManyField(User, related_name="members_board", blank=True)
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="owner_board")
 
+    objects = BoardQuerySet.as_manager()
+
     def __str__(self):
         return self.title
     
@@ -36,17 +80,121 @@ class Ticket(models.Model):
     reviewer = models.ForeignKey(User, on_delete=models.CASCADE, related_name="ticket_reviewer", null=True, blank=True)
     due_date = models.DateField()
     creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name="ticket_creator")
+    # Maintained by the comment signals with F() updates, see stats.add_comments().
+    comments_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["board", "status"], name="ticket_board_status_idx"),
+            models.Index(fields=["board", "priority"], name="ticket_board_priority_idx"),
+            models.Index(fields=["assignee", "due_date", "id"], name="ticket_assignee_due_idx"),
+            models.Index(fields=["reviewer", "due_date", "id"], name="ticket_reviewer_due_idx"),
+        ]
 
     def __str__(self):
         return self.title
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remembers the values the ticket was loaded with, so the signal handlers can tell
+        which counters of the board statistics have to change on save.
+        """
+
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Saves the ticket and updates the board statistics in the same transaction.
+
+        An existing ticket is saved without its comments_count, so saving a ticket, that was
+        loaded before a comment was added or deleted, doesn't overwrite the counter.
+        """
+
+        if not self._state.adding and kwargs.get("update_fields") is None and not args:
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [field.attname for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.attname not in deferred
+                                       and field.name != "comments_count"]
+        with transaction.atomic():
+            super().save(*args, **kwargs)
     
 
+class BoardStats(models.Model):
+    """
+    Denormalized counters of a board, that are maintained on every write, so the board list
+    doesn't have to aggregate over the tickets on every read.
+
+    The version is incremented on every change of the board, its members, its tickets or their
+    comments and is used as the ETag of the board.
+    """
+
+    board = models.OneToOneField(Board, on_delete=models.CASCADE, related_name="stats")
+    member_count = models.PositiveIntegerField(default=0)
+    ticket_count = models.PositiveIntegerField(default=0)
+    tasks_to_do_count = models.PositiveIntegerField(default=0)
+    tasks_high_prio_count = models.PositiveIntegerField(default=0)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+    changes_floor = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Stats of {self.board_id}"
+
+
+class BoardChange(models.Model):
+    """
+    Append-only log of the changes of a board, that lets clients sync only what changed.
+
+    Every entry marks a board, task or comment as upserted or deleted. The id of the entry is
+    the cursor of the clients. The current state of upserted objects is loaded when the log
+    is read, so the entries don't store any data of the objects.
+
+    Old entries are removed by the compact_board_changes command, wich raises the changes_floor
+    of the board statistics. Cursors below the floor can't be synced anymore.
+    """
+
+    kind_choices = [
+        ("board", "board"),
+        ("task", "task"),
+        ("comment", "comment"),
+    ]
+
+    action_choices = [
+        ("upsert", "upsert"),
+        ("delete", "delete"),
+    ]
+
+    board = models.ForeignKey(Board, on_delete=models.CASCADE, related_name="changes")
+    kind = models.CharField(max_length=10, choices=kind_choices)
+    object_id = models.PositiveBigIntegerField()
+    action = models.CharField(max_length=10, choices=action_choices)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["board", "id"], name="boardchange_board_id_idx"),
+            models.Index(fields=["board", "kind", "object_id"], name="boardchange_object_idx"),
+            models.Index(fields=["created_at"], name="boardchange_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.kind} {self.object_id} of {self.board_id}"
+
+
 class Comment(models.Model):
     content = models.CharField(max_length=250)
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="comments")
     created_at = models.DateTimeField(auto_now_add=True)
     ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="comments")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["ticket", "created_at", "id"], name="comment_ticket_created_idx"),
+        ]
+
     def __str__(self):
         return self.content
 
@@ -0,0 +1,131 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from kanban_app import membership
+from kanban_app.models import Ticket
+
+
+GENERATION_KEY = "kanban:response-generation:{}"
+
+
+def cache_timeout():
+    """Returns for how many seconds the responses of the cached views are kept. 0 disables the cache."""
+
+    return getattr(settings, "KANBAN_RESPONSE_CACHE_TIMEOUT", 0)
+
+
+def new_generation():
+    # A generation, that was evicted from the cache, starts again at a value that wasn't used before.
+    return time.time_ns()
+
+
+def get_generation(user_id):
+    """Returns the current generation of the cached responses of the user."""
+
+    key = GENERATION_KEY.format(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, new_generation(), None)
+        generation = cache.get(key)
+    return generation
+
+
+async def aget_generation(user_id):
+    """Async variant of get_generation()."""
+
+    key = GENERATION_KEY.format(user_id)
+    generation = await cache.aget(key)
+    if generation is None:
+        await cache.aadd(key, new_generation(), None)
+        generation = await cache.aget(key)
+    return generation
+
+
+def bump_generations(user_ids):
+    """Increments the generations of the users. Users without a generation have no cached responses."""
+
+    for user_id in user_ids:
+        try:
+            cache.incr(GENERATION_KEY.format(user_id))
+        except ValueError:
+            pass
+
+
+def invalidate_users(user_ids):
+    """
+    Makes the cached responses of the given users unreachable.
+
+    The generations are bumped right away and once more after the transaction was committed,
+    so a concurrent request can't cache the old state under the new generation in between.
+    """
+
+    if not cache_timeout():
+        return
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if user_ids:
+        bump_generations(user_ids)
+        transaction.on_commit(lambda: bump_generations(user_ids))
+
+
+def invalidate_boards(board_ids, user_ids=()):
+    """Makes the cached responses of the owners and members of the boards and of the given users unreachable."""
+
+    if not cache_timeout():
+        return
+    users = set(user_ids)
+    for access in membership.prefetch_board_access(None, set(board_ids)).values():
+        if access is not None:
+            users.add(access.owner_id)
+            users.update(access.member_ids)
+    invalidate_users(users)
+
+
+def ticket_scope(tickets):
+    """
+    Returns the ids of the boards and users, whose cached lists show the tickets.
+
+    Next to the current board, assignee and reviewer these are the ones the tickets were loaded
+    with, so a ticket also disappears from the lists it was moved out of.
+    """
+
+    board_ids, user_ids = set(), set()
+    for ticket in tickets:
+        loaded = getattr(ticket, "_loaded_values", None) or {}
+        board_ids.update([ticket.board_id, loaded.get("board_id")])
+        user_ids.update([ticket.assignee_id, ticket.reviewer_id, loaded.get("assignee_id"), loaded.get("reviewer_id")])
+    return ({board_id for board_id in board_ids if isinstance(board_id, int)},
+            {user_id for user_id in user_ids if isinstance(user_id, int)})
+
+
+def invalidate_tickets(tickets):
+    """Makes the cached lists, that show the given tickets, unreachable."""
+
+    if not cache_timeout():
+        return
+    board_ids, user_ids = ticket_scope(tickets)
+    invalidate_boards(board_ids, user_ids)
+
+
+def invalidate_ticket_users(ticket_id):
+    """Makes the cached task lists of the assignee and the reviewer of the ticket unreachable."""
+
+    if not cache_timeout():
+        return
+    invalidate_users(Ticket.objects.filter(pk=ticket_id).values_list("assignee_id", "reviewer_id").first() or [])
+
+
+def invalidate_user_tickets(user_id):
+    """
+    Makes the cached task lists, that show the user as assignee or reviewer, unreachable.
+
+    These are the lists of the assignees and reviewers of all tickets of the user.
+    """
+
+    if not cache_timeout():
+        return
+    rows = (Ticket.objects
+            .filter(Q(assignee_id=user_id) | Q(reviewer_id=user_id))
+            .values_list("assignee_id", "reviewer_id"))
+    invalidate_users({pk for row in rows for pk in row})
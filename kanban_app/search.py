@@ -0,0 +1,83 @@
+import re
+from django.db import connection
+from kanban_app.models import Board
+
+
+TABLE = "kanban_app_search"
+
+# Weights of the title and body columns for bm25(), a match in the title of a ticket counts more.
+TITLE_WEIGHT = 4.0
+BODY_WEIGHT = 1.0
+
+MAX_TERMS = 10
+
+SEARCH_SQL = f'''
+    SELECT s.rowid, t."id", t."board_id", t."title",
+           snippet("{TABLE}", -1, '', '', '…', 16),
+           bm25("{TABLE}", {TITLE_WEIGHT}, {BODY_WEIGHT}) AS rank
+    FROM "{TABLE}" s
+    JOIN "kanban_app_ticket" t ON t."id" = s."ticket_id"
+    WHERE "{TABLE}" MATCH %s AND t."board_id" IN ({{boards}})
+    ORDER BY rank, s.rowid
+    LIMIT %s OFFSET %s
+'''
+
+REBUILD_SQL = [
+    f'DELETE FROM "{TABLE}";',
+    f'''INSERT INTO "{TABLE}" (rowid, title, body, ticket_id)
+        SELECT 2 * "id", "title", "description", "id" FROM "kanban_app_ticket";''',
+    f'''INSERT INTO "{TABLE}" (rowid, title, body, ticket_id)
+        SELECT 2 * "id" + 1, '', "content", "ticket_id" FROM "kanban_app_comment";''',
+    f'''INSERT INTO "{TABLE}" ("{TABLE}") VALUES ('optimize');''',
+]
+
+
+def match_expression(text):
+    """
+    Turns the search text of a user into an FTS5 query.
+
+    Every word becomes a quoted term, so operators and special characters of the FTS5 syntax
+    can't be injected, and the last word matches as a prefix, so results show up while typing.
+    All words have to match. Returns None, if the text doesn't contain any word.
+    """
+
+    terms = re.findall(r"\w+", text)[:MAX_TERMS]
+    if not terms:
+        return None
+    return " ".join(f'"{term}"' for term in terms) + "*"
+
+
+def search(user, text, offset, limit):
+    """
+    Returns the tickets and comments of the boards of the user, that match the text.
+
+    The results are ordered by their bm25 rank. The boards are filtered with the subquery of
+    Board.objects.for_user(), so the membership check is part of the single search query.
+    Every result is a dict with type, id, task_id, board_id, title and snippet.
+    """
+
+    expression = match_expression(text)
+    if expression is None:
+        return []
+
+    boards_sql, boards_params = Board.objects.for_user(user).values("pk").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(SEARCH_SQL.format(boards=boards_sql), [expression, *boards_params, limit, offset])
+        rows = cursor.fetchall()
+
+    return [{
+        "type": "comment" if rowid % 2 else "task",
+        "id": rowid // 2,
+        "task_id": task_id,
+        "board_id": board_id,
+        "title": title,
+        "snippet": snippet,
+    } for rowid, task_id, board_id, title, snippet, rank in rows]
+
+
+def rebuild():
+    """Fills the search index again from the tickets and comments and optimizes it."""
+
+    with connection.cursor() as cursor:
+        for sql in REBUILD_SQL:
+            cursor.execute(sql)
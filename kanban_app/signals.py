@@ -0,0 +1,352 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from kanban_app.models import Board, BoardStats, Ticket, Comment
+from kanban_app import changes, events, membership, response_cache, stats
+from kanban_app.user_search import prefix_index
+
+
+@receiver(post_save, sender=Board)
+def create_board_stats(sender, instance, created, **kwargs):
+    """Creates the statistics row of a new board or marks an existing board as changed."""
+
+    if created:
+        BoardStats.objects.create(board=instance)
+    else:
+        stats.bump_versions([instance.pk])
+
+
+@receiver(post_save, sender=Ticket)
+def update_stats_on_ticket_save(sender, instance, created, **kwargs):
+    """Updates the board statistics after a ticket was created or changed."""
+
+    if created:
+        stats.record_tickets_created([instance])
+    else:
+        stats.record_tickets_changed([instance])
+    stats.remember_ticket_values(instance)
+
+
+@receiver(post_delete, sender=Ticket)
+def update_stats_on_ticket_delete(sender, instance, origin=None, **kwargs):
+    """
+    Updates the board statistics after a ticket was deleted.
+
+    Nothing has to be done, if the ticket was deleted because its board was deleted.
+    """
+
+    if isinstance(origin, Board):
+        return
+    stats.record_tickets_deleted([instance])
+
+
+@receiver(post_save, sender=Comment)
+def update_stats_on_comment_save(sender, instance, created, **kwargs):
+    """Increments the comments_count of the ticket of a new comment and marks the board of the comment as changed."""
+
+    if created:
+        stats.add_comments(instance.ticket_id)
+    else:
+        stats.bump_version_of_ticket(instance.ticket_id)
+
+
+@receiver(post_delete, sender=Comment)
+def update_stats_on_comment_delete(sender, instance, origin=None, **kwargs):
+    """
+    Decrements the comments_count of the ticket of a deleted comment and marks its board as changed.
+
+    This also covers the comments, that are deleted together with their author. If the comment was
+    deleted together with its ticket or board, the counter is deleted with the ticket anyway.
+    """
+
+    if isinstance(origin, (Board, Ticket)):
+        return
+    stats.add_comments(instance.ticket_id, amount=-1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def record_task_change_on_comment_change(sender, instance, created=False, origin=None, **kwargs):
+    """
+    Writes the ticket of an added or deleted comment to the change log, because its comments_count changed.
+
+    Comments, that are deleted together with their ticket or board, are skipped.
+    """
+
+    if kwargs["signal"] is post_save and not created:
+        return
+    if isinstance(origin, (Board, Ticket)):
+        return
+    changes.record_ticket(instance.ticket_id)
+
+
+@receiver(m2m_changed, sender=Board.members.through)
+def update_stats_on_members_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keeps the member count of the board statistics in sync.
+
+    Django only passes the newly added ids on post_add, so they can be added directly.
+    Removals are recounted, because the given ids don't have to be members at all.
+    The signal is sent for both sides of the relation, so for user.members_board the
+    instance is the user and the pk_set contains board ids.
+    """
+
+    if action == "pre_clear" and reverse:
+        instance._cleared_board_ids = list(
+            sender.objects.filter(user_id=instance.pk).values_list("board_id", flat=True))
+        return
+
+    if action == "post_add":
+        if reverse:
+            stats.add_members(pk_set)
+        else:
+            stats.add_members([instance.pk], amount=len(pk_set))
+    elif action == "post_remove":
+        stats.refresh_member_count(pk_set if reverse else [instance.pk])
+    elif action == "post_clear":
+        stats.refresh_member_count(instance._cleared_board_ids if reverse else [instance.pk])
+
+
+@receiver(pre_delete, sender=User)
+def remember_boards_of_user(sender, instance, **kwargs):
+    """Stores the boards of a user that gets deleted, because the memberships are removed silently."""
+
+    instance._member_board_ids = list(
+        Board.members.through.objects.filter(user_id=instance.pk).values_list("board_id", flat=True))
+
+
+@receiver(post_delete, sender=User)
+def update_stats_on_user_delete(sender, instance, **kwargs):
+    """Recounts the members of the boards the deleted user was a member of."""
+
+    board_ids = getattr(instance, "_member_board_ids", None)
+    if board_ids:
+        stats.refresh_member_count(board_ids)
+
+
+@receiver(m2m_changed, sender=Board.members.through)
+def invalidate_access_on_members_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Removes the cached members of the boards, whose members changed."""
+
+    if action not in ["post_add", "post_remove", "post_clear"]:
+        return
+    if not reverse:
+        membership.invalidate_board_access([instance.pk])
+    elif action == "post_clear":
+        membership.invalidate_board_access(instance._cleared_board_ids)
+    else:
+        membership.invalidate_board_access(pk_set)
+
+
+@receiver(post_save, sender=Board)
+@receiver(post_delete, sender=Board)
+def invalidate_access_on_board_change(sender, instance, **kwargs):
+    """Removes the cached access of a board, that was saved or deleted, because the owner may have changed."""
+
+    membership.invalidate_board_access([instance.pk])
+
+
+@receiver(post_delete, sender=User)
+def invalidate_access_on_user_delete(sender, instance, **kwargs):
+    """Removes the cached members of the boards the deleted user was a member of."""
+
+    membership.invalidate_board_access(getattr(instance, "_member_board_ids", []))
+
+
+@receiver(post_save, sender=Ticket)
+def publish_ticket_save(sender, instance, created, **kwargs):
+    """Publishes a created or changed ticket to the event stream of its board."""
+
+    events.publish_tickets([instance], "task.created" if created else "task.updated")
+
+
+@receiver(post_delete, sender=Ticket)
+def publish_ticket_delete(sender, instance, origin=None, **kwargs):
+    """Publishes a deleted ticket, unless it was deleted together with its board."""
+
+    if isinstance(origin, Board):
+        return
+    events.publish(instance.board_id, "task.deleted", {"id": instance.pk})
+
+
+@receiver(post_save, sender=Comment)
+def publish_comment_save(sender, instance, created, **kwargs):
+    """Publishes a created or changed comment."""
+
+    events.publish(instance.ticket.board_id, "comment.created" if created else "comment.updated",
+                   {"id": instance.pk, "task": instance.ticket_id})
+
+
+@receiver(post_delete, sender=Comment)
+def publish_comment_delete(sender, instance, origin=None, **kwargs):
+    """Publishes a deleted comment, unless it was deleted together with its ticket or board."""
+
+    if isinstance(origin, (Board, Ticket)):
+        return
+    board_id = Ticket.objects.filter(pk=instance.ticket_id).values_list("board_id", flat=True).first()
+    if board_id is not None:
+        events.publish(board_id, "comment.deleted", {"id": instance.pk, "task": instance.ticket_id})
+
+
+@receiver(m2m_changed, sender=Board.members.through)
+def publish_members_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Publishes added and removed members to the boards, whose members changed."""
+
+    if action not in ["post_add", "post_remove", "post_clear"]:
+        return
+    change = {"post_add": "added", "post_remove": "removed", "post_clear": "removed"}[action]
+    if not reverse:
+        user_ids = sorted(pk_set) if pk_set is not None else None
+        events.publish(instance.pk, "members.changed", {change: user_ids})
+        return
+    board_ids = instance._cleared_board_ids if action == "post_clear" else pk_set
+    for board_id in board_ids:
+        events.publish(board_id, "members.changed", {change: [instance.pk]})
+
+
+@receiver(post_save, sender=Board)
+def publish_board_save(sender, instance, created, **kwargs):
+    """Publishes a changed board."""
+
+    if not created:
+        events.publish(instance.pk, "board.updated", {"title": instance.title, "owner_id": instance.owner_id})
+
+
+@receiver(post_delete, sender=Board)
+def publish_board_delete(sender, instance, **kwargs):
+    """Publishes a deleted board, wich ends all of its event streams."""
+
+    events.publish(instance.pk, "board.deleted", {})
+
+
+@receiver(post_delete, sender=User)
+def publish_user_delete(sender, instance, **kwargs):
+    """Publishes the removed memberships of a deleted user."""
+
+    for board_id in getattr(instance, "_member_board_ids", []):
+        events.publish(board_id, "members.changed", {"removed": [instance.pk]})
+
+
+@receiver(post_save, sender=User)
+def update_prefix_index_on_user_save(sender, instance, **kwargs):
+    """Adds a new or changed user to the in-memory search index, if it's in use."""
+
+    prefix_index.update(instance)
+
+
+@receiver(post_delete, sender=User)
+def update_prefix_index_on_user_delete(sender, instance, **kwargs):
+    """Removes a deleted user from the in-memory search index."""
+
+    prefix_index.remove(instance.pk)
+
+
+@receiver(pre_save, sender=Ticket)
+def remember_response_scope_of_ticket(sender, instance, **kwargs):
+    """Stores the boards and users of a ticket before it's saved, while it still has the loaded values."""
+
+    if response_cache.cache_timeout():
+        instance._response_scope = response_cache.ticket_scope([instance])
+
+
+@receiver(post_save, sender=Ticket)
+def invalidate_responses_on_ticket_save(sender, instance, **kwargs):
+    """Invalidates the cached lists of the users of the board and of the old and new assignee and reviewer."""
+
+    scope = getattr(instance, "_response_scope", None)
+    if scope is not None:
+        board_ids, user_ids = scope
+        response_cache.invalidate_boards(board_ids, user_ids)
+
+
+@receiver(post_delete, sender=Ticket)
+def invalidate_responses_on_ticket_delete(sender, instance, origin=None, **kwargs):
+    """Invalidates the cached lists of a deleted ticket, unless its whole board was deleted."""
+
+    if isinstance(origin, Board):
+        return
+    response_cache.invalidate_tickets([instance])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_responses_on_comment_change(sender, instance, origin=None, **kwargs):
+    """Invalidates the task lists, that show the comment count of the ticket."""
+
+    if isinstance(origin, (Board, Ticket)):
+        return
+    response_cache.invalidate_ticket_users(instance.ticket_id)
+
+
+@receiver(m2m_changed, sender=Board.members.through)
+def invalidate_responses_on_members_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalidates the board lists of the added and removed members and of everybody else on the boards."""
+
+    if not response_cache.cache_timeout():
+        return
+    if action == "pre_clear" and not reverse:
+        instance._cleared_member_ids = list(
+            sender.objects.filter(board_id=instance.pk).values_list("user_id", flat=True))
+    elif action in ["post_add", "post_remove"]:
+        if reverse:
+            response_cache.invalidate_boards(pk_set, [instance.pk])
+        else:
+            response_cache.invalidate_boards([instance.pk], pk_set)
+    elif action == "post_clear":
+        if reverse:
+            response_cache.invalidate_boards(instance._cleared_board_ids, [instance.pk])
+        else:
+            response_cache.invalidate_boards([instance.pk], instance._cleared_member_ids)
+
+
+@receiver(post_save, sender=Board)
+@receiver(pre_delete, sender=Board)
+def invalidate_responses_on_board_change(sender, instance, **kwargs):
+    """
+    Invalidates the board lists of the owner and the members of a saved or deleted board.
+
+    A deleted board is handled before the deletion, while its members can still be loaded.
+    """
+
+    response_cache.invalidate_boards([instance.pk])
+
+
+# The fields of a user, that are shown in the boards and the cached task lists, see MemberSerializer.
+CACHED_USER_FIELDS = {"username", "email"}
+
+
+def shown_user_fields_changed(created, update_fields):
+    """Returns True, if a saved user may have changed one of the CACHED_USER_FIELDS."""
+
+    return not created and (update_fields is None or bool(CACHED_USER_FIELDS & set(update_fields)))
+
+
+@receiver(post_save, sender=User)
+def invalidate_responses_on_user_save(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Invalidates the task lists, that show a changed user as assignee or reviewer.
+
+    Saves, that only update other fields, like the last_login of a login, are skipped.
+    """
+
+    if shown_user_fields_changed(created, update_fields):
+        response_cache.invalidate_user_tickets(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def update_stats_on_user_save(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Marks the boards, that show a changed user, as changed, so their ETags change too.
+
+    Like for the response cache, saves of other fields are skipped.
+    """
+
+    if shown_user_fields_changed(created, update_fields):
+        stats.bump_versions_of_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_responses_on_user_delete(sender, instance, **kwargs):
+    """Invalidates the board lists of the boards the deleted user was a member of."""
+
+    response_cache.invalidate_boards(getattr(instance, "_member_board_ids", []))
@@ -0,0 +1,150 @@
+from collections import Counter, defaultdict
+from django.db.models import DEFERRED, Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from kanban_app.models import Board, BoardStats, Comment, Ticket
+
+
+TICKET_COUNTERS = ["ticket_count", "tasks_to_do_count", "tasks_high_prio_count"]
+
+
+def ticket_counters(status, priority):
+    """Returns the amount a ticket with the given status and priority adds to each counter."""
+
+    return Counter({
+        "ticket_count": 1,
+        "tasks_to_do_count": int(status == "to-do"),
+        "tasks_high_prio_count": int(priority == "high"),
+    })
+
+
+def version_changes():
+    """Returns the update arguments, that mark the statistics as changed."""
+
+    return {"version": F("version") + 1, "updated_at": timezone.now()}
+
+
+def apply_deltas(deltas):
+    """
+    Applies the counter changes to the statistics of the boards and bumps their version.
+
+    The deltas are a dict of board ids and Counters. Every board is updated with a single
+    UPDATE statement of F() expressions, so concurrent writes can't overwrite each other.
+    """
+
+    for board_id, delta in deltas.items():
+        changes = {field: F(field) + amount for field, amount in delta.items() if amount}
+        BoardStats.objects.filter(board_id=board_id).update(**changes, **version_changes())
+
+
+def bump_versions(board_ids):
+    """Marks the given boards as changed."""
+
+    BoardStats.objects.filter(board_id__in=board_ids).update(**version_changes())
+
+
+def bump_versions_of_user(user_id):
+    """Marks the boards, that show the user as owner, member, assignee or reviewer, as changed."""
+
+    boards = Board.objects.filter(
+        Q(owner=user_id) | Q(members=user_id) | Q(tickets__assignee=user_id) | Q(tickets__reviewer=user_id))
+    BoardStats.objects.filter(board__in=boards.values("pk")).update(**version_changes())
+
+
+def bump_version_of_ticket(ticket_id):
+    """Marks the board of the given ticket as changed."""
+
+    BoardStats.objects.filter(board__tickets=ticket_id).update(**version_changes())
+
+
+def add_comments(ticket_id, amount=1):
+    """
+    Changes the comments_count of the ticket by amount and marks its board as changed.
+
+    The counter is updated with an F() expression, so concurrent comments can't overwrite each other.
+    """
+
+    Ticket.objects.filter(pk=ticket_id).update(comments_count=F("comments_count") + amount)
+    bump_version_of_ticket(ticket_id)
+
+
+def refresh_comments_count(ticket_ids):
+    """Recounts the comments of the given tickets with a single UPDATE statement."""
+
+    comments = (Comment.objects
+                .filter(ticket_id=OuterRef("pk"))
+                .order_by()
+                .values("ticket_id")
+                .annotate(count=Count("pk"))
+                .values("count"))
+    Ticket.objects.filter(pk__in=ticket_ids).update(comments_count=Coalesce(Subquery(comments), 0))
+
+
+def record_tickets_created(tickets):
+    """Adds the given, newly created tickets to the statistics of their boards."""
+
+    deltas = defaultdict(Counter)
+    for ticket in tickets:
+        deltas[ticket.board_id].update(ticket_counters(ticket.status, ticket.priority))
+    apply_deltas(deltas)
+
+
+def record_tickets_deleted(tickets):
+    """Removes the given, deleted tickets from the statistics of their boards."""
+
+    deltas = defaultdict(Counter)
+    for ticket in tickets:
+        deltas[ticket.board_id].subtract(ticket_counters(ticket.status, ticket.priority))
+    apply_deltas(deltas)
+
+
+def record_tickets_changed(tickets):
+    """
+    Moves the counters of updated tickets from the values they were loaded with
+    to their current values.
+    """
+
+    deltas = defaultdict(Counter)
+    for ticket in tickets:
+        loaded = getattr(ticket, "_loaded_values", None)
+        if loaded is None or DEFERRED in (loaded.get("status"), loaded.get("priority")):
+            continue
+        old_board = loaded.get("board_id", ticket.board_id)
+        deltas[old_board].subtract(ticket_counters(loaded.get("status"), loaded.get("priority")))
+        deltas[ticket.board_id].update(ticket_counters(ticket.status, ticket.priority))
+    apply_deltas(deltas)
+
+
+def remember_ticket_values(ticket):
+    """
+    Stores the current counter relevant values as the new baseline of the ticket, together with
+    the assignee and reviewer for the response cache.
+    """
+
+    ticket._loaded_values = {
+        "board_id": ticket.board_id,
+        "status": ticket.status,
+        "priority": ticket.priority,
+        "assignee_id": ticket.assignee_id,
+        "reviewer_id": ticket.reviewer_id,
+    }
+
+
+def add_members(board_ids, amount=1):
+    """Increments the member count of the given boards."""
+
+    BoardStats.objects.filter(board_id__in=board_ids).update(
+        member_count=F("member_count") + amount, **version_changes())
+
+
+def refresh_member_count(board_ids):
+    """Recounts the members of the given boards with a single UPDATE statement."""
+
+    members = (Board.members.through.objects
+               .filter(board_id=OuterRef("board_id"))
+               .order_by()
+               .values("board_id")
+               .annotate(count=Count("pk"))
+               .values("count"))
+    BoardStats.objects.filter(board_id__in=board_ids).update(
+        member_count=Coalesce(Subquery(members), 0), **version_changes())
@@ -1,3 +1,834 @@
-from django.test import TestCase
+import asyncio
+import os
+import tempfile
+import time
+from datetime import date
+from unittest.mock import patch
+from io import StringIO
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, AsyncRequestFactory, TestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from kanban_app import changes, events, membership
+from kanban_app.api import async_views
+from kanban_app.models import Board, BoardChange, BoardStats, Ticket, Comment
+from kanban_app.user_search import prefix_index, search_users
 
-# Create your tests here.
+
+class KanbanTestCase(TestCase):
+    """Base class with a board of an owner and a member and helpers to create tickets and clients."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user("owner", "owner@example.com", "password")
+        self.member = User.objects.create_user("member", "member@example.com", "password")
+        self.board = Board.objects.create(title="Board", owner=self.owner)
+        self.board.members.add(self.owner, self.member)
+
+    def create_ticket(self, **kwargs):
+        values = {"board": self.board, "title": "Ticket", "description": "Description", "status": "to-do",
+                  "priority": "low", "due_date": date(2026, 1, 1), "creator": self.owner}
+        values.update(kwargs)
+        return Ticket.objects.create(**values)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def search(self, text):
+        response = self.client_for(self.owner).get("/api/search/", {"q": text})
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"]
+
+
+class BoardListTests(KanbanTestCase):
+    """The board list costs the same queries for any amount of boards and counts every row once."""
+
+    COUNTERS = ["member_count", "ticket_count", "tasks_to_do_count", "tasks_high_prio_count"]
+
+    def get_boards(self, user=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_for(user or self.member).get("/api/boards/")
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(queries)
+
+    def test_queries_do_not_grow_with_the_boards(self):
+        _, expected = self.get_boards()
+        for number in range(5):
+            board = Board.objects.create(title=f"Board {number}", owner=self.owner)
+            board.members.add(self.member)
+            self.create_ticket(board=board)
+
+        boards, count = self.get_boards()
+
+        self.assertEqual(len(boards), 6)
+        self.assertEqual(count, expected)
+
+    def test_counts_are_not_multiplied_by_the_joins(self):
+        self.board.members.add(User.objects.create_user("user", "user@example.com", "password"))
+        self.create_ticket(priority="high")
+        self.create_ticket(status="done")
+
+        boards, _ = self.get_boards(self.owner)
+
+        self.assertEqual(len(boards), 1)
+        self.assertEqual({name: boards[0][name] for name in self.COUNTERS},
+                         {"member_count": 3, "ticket_count": 2, "tasks_to_do_count": 1, "tasks_high_prio_count": 1})
+
+
+class BoardDetailTests(KanbanTestCase):
+    """The board detail costs the same queries for any amount of tickets."""
+
+    def get_board(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_for(self.member).get(f"/api/boards/{self.board.pk}/")
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(queries)
+
+    def test_queries_do_not_grow_with_the_tickets(self):
+        self.create_ticket(assignee=self.member, reviewer=self.owner)
+        _, expected = self.get_board()
+        for number in range(5):
+            ticket = self.create_ticket(title=f"Ticket {number}", assignee=self.owner, reviewer=self.member)
+            Comment.objects.create(ticket=ticket, author=self.member, content="Comment")
+
+        board, count = self.get_board()
+
+        self.assertEqual(count, expected)
+        self.assertEqual(len(board["tasks"]), 6)
+        self.assertEqual([task["comments_count"] for task in board["tasks"]], [0, 1, 1, 1, 1, 1])
+        self.assertEqual(board["tasks"][1]["reviewer"]["fullname"], "member")
+        self.assertEqual([member["id"] for member in board["members"]], [self.owner.pk, self.member.pk])
+
+
+class BoardStatsTests(KanbanTestCase):
+    """The statistics of a board always match the counts of its tickets and members."""
+
+    COUNTERS = ["member_count", "ticket_count", "tasks_to_do_count", "tasks_high_prio_count"]
+
+    def assertStatsMatchCounts(self, board=None):
+        board = board or self.board
+        stats = BoardStats.objects.get(board=board)
+        counted = Board.objects.with_counts().get(pk=board.pk)
+        self.assertEqual({name: getattr(stats, name) for name in self.COUNTERS},
+                         {name: getattr(counted, name) for name in self.COUNTERS})
+
+    def test_counters_follow_the_tickets(self):
+        ticket = self.create_ticket(priority="high")
+        self.create_ticket(status="done")
+        self.assertStatsMatchCounts()
+
+        ticket.status = "review"
+        ticket.priority = "low"
+        ticket.save()
+        self.assertStatsMatchCounts()
+
+        ticket.delete()
+        self.assertStatsMatchCounts()
+
+    def test_counters_follow_a_ticket_to_another_board(self):
+        other = Board.objects.create(title="Other", owner=self.owner)
+        ticket = self.create_ticket()
+
+        ticket.board = other
+        ticket.save()
+
+        self.assertStatsMatchCounts()
+        self.assertStatsMatchCounts(other)
+
+    def test_counters_follow_the_members(self):
+        user = User.objects.create_user("user", "user@example.com", "password")
+        self.board.members.add(user)
+        self.assertStatsMatchCounts()
+
+        self.board.members.remove(self.member)
+        self.assertStatsMatchCounts()
+
+        user.delete()
+        self.assertStatsMatchCounts()
+
+        self.board.members.clear()
+        self.assertStatsMatchCounts()
+
+    def test_changes_bump_the_version(self):
+        version = BoardStats.objects.get(board=self.board).version
+
+        self.create_ticket()
+
+        self.assertGreater(BoardStats.objects.get(board=self.board).version, version)
+
+
+class CommentsCountTests(KanbanTestCase):
+    """The comments_count of a ticket always matches the amount of its comments."""
+
+    def assertCommentsCount(self, ticket, expected):
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.comments_count, expected)
+        self.assertEqual(ticket.comments.count(), expected)
+
+    def test_counter_follows_the_comments(self):
+        ticket = self.create_ticket()
+        comment = Comment.objects.create(ticket=ticket, author=self.member, content="First")
+        Comment.objects.create(ticket=ticket, author=self.owner, content="Second")
+        self.assertCommentsCount(ticket, 2)
+
+        comment.content = "Changed"
+        comment.save()
+        self.assertCommentsCount(ticket, 2)
+
+        comment.delete()
+        self.assertCommentsCount(ticket, 1)
+
+    def test_comments_of_a_deleted_author_are_subtracted(self):
+        ticket = self.create_ticket()
+        author = User.objects.create_user("author", "author@example.com", "password")
+        Comment.objects.create(ticket=ticket, author=author, content="First")
+        Comment.objects.create(ticket=ticket, author=self.member, content="Second")
+
+        author.delete()
+
+        self.assertCommentsCount(ticket, 1)
+
+    def test_counter_is_returned_by_the_api(self):
+        ticket = self.create_ticket()
+        response = self.client_for(self.member).post(
+            f"/api/tasks/{ticket.pk}/comments/", {"content": "Looks good"}, format="json")
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client_for(self.member).get(f"/api/boards/{self.board.pk}/")
+
+        self.assertEqual(response.json()["tasks"][0]["comments_count"], 1)
+
+    def test_reconcile_fixes_drifted_counters(self):
+        ticket = self.create_ticket()
+        Comment.objects.create(ticket=ticket, author=self.member, content="First")
+        Ticket.objects.filter(pk=ticket.pk).update(comments_count=5)
+
+        out = StringIO()
+        call_command("reconcile_comment_counts", stdout=out)
+
+        self.assertIn("Fixed 1 drifted comment counts.", out.getvalue())
+        self.assertCommentsCount(ticket, 1)
+
+
+@skipUnlessDBFeature("supports_explaining_query_execution")
+class QueryPlanTests(KanbanTestCase):
+    """The hot queries are answered from their indexes, the keyset pages without a temporary sort."""
+
+    def assertUsesIndex(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(index, plan)
+        if connection.vendor == "sqlite":
+            self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_task_lists(self):
+        self.assertUsesIndex(Ticket.objects.filter(assignee=self.member).order_by("due_date", "id"),
+                             "ticket_assignee_due_idx")
+        self.assertUsesIndex(Ticket.objects.filter(reviewer=self.member).order_by("due_date", "id"),
+                             "ticket_reviewer_due_idx")
+
+    def test_comments_of_a_task(self):
+        ticket = self.create_ticket()
+        self.assertUsesIndex(Comment.objects.filter(ticket=ticket).order_by("created_at", "id"),
+                             "comment_ticket_created_idx")
+
+    def test_board_counters(self):
+        self.assertUsesIndex(Ticket.objects.filter(board=self.board, status="to-do"), "ticket_board_status_idx")
+        self.assertUsesIndex(Ticket.objects.filter(board=self.board, priority="high"), "ticket_board_priority_idx")
+
+    def test_email_lookup(self):
+        self.assertUsesIndex(User.objects.filter(email="member@example.com"), "auth_user_email_idx")
+
+
+class MembershipTests(KanbanTestCase):
+    """The members of a board are loaded once per request and a cached membership is dropped with every change."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_membership_is_loaded_once_per_request(self):
+        ticket = self.create_ticket()
+
+        with patch("kanban_app.membership.load_board_access", wraps=membership.load_board_access) as load:
+            response = self.client_for(self.member).patch(
+                f"/api/tasks/{ticket.pk}/", {"assignee_id": self.member.pk, "reviewer_id": self.owner.pk},
+                format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(load.call_count, 1)
+
+    @override_settings(KANBAN_MEMBERSHIP_CACHE_TIMEOUT=60)
+    def test_cached_membership_is_reused_across_requests(self):
+        client = self.client_for(self.member)
+        client.get(f"/api/boards/{self.board.pk}/")
+
+        with patch("kanban_app.membership.load_board_access", wraps=membership.load_board_access) as load:
+            self.assertEqual(client.get(f"/api/boards/{self.board.pk}/").status_code, 200)
+
+        self.assertEqual(load.call_count, 0)
+
+    @override_settings(KANBAN_MEMBERSHIP_CACHE_TIMEOUT=60)
+    def test_removed_member_loses_access(self):
+        client = self.client_for(self.member)
+        self.assertEqual(client.get(f"/api/boards/{self.board.pk}/").status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.board.members.remove(self.member)
+
+        self.assertEqual(client.get(f"/api/boards/{self.board.pk}/").status_code, 403)
+
+
+class SearchIndexTests(KanbanTestCase):
+    """The search index is kept in sync by the triggers, that have to survive every later migration."""
+
+    def test_ticket_created_after_migrating_is_found(self):
+        ticket = self.create_ticket(title="Deploy the backend")
+
+        results = self.search("Deploy")
+
+        self.assertEqual([(result["type"], result["id"]) for result in results], [("task", ticket.pk)])
+
+    def test_changed_and_deleted_tickets_are_reindexed(self):
+        ticket = self.create_ticket(title="Deploy the backend")
+        ticket.title = "Release the backend"
+        ticket.save()
+
+        self.assertEqual(self.search("Deploy"), [])
+        self.assertEqual([result["id"] for result in self.search("Release")], [ticket.pk])
+
+        ticket.delete()
+        self.assertEqual(self.search("Release"), [])
+
+    def test_comments_are_found(self):
+        ticket = self.create_ticket()
+        comment = Comment.objects.create(ticket=ticket, author=self.member, content="Needs a migration")
+
+        results = self.search("migration")
+
+        self.assertEqual([(result["type"], result["id"], result["task_id"]) for result in results],
+                         [("comment", comment.pk, ticket.pk)])
+
+
+class UserSearchTests(KanbanTestCase):
+    """The user search returns the same users from the database and the in-memory index."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        prefix_index.built_at = None
+        self.addCleanup(setattr, prefix_index, "built_at", None)
+        for number, username in enumerate(["Ärger", "ärmel", "Émile", "emil", "EMMA"]):
+            User.objects.create_user(username, f"User{number}@example.com", "password")
+
+    def test_database_and_index_agree(self):
+        for prefix in ["Ä", "ä", "É", "é", "e", "EM", "emi", "user", "USER1", "Owner"]:
+            with self.subTest(prefix=prefix):
+                with self.settings(KANBAN_USER_SEARCH={"IN_MEMORY_INDEX": False}):
+                    in_db = search_users(prefix, 10)
+                with self.settings(KANBAN_USER_SEARCH={"IN_MEMORY_INDEX": True}):
+                    in_index = search_users(prefix, 10)
+                self.assertEqual(in_db, in_index)
+
+    def test_ascii_letters_are_case_insensitive(self):
+        self.assertEqual([user["fullname"] for user in search_users("EM", 10)], ["emil", "EMMA"])
+        self.assertEqual([user["fullname"] for user in search_users("user1", 10)], ["ärmel"])
+        self.assertEqual([user["fullname"] for user in search_users("Ä", 10)], ["Ärger"])
+
+    def test_short_prefixes_are_rejected(self):
+        response = self.client_for(self.member).get("/api/users/search/", {"q": "em"})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("q", response.json())
+
+    def test_requests_are_throttled(self):
+        client = self.client_for(self.member)
+        rates = {"user-search": "2/min"}
+        with patch("rest_framework.throttling.ScopedRateThrottle.THROTTLE_RATES", rates):
+            statuses = [client.get("/api/users/search/", {"q": "emi"}).status_code for _ in range(3)]
+
+        self.assertEqual(statuses, [200, 200, 429])
+
+
+class SearchTests(KanbanTestCase):
+    """The search only finds what the user may read and is safe against the FTS5 syntax."""
+
+    def test_boards_of_other_users_are_not_searched(self):
+        stranger = User.objects.create_user("stranger", "stranger@example.com", "password")
+        other = Board.objects.create(title="Other", owner=stranger)
+        self.create_ticket(board=other, title="Deploy the backend")
+
+        self.assertEqual(self.search("Deploy"), [])
+
+    def test_title_ranks_above_description(self):
+        in_description = self.create_ticket(title="Backend", description="Deploy it on friday")
+        in_title = self.create_ticket(title="Deploy", description="On friday")
+
+        self.assertEqual([result["id"] for result in self.search("deploy")], [in_title.pk, in_description.pk])
+
+    def test_last_word_matches_as_prefix(self):
+        ticket = self.create_ticket(title="Deployment of the backend")
+
+        self.assertEqual([result["id"] for result in self.search("backend deploy")], [ticket.pk])
+
+    def test_operators_are_searched_as_words(self):
+        self.create_ticket(title="Deploy the backend")
+
+        for text in ['deploy OR "', "NEAR(deploy", "title:deploy AND -x"]:
+            self.search(text)
+
+        self.assertEqual(self.search("deploy OR nothing"), [])
+        self.assertEqual(len(self.search("deploy backend")), 1)
+
+    def test_query_is_required(self):
+        for text in ["  ", "*", '"']:
+            response = self.client_for(self.owner).get("/api/search/", {"q": text})
+
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("q", response.json())
+
+
+class ConditionalRequestTests(KanbanTestCase):
+    """The ETag of the board list and the board detail changes with every change, that is visible in them."""
+
+    def get(self, url, etag=None, user=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client_for(user or self.member).get(url, **headers)
+
+    def test_unchanged_board_list_is_not_modified(self):
+        etag = self.get("/api/boards/")["ETag"]
+
+        response = self.get("/api/boards/", etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertFalse(response.has_header("Last-Modified"))
+
+    def test_board_list_changes_with_a_ticket(self):
+        etag = self.get("/api/boards/")["ETag"]
+
+        self.create_ticket()
+
+        self.assertEqual(self.get("/api/boards/", etag).status_code, 200)
+
+    def test_board_list_changes_when_a_board_is_deleted(self):
+        other = Board.objects.create(title="Other", owner=self.owner)
+        other.members.add(self.member)
+        etag = self.get("/api/boards/")["ETag"]
+
+        other.delete()
+
+        response = self.get("/api/boards/", etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([board["id"] for board in response.json()], [self.board.pk])
+
+    def test_board_list_changes_when_the_membership_is_lost(self):
+        etag = self.get("/api/boards/")["ETag"]
+
+        self.board.members.remove(self.member)
+
+        response = self.get("/api/boards/", etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+
+    def test_board_detail_is_not_modified_until_a_ticket_changes(self):
+        url = f"/api/boards/{self.board.pk}/"
+        ticket = self.create_ticket()
+        etag = self.get(url)["ETag"]
+
+        self.assertEqual(self.get(url, etag).status_code, 304)
+
+        ticket.status = "done"
+        ticket.save()
+        self.assertEqual(self.get(url, etag).status_code, 200)
+
+    def test_board_detail_changes_with_a_renamed_user(self):
+        url = f"/api/boards/{self.board.pk}/"
+        self.create_ticket(assignee=self.member, reviewer=self.member)
+        for user in [self.owner, self.member]:
+            with self.subTest(user=user.username):
+                etag = self.get(url)["ETag"]
+
+                user.username = f"renamed-{user.pk}"
+                user.save()
+
+                response = self.get(url, etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(f"renamed-{user.pk}".encode(), response.content)
+
+    def test_login_does_not_change_the_board_detail(self):
+        url = f"/api/boards/{self.board.pk}/"
+        etag = self.get(url)["ETag"]
+
+        self.owner.save(update_fields=["last_login"])
+
+        self.assertEqual(self.get(url, etag).status_code, 304)
+
+    def test_formats_have_their_own_etag(self):
+        for url in ["/api/boards/", f"/api/boards/{self.board.pk}/"]:
+            json_etag = self.get(url)["ETag"]
+            response = self.client_for(self.member).get(url, {"format": "msgpack"}, HTTP_IF_NONE_MATCH=json_etag)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Type"], "application/msgpack")
+            self.assertNotEqual(response["ETag"], json_etag)
+
+
+class StreamingTests(KanbanTestCase):
+    """A streamed board has the same body as the regular one, also under ASGI."""
+
+    def setUp(self):
+        super().setUp()
+        for number in range(5):
+            self.create_ticket(title=f"Ticket {number}")
+        self.url = f"/api/boards/{self.board.pk}/"
+
+    def test_streamed_board_is_the_same(self):
+        client = self.client_for(self.member)
+
+        response = client.get(self.url, {"stream": "true"})
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(b"".join(response.streaming_content), client.get(self.url).content)
+
+    def test_streamed_fieldset_with_only_the_tasks_is_the_same(self):
+        client = self.client_for(self.member)
+        params = {"fields": "tasks"}
+
+        response = client.get(self.url, {**params, "stream": "true"})
+
+        self.assertEqual(b"".join(response.streaming_content), client.get(self.url, params).content)
+
+    async def test_streamed_board_is_sent_in_chunks_under_asgi(self):
+        token = await Token.objects.acreate(user=self.member)
+        headers = {"Authorization": f"Token {token.key}"}
+
+        response = await AsyncClient().get(self.url, {"stream": "true"}, headers=headers)
+
+        self.assertTrue(response.is_async)
+        streamed = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(streamed, (await AsyncClient().get(self.url, headers=headers)).content)
+
+
+class FieldsetTests(KanbanTestCase):
+    """Only the fields and relations, that were asked for, are loaded and returned."""
+
+    def setUp(self):
+        super().setUp()
+        self.ticket = self.create_ticket(assignee=self.member, reviewer=self.owner)
+        self.url = f"/api/boards/{self.board.pk}/"
+
+    def get(self, url, params, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_for(self.member).get(url, params, **headers)
+        return response, [query["sql"] for query in queries]
+
+    def test_only_the_requested_fields_are_returned(self):
+        response, _ = self.get(self.url, {"fields": "id,title,tasks.id,tasks.title"})
+
+        self.assertEqual(response.json(), {"id": self.board.pk, "title": "Board",
+                                           "tasks": [{"id": self.ticket.pk, "title": "Ticket"}]})
+
+    def test_relations_are_ids_unless_expanded(self):
+        response, queries = self.get(self.url, {"fields": "tasks.id,tasks.assignee"})
+        self.assertEqual(response.json()["tasks"], [{"id": self.ticket.pk, "assignee": self.member.pk}])
+        self.assertFalse([sql for sql in queries if '"auth_user"' in sql])
+
+        response, _ = self.get(self.url, {"fields": "tasks.id,tasks.assignee", "expand": "tasks.assignee"})
+        self.assertEqual(response.json()["tasks"][0]["assignee"]["fullname"], "member")
+
+    def test_task_lists_support_fieldsets(self):
+        response, _ = self.get("/api/tasks/assigned-to-me/", {"fields": "id,reviewer", "expand": "reviewer"})
+
+        self.assertEqual(response.json(), [{"id": self.ticket.pk, "reviewer": {
+            "id": self.owner.pk, "email": "owner@example.com", "fullname": "owner"}}])
+
+    def test_fieldsets_have_their_own_etag(self):
+        etag = self.get(self.url, {})[0]["ETag"]
+        response, _ = self.get(self.url, {"fields": "id,title"}, etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(self.get(self.url, {"fields": "id,title"}, response["ETag"])[0].status_code, 304)
+
+
+class AsyncPermissionTests(KanbanTestCase):
+    """The async views check the permissions before the handler and answer like the sync views."""
+
+    async def get_async(self, view_class, url, **kwargs):
+        return await view_class.as_view()(AsyncRequestFactory().get(url), **kwargs)
+
+    async def test_anonymous_requests_are_rejected_like_in_the_sync_views(self):
+        ticket = await sync_to_async(self.create_ticket)()
+        views = [
+            (async_views.AsyncListCreateBoardView, "/api/boards/", {}),
+            (async_views.AsyncRetrieveBoardView, f"/api/boards/{self.board.pk}/", {"pk": self.board.pk}),
+            (async_views.AsyncAssignedToMeView, "/api/tasks/assigned-to-me/", {}),
+            (async_views.AsyncReviewView, "/api/tasks/reviewing/", {}),
+            (async_views.AsyncListCommentView, f"/api/tasks/{ticket.pk}/comments/", {"pk": ticket.pk}),
+        ]
+        for view_class, url, kwargs in views:
+            with self.subTest(url=url):
+                response = await self.get_async(view_class, url, **kwargs)
+                expected = await sync_to_async(APIClient().get)(url)
+
+                self.assertEqual(response.status_code, 401)
+                self.assertEqual((response.status_code, response.content), (expected.status_code, expected.content))
+
+    async def test_anonymous_event_stream_is_rejected(self):
+        response = await self.get_async(async_views.BoardEventsView, f"/api/boards/{self.board.pk}/events/",
+                                         pk=self.board.pk)
+
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(response.streaming)
+
+
+class EventBrokerTests(TestCase):
+    """The brokers deliver the events of a board to its subscribers and keep nothing for boards without any."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    async def test_local_broker_delivers_to_the_subscribers_of_the_board(self):
+        broker = events.LocalBroker()
+        subscription = broker.subscribe(1)
+        other = broker.subscribe(2)
+
+        broker.publish(1, {"type": "task.updated"})
+
+        self.assertEqual(await asyncio.wait_for(subscription.get(), 1), {"type": "task.updated"})
+        self.assertTrue(other.queue.empty())
+        broker.unsubscribe(subscription)
+        self.assertNotIn(1, broker.subscribers)
+
+    async def test_slow_subscriber_overflows(self):
+        broker = events.LocalBroker()
+        subscription = events.Subscription(1, maxsize=2)
+        broker.subscribers[1].add(subscription)
+
+        for number in range(3):
+            broker.publish(1, {"number": number})
+        await asyncio.sleep(0)
+
+        self.assertEqual(await subscription.get(), {"number": 1})
+        self.assertIs(await subscription.get(), events.OVERFLOW)
+
+    def test_spool_file_is_only_written_with_readers(self):
+        broker = events.FileSpoolBroker(DIRECTORY=self.directory, READER_TIMEOUT=30)
+        broker.publish(1, {"type": "task.updated"})
+        self.assertFalse(os.path.exists(broker.path(1)))
+
+        # A reader in another process.
+        reader_path = os.path.join(self.directory, "board-1.99999.reader")
+        open(reader_path, "w").close()
+        broker.publish(1, {"type": "task.updated"})
+        self.assertTrue(os.path.exists(broker.path(1)))
+
+        # The reader stopped without removing its file.
+        os.utime(reader_path, (time.time() - 60, time.time() - 60))
+        broker.publish(1, {"type": "task.updated"})
+        self.assertFalse(os.path.exists(broker.path(1)))
+
+    async def test_spooled_events_reach_the_subscribers(self):
+        broker = events.FileSpoolBroker(DIRECTORY=self.directory, POLL_INTERVAL=0.01)
+        subscription = broker.subscribe(1)
+
+        broker.publish(1, {"type": "task.updated", "board": 1})
+
+        self.assertEqual(await asyncio.wait_for(subscription.get(), 1), {"type": "task.updated", "board": 1})
+        broker.unsubscribe(subscription)
+        await asyncio.wait_for(broker.poller, 1)
+        self.assertFalse(broker.has_readers(1))
+
+
+class BulkTaskTests(KanbanTestCase):
+    """Every item of a bulk update addresses a task by its integer id."""
+
+    def test_boolean_id_is_rejected(self):
+        ticket = self.create_ticket()
+
+        response = self.client_for(self.owner).patch(
+            "/api/tasks/bulk/", [{"id": True, "status": "done"}], format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), [{"id": ["Task not found."]}])
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.status, "to-do")
+
+    def test_tasks_are_updated(self):
+        ticket = self.create_ticket()
+
+        response = self.client_for(self.owner).patch(
+            "/api/tasks/bulk/", [{"id": ticket.pk, "status": "done"}], format="json")
+
+        self.assertEqual(response.status_code, 200)
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.status, "done")
+
+
+class MemberUpdateTests(KanbanTestCase):
+    """A member update only writes the difference to the current members."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user("user", "user@example.com", "password")
+        self.url = f"/api/boards/{self.board.pk}/"
+
+    def membership_ids(self):
+        return dict(Board.members.through.objects.filter(board=self.board).values_list("user_id", "pk"))
+
+    def test_members_are_replaced_by_the_difference(self):
+        before = self.membership_ids()
+
+        response = self.client_for(self.owner).patch(
+            self.url, {"members": [self.owner.pk, self.user.pk]}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([member["id"] for member in response.json()["members_data"]], [self.owner.pk, self.user.pk])
+        after = self.membership_ids()
+        self.assertEqual(set(after), {self.owner.pk, self.user.pk})
+        self.assertEqual(after[self.owner.pk], before[self.owner.pk])
+
+    def test_members_are_added_and_removed(self):
+        response = self.client_for(self.owner).patch(
+            self.url, {"add_members": [self.user.pk], "remove_members": [self.member.pk]}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([member["id"] for member in response.json()["members_data"]], [self.owner.pk, self.user.pk])
+        self.assertEqual(set(self.membership_ids()), {self.owner.pk, self.user.pk})
+
+    def test_members_can_not_be_replaced_and_changed_at_once(self):
+        response = self.client_for(self.owner).patch(
+            self.url, {"members": [self.owner.pk], "add_members": [self.user.pk]}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("members", response.json())
+
+
+class BoardChangesTests(KanbanTestCase):
+    """A client, that follows the cursor, sees every change once or has to reload the board."""
+
+    def changes(self, since=None):
+        params = {"since": since} if since is not None else {}
+        return self.client_for(self.member).get(f"/api/boards/{self.board.pk}/changes/", params)
+
+    def create_task(self):
+        data = {"board": self.board.pk, "title": "Task", "description": "Description", "status": "to-do",
+                "priority": "low", "due_date": "2026-01-01"}
+        response = self.client_for(self.owner).post("/api/tasks/", data, format="json")
+        self.assertEqual(response.status_code, 201)
+        return response.json()["id"]
+
+    def test_changes_since_the_cursor(self):
+        cursor = self.changes().json()["cursor"]
+        task_id = self.create_task()
+        deleted_id = self.create_task()
+        self.client_for(self.owner).delete(f"/api/tasks/{deleted_id}/")
+
+        data = self.changes(cursor).json()
+
+        self.assertEqual([task["id"] for task in data["tasks"]], [task_id])
+        self.assertEqual(data["deleted_tasks"], [deleted_id])
+        self.assertFalse(data["has_more"])
+        self.assertEqual(self.changes(data["cursor"]).json()["tasks"], [])
+
+    def test_compacted_cursor_is_gone(self):
+        cursor = self.changes().json()["cursor"]
+        self.create_task()
+        latest = self.changes().json()["cursor"]
+
+        changes.truncate(self.board.pk, latest)
+
+        self.assertEqual(self.changes(cursor).status_code, 410)
+        self.assertEqual(self.changes(latest).status_code, 200)
+
+    def test_invalid_cursors_are_rejected(self):
+        for since in ["-1", "abc", str(changes.MAX_CURSOR + 1)]:
+            response = self.changes(since)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("since", response.json())
+
+        self.assertEqual(self.changes(changes.MAX_CURSOR).status_code, 200)
+
+    def test_comments_change_the_task(self):
+        task_id = self.create_task()
+        cursor = self.changes().json()["cursor"]
+
+        response = self.client_for(self.owner).post(
+            f"/api/tasks/{task_id}/comments/", {"content": "Looks good"}, format="json")
+        data = self.changes(cursor).json()
+        self.assertEqual([(task["id"], task["comments_count"]) for task in data["tasks"]], [(task_id, 1)])
+
+        self.client_for(self.owner).delete(f"/api/tasks/{task_id}/comments/{response.json()['id']}/")
+        data = self.changes(data["cursor"]).json()
+        self.assertEqual([(task["id"], task["comments_count"]) for task in data["tasks"]], [(task_id, 0)])
+
+    def test_superseded_entries_are_removed_in_chunks(self):
+        task_id = self.create_task()
+        for _ in range(4):
+            changes.record(self.board.pk, "task", [task_id])
+        latest = BoardChange.objects.latest("pk").pk
+
+        self.assertEqual(changes.remove_superseded(chunk_size=2), 4)
+        self.assertEqual(list(BoardChange.objects.filter(object_id=task_id).values_list("pk", flat=True)), [latest])
+
+
+@override_settings(KANBAN_RESPONSE_CACHE_TIMEOUT=60)
+class ResponseCacheTests(KanbanTestCase):
+    """A cached list is served without a query until something in it changes."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_hit_and_not_modified_are_answered_from_the_entry(self):
+        client = self.client_for(self.member)
+        etag = client.get("/api/boards/")["ETag"]
+
+        with self.assertNumQueries(0):
+            self.assertEqual(client.get("/api/boards/").status_code, 200)
+            response = client.get("/api/boards/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_board_list_is_invalidated_by_a_ticket(self):
+        client = self.client_for(self.member)
+        etag = client.get("/api/boards/")["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_ticket(priority="high")
+
+        response = client.get("/api/boards/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["tasks_high_prio_count"], 1)
+
+    def test_board_list_is_invalidated_by_a_removed_membership(self):
+        client = self.client_for(self.member)
+        client.get("/api/boards/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.board.members.remove(self.member)
+
+        self.assertEqual(client.get("/api/boards/").json(), [])
+
+    def test_task_list_is_invalidated_by_a_renamed_reviewer(self):
+        self.create_ticket(assignee=self.member, reviewer=self.owner)
+        client = self.client_for(self.member)
+        client.get("/api/tasks/assigned-to-me/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.owner.username = "renamed"
+            self.owner.save()
+
+        response = client.get("/api/tasks/assigned-to-me/")
+        self.assertEqual(response.json()[0]["reviewer"]["fullname"], "renamed")
@@ -0,0 +1,171 @@
+import string
+import threading
+import time
+from bisect import bisect_left, insort
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models.functions import Lower
+
+
+# Appended to a prefix to get the upper bound of its range, it sorts after every other character.
+MAX_CHAR = "\U0010ffff"
+
+# lower() of SQLite only lowercases A-Z, the in-memory index folds the keys the same way.
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+DEFAULTS = {
+    "IN_MEMORY_INDEX": False,
+    "MAX_AGE": 300,
+}
+
+
+def get_setting(name):
+    """Returns a value of the KANBAN_USER_SEARCH setting or its default."""
+
+    return getattr(settings, "KANBAN_USER_SEARCH", {}).get(name, DEFAULTS[name])
+
+
+def fold(text):
+    """
+    Lowercases only the ASCII letters, like lower() of SQLite does.
+
+    Both ways of the search compare the folded values, so they return the same users.
+    Other letters, like umlauts, are compared case sensitive.
+    """
+
+    return text.translate(ASCII_LOWER)
+
+
+def normalize(prefix):
+    return fold(prefix.strip())
+
+
+def user_data(user_id, email, username):
+    """Returns the search result of a user, in the format of the email check."""
+
+    return {"id": user_id, "email": email, "fullname": username}
+
+
+def search_users(prefix, limit):
+    """
+    Returns the first active users, whose email or username starts with the prefix.
+
+    The results are ordered by the matching email or username, case insensitive.
+    Uses the in-memory index if it's enabled, otherwise search_users_in_db().
+    """
+
+    prefix = normalize(prefix)
+    if get_setting("IN_MEMORY_INDEX"):
+        return prefix_index.search(prefix, limit)
+    return search_users_in_db(prefix, limit)
+
+
+def search_users_in_db(prefix, limit):
+    """
+    Searches the users with one range query per field.
+
+    Both queries filter and order by lower(email) or lower(username), so they read the first
+    entries of the expression indexes of the auth_app migrations and stop after limit rows,
+    no matter how many users exist. A LIKE 'prefix%' query couldn't use these indexes in SQLite.
+    """
+
+    candidates = []
+    for field in ["email", "username"]:
+        candidates.extend(User.objects
+                          .annotate(key=Lower(field))
+                          .filter(key__gte=prefix, key__lt=prefix + MAX_CHAR, is_active=True)
+                          .order_by("key", "id")
+                          .values_list("key", "id", "email", "username")[:limit])
+    return merge(sorted(candidates), limit)
+
+
+def merge(candidates, limit):
+    """Returns the users of the sorted (key, id, email, username) candidates without duplicates."""
+
+    results, seen = [], set()
+    for key, user_id, email, username in candidates:
+        if user_id in seen:
+            continue
+        seen.add(user_id)
+        results.append(user_data(user_id, email, username))
+        if len(results) == limit:
+            break
+    return results
+
+
+class PrefixIndex:
+    """
+    In-memory index of the emails and usernames of all active users, searched with bisect.
+
+    It makes sure that:
+        - a search only costs a binary search and reading the matches, without a query
+        - it's kept up to date by the user signals of this process
+        - it's rebuilt after max_age seconds, so changes made by other processes show up eventually
+        - it can be used from several threads at once
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.keys = []
+        self.users = {}
+        self.built_at = None
+
+    def build(self):
+        """Loads all active users with one query."""
+
+        users = {user_id: (email, username) for user_id, email, username in
+                 User.objects.filter(is_active=True).values_list("id", "email", "username").iterator(chunk_size=5000)}
+        keys = sorted(key for user_id, values in users.items() for key in self.keys_of(user_id, *values))
+        with self.lock:
+            self.users = users
+            self.keys = keys
+            self.built_at = time.monotonic()
+
+    def keys_of(self, user_id, email, username):
+        return [(fold(email), user_id), (fold(username), user_id)]
+
+    def ensure_fresh(self):
+        if self.built_at is None or time.monotonic() - self.built_at > get_setting("MAX_AGE"):
+            self.build()
+
+    def search(self, prefix, limit):
+        self.ensure_fresh()
+        with self.lock:
+            candidates = []
+            position = bisect_left(self.keys, (prefix,))
+            while position < len(self.keys) and len(candidates) < 2 * limit:
+                key, user_id = self.keys[position]
+                if not key.startswith(prefix):
+                    break
+                candidates.append((key, user_id, *self.users[user_id]))
+                position += 1
+        return merge(candidates, limit)
+
+    def update(self, user):
+        """Adds, changes or removes a single user, if the index was built already."""
+
+        with self.lock:
+            if self.built_at is None:
+                return
+            self.remove_keys(user.pk)
+            if user.is_active:
+                self.users[user.pk] = (user.email, user.username)
+                for key in self.keys_of(user.pk, user.email, user.username):
+                    insort(self.keys, key)
+
+    def remove(self, user_id):
+        with self.lock:
+            if self.built_at is not None:
+                self.remove_keys(user_id)
+
+    def remove_keys(self, user_id):
+        values = self.users.pop(user_id, None)
+        if values is None:
+            return
+        for key in self.keys_of(user_id, *values):
+            position = bisect_left(self.keys, key)
+            if position < len(self.keys) and self.keys[position] == key:
+                del self.keys[position]
+
+
+prefix_index = PrefixIndex()